@@ -0,0 +1,343 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import time
+from playwright.sync_api import TimeoutError
+from gateway import admin_url
+from browser_profile import apply_browser_profile, apply_browser_profile_async
+
+SESSION_FILE = 'auth_state.json'
+
+# Cheap authenticated endpoint used to confirm a restored session still works
+SESSION_CHECK_PATH = "/gateway/api/me"
+
+# Cookies that carry the login itself; the session ends when the first of these expires
+AUTH_COOKIE_NAMES = ('cloud.session.token', 'tenant.session.token')
+
+def handle_login(page, config):
+    """Handle the complete login process with proper redirects"""
+    print("Navigating to Atlassian login...")
+    page.goto(admin_url())
+    
+    # Wait for and click the login button if present
+    try:
+        page.wait_for_selector('text=Log in', timeout=5000)
+        page.click('text=Log in')
+        print("Clicked on Log in button")
+    except:
+        print("No login button found, proceeding directly")
+    
+    # Wait for email field - could be on id.atlassian.com or admin.atlassian.com
+    try:
+        page.wait_for_selector('input[type="email"]', timeout=10000)
+        print("Email field found")
+    except:
+        print("Email field not found, checking current URL")
+        print(f"Current URL: {page.url}")
+        return False
+    
+    # Fill email
+    page.fill('input[type="email"]', config['email'])
+    print("Email filled")
+    
+    # Click continue
+    page.click('button:has-text("Continue")')
+    print("Clicked Continue")
+    
+    # Wait for password field or redirect
+    try:
+        page.wait_for_selector('input[type="password"]', timeout=5000)
+        print("Password field found")
+        
+        # Fill password
+        page.fill('input[type="password"]', config['password'])
+        print("Password filled")
+        
+        # Click login
+        page.click('button:has-text("Log in")')
+        print("Clicked Log in")
+    except:
+        print("No password field found, may be already logged in or SSO")
+    
+    # Wait for redirect to admin portal
+    try:
+        page.wait_for_url(f"{admin_url()}/o/*/overview", timeout=15000)
+        print("Successfully redirected to admin portal")
+        return True
+    except TimeoutError:
+        print("Timeout waiting for admin portal redirect")
+        print(f"Current URL: {page.url}")
+        
+        # Check if we're on a consent page or need to accept terms
+        if page.query_selector('button:has-text("Accept all")'):
+            page.click('button:has-text("Accept all")')
+            print("Accepted terms")
+            page.wait_for_url(f"{admin_url()}/o/*/overview", timeout=10000)
+            return True
+        
+        # Check if we're already on a admin page
+        if page.url.startswith(admin_url()) and "/o/" in page.url:
+            print("Already on admin page")
+            return True
+            
+        return False
+
+def extract_account_id(page):
+    """Extract account ID from the current URL"""
+    try:
+        account_id = page.url.split("/o/")[1].split("/")[0]
+        print(f"Account ID: {account_id}")
+        return account_id
+    except IndexError:
+        print("Could not extract account ID from URL")
+        return None
+
+def load_saved_session(path=SESSION_FILE):
+    """Load a saved session (storage state plus account ID), or None if there is none"""
+    if not os.path.exists(path):
+        return None
+    
+    try:
+        with open(path, 'r') as f:
+            session = json.load(f)
+    except Exception as e:
+        print(f"Could not load saved session: {e}")
+        return None
+    
+    if not session.get('storage_state') or not session.get('account_id'):
+        return None
+    return session
+
+def save_session(context, account_id, path=SESSION_FILE):
+    """Persist the authenticated context's storage state so later runs can skip login"""
+    write_session(context.storage_state(), account_id, path)
+
+def write_session(storage_state, account_id, path=SESSION_FILE):
+    """Write a storage state and account ID to the session file; shared by the sync and async logins"""
+    session = {
+        'account_id': account_id,
+        'saved_at': int(time.time()),
+        'storage_state': storage_state
+    }
+    
+    # Write to a temp file first so a crash never leaves a half-written session behind.
+    # The file holds live session cookies, so it is created private to the current user
+    # rather than chmod-ed afterwards, which would leave it readable in between.
+    tmp_path = f"{path}.tmp"
+    # A leftover temp file from a crashed run would keep its old mode, so start fresh
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(session, f)
+    os.replace(tmp_path, path)
+    print(f"Saved session to {path}")
+
+def session_expires_at(storage_state):
+    """Latest cookie expiry as a Unix timestamp, or None when no cookie has an expiry date"""
+    expiries = [cookie.get('expires', -1) for cookie in storage_state.get('cookies', [])]
+    expiries = [expires for expires in expiries if expires and expires > 0]
+    return max(expiries) if expiries else None
+
+def auth_expires_at(storage_state):
+    """Earliest expiry among the auth cookies, or among all cookies when none of them is present.
+    
+    This is when the login actually lapses, unlike session_expires_at which
+    only says when the last cookie of any kind goes away.
+    """
+    cookies = storage_state.get('cookies', [])
+    auth_cookies = [cookie for cookie in cookies if cookie.get('name') in AUTH_COOKIE_NAMES] or cookies
+    expiries = [cookie.get('expires', -1) for cookie in auth_cookies]
+    expiries = [expires for expires in expiries if expires and expires > 0]
+    return min(expiries) if expiries else None
+
+def session_cookies_expired(storage_state, now=None):
+    """Check cookie expiry locally; True when every cookie with an expiry date has passed"""
+    now = now or time.time()
+    
+    if not storage_state.get('cookies'):
+        return True
+    expires_at = session_expires_at(storage_state)
+    return expires_at is not None and expires_at <= now
+
+def is_session_valid(context):
+    """Make one lightweight authenticated request to confirm the session is still accepted"""
+    try:
+        response = context.request.get(f"{admin_url()}{SESSION_CHECK_PATH}", max_redirects=0, timeout=10000)
+        return response.ok
+    except Exception as e:
+        print(f"Session check failed: {e}")
+        return False
+
+def restore_session(browser, config, **context_options):
+    """Open a context from the saved session; returns (context, account_id) or (None, None) if it has expired"""
+    session = load_saved_session(config.get('session_file', SESSION_FILE))
+    if not session:
+        return None, None
+    
+    if session_cookies_expired(session['storage_state']):
+        print("Saved session cookies have expired")
+        return None, None
+    
+    context = browser.new_context(storage_state=session['storage_state'], **context_options)
+    apply_browser_profile(context, config)
+    if not is_session_valid(context):
+        print("Saved session is no longer valid")
+        context.close()
+        return None, None
+    
+    print(f"Reusing saved session for account {session['account_id']}")
+    return context, session['account_id']
+
+def open_authenticated_context(browser, config, force_login=False, **context_options):
+    """Return (context, page, account_id) for a logged-in admin, reusing the saved session when possible.
+    
+    Falls back to a full handle_login only when there is no saved session or it
+    has expired, or when force_login asks for a fresh one. Returns
+    (None, None, None) if login fails.
+    """
+    if config.get('reuse_session', True) and not force_login:
+        context, account_id = restore_session(browser, config, **context_options)
+        if context:
+            page = context.new_page()
+            # Same-origin gateway fetches need the page on the admin portal; no need to wait for the full SPA
+            page.goto(f"{admin_url()}/o/{account_id}/overview", wait_until='domcontentloaded')
+            return context, page, account_id
+    
+    context = browser.new_context(**context_options)
+    apply_browser_profile(context, config)
+    page = context.new_page()
+    
+    if not handle_login(page, config):
+        context.close()
+        return None, None, None
+    
+    account_id = extract_account_id(page)
+    if not account_id:
+        print("Could not extract account ID. Exiting.")
+        context.close()
+        return None, None, None
+    
+    if config.get('reuse_session', True):
+        save_session(context, account_id, config.get('session_file', SESSION_FILE))
+    
+    return context, page, account_id
+
+# Async counterparts of the login helpers above, so the async pipeline logs in inside its own browser
+
+async def handle_login_async(page, config):
+    """Async counterpart of handle_login for `playwright.async_api` pages"""
+    print("Navigating to Atlassian login...")
+    await page.goto(admin_url())
+    
+    try:
+        await page.wait_for_selector('text=Log in', timeout=5000)
+        await page.click('text=Log in')
+        print("Clicked on Log in button")
+    except:
+        print("No login button found, proceeding directly")
+    
+    try:
+        await page.wait_for_selector('input[type="email"]', timeout=10000)
+        print("Email field found")
+    except:
+        print("Email field not found, checking current URL")
+        print(f"Current URL: {page.url}")
+        return False
+    
+    await page.fill('input[type="email"]', config['email'])
+    await page.click('button:has-text("Continue")')
+    print("Email filled, clicked Continue")
+    
+    try:
+        await page.wait_for_selector('input[type="password"]', timeout=5000)
+        await page.fill('input[type="password"]', config['password'])
+        await page.click('button:has-text("Log in")')
+        print("Password filled, clicked Log in")
+    except:
+        print("No password field found, may be already logged in or SSO")
+    
+    try:
+        await page.wait_for_url(f"{admin_url()}/o/*/overview", timeout=15000)
+        print("Successfully redirected to admin portal")
+        return True
+    except TimeoutError:
+        print("Timeout waiting for admin portal redirect")
+        print(f"Current URL: {page.url}")
+        
+        if await page.query_selector('button:has-text("Accept all")'):
+            await page.click('button:has-text("Accept all")')
+            print("Accepted terms")
+            await page.wait_for_url(f"{admin_url()}/o/*/overview", timeout=10000)
+            return True
+        
+        if page.url.startswith(admin_url()) and "/o/" in page.url:
+            print("Already on admin page")
+            return True
+        
+        return False
+
+async def is_session_valid_async(context):
+    try:
+        response = await context.request.get(f"{admin_url()}{SESSION_CHECK_PATH}", max_redirects=0, timeout=10000)
+        return response.ok
+    except Exception as e:
+        print(f"Session check failed: {e}")
+        return False
+
+async def open_authenticated_context_async(browser, config, **context_options):
+    """Async counterpart of open_authenticated_context; returns (context, page, account_id) or (None, None, None)"""
+    if config.get('reuse_session', True):
+        session = load_saved_session(config.get('session_file', SESSION_FILE))
+        if session and not session_cookies_expired(session['storage_state']):
+            context = await browser.new_context(storage_state=session['storage_state'], **context_options)
+            await apply_browser_profile_async(context, config)
+            if await is_session_valid_async(context):
+                print(f"Reusing saved session for account {session['account_id']}")
+                page = await context.new_page()
+                await page.goto(f"{admin_url()}/o/{session['account_id']}/overview", wait_until='domcontentloaded')
+                return context, page, session['account_id']
+            print("Saved session is no longer valid")
+            await context.close()
+    
+    context = await browser.new_context(**context_options)
+    await apply_browser_profile_async(context, config)
+    page = await context.new_page()
+    
+    if not await handle_login_async(page, config):
+        await context.close()
+        return None, None, None
+    
+    account_id = extract_account_id(page)
+    if not account_id:
+        print("Could not extract account ID. Exiting.")
+        await context.close()
+        return None, None, None
+    
+    if config.get('reuse_session', True):
+        write_session(await context.storage_state(), account_id, config.get('session_file', SESSION_FILE))
+    
+    return context, page, account_id
@@ -0,0 +1,257 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import threading
+import time
+from extract_data import (
+    as_membership_graph,
+    fetch_group_memberships_via_api,
+    fetch_groups_via_api,
+    fetch_last_active_dates,
+    fetch_users_via_api,
+    last_active_options,
+    parse_groups_data,
+    parse_users_data
+)
+from gateway import PageTransport, RateLimiter, SessionTransport, configure_admin_url
+from mock_gateway import MOCK_ORG_ID, MockOrg, start_mock_gateway
+from records import Membership
+
+STATM_PATH = '/proc/self/statm'
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if os.uname().sysname == 'Darwin' else peak / 1024
+
+def current_rss_mb():
+    """Resident set size right now from /proc/self/statm, or None where there is no /proc"""
+    try:
+        with open(STATM_PATH, 'r') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+class RssSampler:
+    """Samples the current RSS on a background thread and keeps the highest value seen.
+    
+    ru_maxrss never resets, so it cannot give one phase's own peak; sampling
+    can. Without /proc it falls back to ru_maxrss, the peak so far.
+    """
+    
+    def __init__(self, interval_s=0.01):
+        self.interval_s = interval_s
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+    
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+    
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        if self.peak is None:
+            self.peak = peak_rss_mb()
+
+class PhaseTimer:
+    """Collects wall time, item throughput, the phase's own peak RSS and server-side request counts per phase"""
+    
+    def __init__(self, server=None, verbose=False):
+        self.server = server
+        self.verbose = verbose
+        self.phases = []
+    
+    def run(self, name, func, count_items=len):
+        before = self.server.snapshot_stats() if self.server else None
+        output = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+        
+        started = time.perf_counter()
+        with output, RssSampler() as rss:
+            result = func()
+        wall = time.perf_counter() - started
+        
+        items = count_items(result)
+        phase = {
+            'phase': name,
+            'wall_s': round(wall, 3),
+            'items': items,
+            'items_per_s': round(items / wall, 1) if wall > 0 else None,
+            'peak_rss_mb': round(rss.peak, 1)
+        }
+        if before is not None:
+            after = self.server.snapshot_stats()
+            for key in ('requests', 'throttled', 'bytes_sent'):
+                phase[key] = after[key] - before[key]
+        self.phases.append(phase)
+        line = (f"{name:<12} {phase['wall_s']:>9.3f}s {items:>10} items {phase['items_per_s'] or 0:>12.1f}/s "
+                f"{phase['peak_rss_mb']:>9.1f} MB peak RSS")
+        if before is not None:
+            line += f" {phase['requests']:>7} requests {phase['throttled']:>5} throttled"
+        print(line)
+        return result
+
+def run_benchmark(transport, account_id, config, timer):
+    """Run every extraction phase against the transport, in the order extract_data.py runs them"""
+    users_data = timer.run('users', lambda: fetch_users_via_api(
+        transport, account_id, config.get('user_partitions'), config.get('user_partition_concurrency', 8)
+    ))
+    groups_data = timer.run('groups', lambda: fetch_groups_via_api(
+        transport, account_id, config.get('groups_prefetch_window', 8)
+    ))
+    user_ids = [user.id for user in users_data if user.id]
+    last_active_data = timer.run('last_active', lambda: fetch_last_active_dates(
+        transport, account_id, user_ids, **last_active_options(config)
+    ))
+    members_by_group = timer.run('memberships', lambda: fetch_group_memberships_via_api(
+        transport, account_id, groups_data, config.get('membership_concurrency', 10)
+    ), count_items=lambda members: sum(len(ids or []) for ids in members.values()))
+    
+    memberships_data = [Membership(group_id, ids or ()) for group_id, ids in members_by_group.items()]
+    
+    def parse():
+        graph = as_membership_graph(memberships_data)
+        return parse_users_data(users_data, graph, last_active_data) + parse_groups_data(groups_data, graph)
+    timer.run('parse', parse)
+
+def compare_with_baseline(phases, baseline_path):
+    with open(baseline_path, 'r') as f:
+        baseline = {phase['phase']: phase for phase in json.load(f)['phases']}
+    
+    print("=" * 50)
+    print(f"COMPARED WITH {baseline_path}")
+    print("=" * 50)
+    for phase in phases:
+        previous = baseline.get(phase['phase'])
+        if previous and phase['wall_s']:
+            print(f"{phase['phase']:<12} {previous['wall_s'] / phase['wall_s']:>6.2f}x "
+                  f"({previous['wall_s']:.3f}s -> {phase['wall_s']:.3f}s)")
+
+def load_config(path):
+    if path and os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the extraction phases against the mock gateway")
+    parser.add_argument('--config', default='config.json', help="tuning keys are read from here if it exists")
+    parser.add_argument('--url', help="use an already running mock gateway instead of starting one")
+    parser.add_argument('--org', default=MOCK_ORG_ID)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--groups', type=int, default=1000)
+    parser.add_argument('--members-per-group', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--jitter-ms', type=float, default=5)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=0.5)
+    parser.add_argument('--rate-limit', type=float, help="override the config's rate_limit (requests/s)")
+    parser.add_argument('--transport', choices=['http', 'browser'], default='http')
+    parser.add_argument('--output', help="write the results as JSON, e.g. to keep as a baseline")
+    parser.add_argument('--baseline', help="earlier --output file to report speedups against")
+    parser.add_argument('--verbose', action='store_true', help="show the extraction's own output")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    config = load_config(args.config)
+    if args.rate_limit:
+        config['rate_limit'] = args.rate_limit
+    
+    server = None
+    if args.url:
+        url = args.url.rstrip('/')
+    else:
+        org = MockOrg(args.users, args.groups, args.members_per_group, org_id=args.org)
+        server = start_mock_gateway(
+            org, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+            throttle_rate=args.throttle_rate, retry_after=args.retry_after
+        )
+        url = server.url
+        print(f"Mock gateway: {args.users} users, {args.groups} groups, {args.latency_ms}±{args.jitter_ms}ms, "
+              f"{args.throttle_rate:.1%} throttled, on {url}")
+    
+    config['admin_url'] = url
+    configure_admin_url(config)
+    limiter = RateLimiter.from_config(config)
+    max_retries = config.get('max_retries', 5)
+    timer = PhaseTimer(server, args.verbose)
+    started = time.perf_counter()
+    
+    if args.transport == 'browser':
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            page.goto(f"{url}/o/{args.org}/overview")
+            run_benchmark(PageTransport(page, limiter, max_retries), args.org, config, timer)
+            browser.close()
+    else:
+        transport = SessionTransport([], pool_size=config.get('http_pool_size', 20), limiter=limiter, max_retries=max_retries)
+        run_benchmark(transport, args.org, config, timer)
+        transport.close()
+    
+    total = time.perf_counter() - started
+    print(f"{'total':<12} {total:>9.3f}s")
+    
+    results = {
+        'transport': args.transport,
+        'mock': None if args.url else {
+            'users': args.users, 'groups': args.groups, 'members_per_group': args.members_per_group,
+            'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'throttle_rate': args.throttle_rate
+        },
+        'total_wall_s': round(total, 3),
+        'phases': timer.phases
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+    if args.baseline:
+        compare_with_baseline(timer.phases, args.baseline)
+    
+    if server:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import hashlib
+import json
+import os
+import re
+from urllib.parse import urlparse
+
+# Resource types the admin pages render fine without
+DEFAULT_BLOCKED_RESOURCES = ['image', 'font', 'media']
+
+# Analytics, telemetry and experiment beacons that keep `networkidle` from settling
+DEFAULT_BLOCKED_HOSTS = [
+    'as.atlassian.com',
+    'google-analytics.com',
+    'googletagmanager.com',
+    'segment.io',
+    'segment.com',
+    'sentry.io',
+    'nr-data.net',
+    'newrelic.com',
+    'optimizely.com',
+    'launchdarkly.com'
+]
+
+DEFAULT_ASSET_CACHE_DIR = '.asset_cache'
+
+# Bundles with a content hash in their file name never change, so they are safe to keep across runs
+VERSIONED_ASSET_RE = re.compile(r'[.\-_][0-9a-f]{8,}(\.chunk)?\.(js|css|mjs)$', re.IGNORECASE)
+
+CACHEABLE_RESOURCES = ('script', 'stylesheet')
+
+# Route patterns are matched by URL inside the browser, so resource types are blocked by file extension
+RESOURCE_EXTENSIONS = {
+    'image': ['png', 'jpe?g', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'],
+    'font': ['woff2?', 'ttf', 'otf', 'eot'],
+    'media': ['mp4', 'webm', 'mp3', 'ogg', 'wav', 'm4a'],
+    'stylesheet': ['css'],
+    'script': ['m?js']
+}
+
+# Gateway calls must never hit a Python route handler: that would add an IPC round trip per API call
+NOT_GATEWAY = r'^(?!.*/gateway/)'
+
+def profile_settings(config):
+    """Resolve the lean-browser settings from config; None when the profile is turned off"""
+    if not config.get('lean_browser', True):
+        return None
+    return {
+        'blocked_resources': set(config.get('block_resources', DEFAULT_BLOCKED_RESOURCES)),
+        'blocked_hosts': [host.lower() for host in config.get('blocked_hosts', DEFAULT_BLOCKED_HOSTS)],
+        'cache_dir': config.get('asset_cache_dir', DEFAULT_ASSET_CACHE_DIR)
+    }
+
+def route_patterns(settings):
+    """Narrow URL patterns for the requests the profile acts on; everything else bypasses Python entirely"""
+    patterns = []
+    if settings['blocked_hosts']:
+        hosts = '|'.join(re.escape(host) for host in settings['blocked_hosts'])
+        patterns.append(re.compile(rf'^[a-z]+://([^/?#]*\.)?({hosts})(:\d+)?([/?#]|$)', re.IGNORECASE))
+    
+    extensions = [ext for kind in sorted(settings['blocked_resources']) for ext in RESOURCE_EXTENSIONS.get(kind, [])]
+    unmatched = sorted(set(settings['blocked_resources']) - set(RESOURCE_EXTENSIONS))
+    if unmatched:
+        print(f"Cannot block resource types by URL, ignoring: {', '.join(unmatched)}")
+    if extensions:
+        patterns.append(re.compile(rf'{NOT_GATEWAY}[^?#]*\.({"|".join(extensions)})([?#].*)?$', re.IGNORECASE))
+    
+    if settings['cache_dir']:
+        patterns.append(re.compile(rf'{NOT_GATEWAY}[^?#]*[.\-_][0-9a-f]{{8,}}(\.chunk)?\.(js|css|mjs)([?#].*)?$', re.IGNORECASE))
+    return patterns
+
+def host_matches(host, blocked_hosts):
+    host = (host or '').lower()
+    return any(host == blocked or host.endswith(f".{blocked}") for blocked in blocked_hosts)
+
+def should_block(url, resource_type, settings):
+    if resource_type in settings['blocked_resources']:
+        return True
+    return host_matches(urlparse(url).hostname, settings['blocked_hosts'])
+
+def is_versioned_asset(url, resource_type, method='GET'):
+    if method != 'GET' or resource_type not in CACHEABLE_RESOURCES:
+        return False
+    return bool(VERSIONED_ASSET_RE.search(urlparse(url).path))
+
+def asset_paths(cache_dir, url):
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{key}.body"), os.path.join(cache_dir, f"{key}.json")
+
+def read_cached_asset(cache_dir, url):
+    """Return (headers, body) for a cached bundle, or None if it has not been stored yet"""
+    body_path, meta_path = asset_paths(cache_dir, url)
+    # The metadata file is written last, so its presence means the body is complete
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, 'r') as f:
+            headers = json.load(f)
+        with open(body_path, 'rb') as f:
+            return headers, f.read()
+    except Exception:
+        return None
+
+def write_cached_asset(cache_dir, url, headers, body):
+    os.makedirs(cache_dir, exist_ok=True)
+    body_path, meta_path = asset_paths(cache_dir, url)
+    kept = {name: value for name, value in headers.items() if name.lower() in ('content-type', 'etag', 'last-modified')}
+    
+    # Unique temp names because several browser workers may share the cache directory
+    suffix = f".{os.getpid()}.{id(body)}.tmp"
+    with open(body_path + suffix, 'wb') as f:
+        f.write(body)
+    os.replace(body_path + suffix, body_path)
+    with open(meta_path + suffix, 'w') as f:
+        json.dump(kept, f)
+    os.replace(meta_path + suffix, meta_path)
+
+def apply_browser_profile(context, config):
+    """Route a sync browser context through the block list and the on-disk bundle cache"""
+    settings = profile_settings(config)
+    if not settings:
+        return
+    
+    def handle(route):
+        request = route.request
+        if should_block(request.url, request.resource_type, settings):
+            route.abort()
+            return
+        
+        if settings['cache_dir'] and is_versioned_asset(request.url, request.resource_type, request.method):
+            cached = read_cached_asset(settings['cache_dir'], request.url)
+            if cached:
+                headers, body = cached
+                route.fulfill(status=200, headers=headers, body=body)
+                return
+            
+            response = route.fetch()
+            body = response.body()
+            if response.ok:
+                write_cached_asset(settings['cache_dir'], request.url, response.headers, body)
+            route.fulfill(response=response, body=body)
+            return
+        
+        route.continue_()
+    
+    for pattern in route_patterns(settings):
+        context.route(pattern, handle)
+
+async def apply_browser_profile_async(context, config):
+    """Async counterpart of apply_browser_profile for `playwright.async_api` contexts"""
+    settings = profile_settings(config)
+    if not settings:
+        return
+    
+    async def handle(route):
+        request = route.request
+        if should_block(request.url, request.resource_type, settings):
+            await route.abort()
+            return
+        
+        if settings['cache_dir'] and is_versioned_asset(request.url, request.resource_type, request.method):
+            cached = read_cached_asset(settings['cache_dir'], request.url)
+            if cached:
+                headers, body = cached
+                await route.fulfill(status=200, headers=headers, body=body)
+                return
+            
+            response = await route.fetch()
+            body = await response.body()
+            if response.ok:
+                write_cached_asset(settings['cache_dir'], request.url, response.headers, body)
+            await route.fulfill(response=response, body=body)
+            return
+        
+        await route.continue_()
+    
+    for pattern in route_patterns(settings):
+        await context.route(pattern, handle)
@@ -0,0 +1,232 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import shutil
+import time
+from records import Group, User
+
+CHECKPOINT_DIR = '.extract_checkpoint'
+
+class CheckpointExistsError(Exception):
+    """Raised instead of silently discarding an unfinished run's checkpoint"""
+    
+    def __init__(self, directory):
+        super().__init__(
+            f"An unfinished run left a checkpoint in {directory}; "
+            f"rerun with --resume to continue it or --fresh to discard it"
+        )
+        self.directory = directory
+
+class Checkpoint:
+    """Durable progress log for a long extraction run.
+    
+    Fetched records are appended to per-phase NDJSON files, and each listing
+    page is written on one line together with the paging position that follows
+    it, so records and position can never disagree. A crash can therefore lose
+    at most the page in flight. On resume any torn final line is cut off, and
+    the run reloads everything already fetched and carries on from the
+    recorded cursor / start-index. state.json only tracks finished phases.
+    
+    Lines are flushed as they are written, so a crashed process loses nothing,
+    but each file is fsynced at most every `fsync_interval` seconds; 0 fsyncs
+    every line. Starting over on top of an unfinished checkpoint needs `fresh`.
+    """
+    
+    def __init__(self, directory, account_id, resume=False, fresh=False, fsync_interval=1.0):
+        self.directory = directory
+        self.account_id = account_id
+        self.fsync_interval = fsync_interval
+        if not resume and not fresh and os.path.exists(self._path('state.json')):
+            raise CheckpointExistsError(directory)
+        self.state = self._load_state() if resume else None
+        
+        if self.state and self.state.get('account_id') != account_id:
+            print("Checkpoint belongs to a different organization, starting fresh")
+            self.state = None
+        
+        if self.state:
+            print(f"Resuming from checkpoint in {directory}")
+            for name in ('users.ndjson', 'groups.ndjson', 'last_active.ndjson', 'memberships.ndjson'):
+                self._drop_torn_line(name)
+            self._restore_paging_state()
+        else:
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+            os.makedirs(directory)
+            self.state = {'account_id': account_id, 'users': {}, 'groups': {}, 'done': []}
+            self._save_state()
+        
+        self._files = {}
+        self._synced_at = {}
+    
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+    
+    def _load_state(self):
+        try:
+            with open(self._path('state.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print("No usable checkpoint found, starting fresh")
+            return None
+    
+    def _save_state(self):
+        tmp_path = self._path('state.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path('state.json'))
+    
+    def _append(self, name, record):
+        if name not in self._files:
+            self._files[name] = open(self._path(name), 'a', encoding='utf-8')
+        f = self._files[name]
+        f.write(json.dumps(record, ensure_ascii=False))
+        f.write('\n')
+        f.flush()
+        
+        now = time.monotonic()
+        if now - self._synced_at.get(name, 0.0) >= self.fsync_interval:
+            os.fsync(f.fileno())
+            self._synced_at[name] = now
+    
+    def _drop_torn_line(self, name):
+        """Cut a file back to its last complete line so new appends never land on a torn one"""
+        path = self._path(name)
+        if not os.path.exists(path):
+            return
+        
+        with open(path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            # Scan backwards for the last newline without reading the whole file
+            keep = 0
+            position = size
+            while position > 0:
+                step = min(65536, position)
+                position -= step
+                f.seek(position)
+                newline = f.read(step).rfind(b'\n')
+                if newline != -1:
+                    keep = position + newline + 1
+                    break
+            
+            if keep < size:
+                print(f"Discarding a partially written line in {name}")
+                f.truncate(keep)
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def _restore_paging_state(self):
+        """Take the paging position from the last page line, which was written together with its records"""
+        for kind in ('users', 'groups'):
+            pages = self._read(f"{kind}.ndjson")
+            # Lines written before paging state moved into the page lines are bare record lists
+            if pages and isinstance(pages[-1], dict):
+                self.state[kind] = pages[-1]['state']
+    
+    @staticmethod
+    def _page_records(page):
+        return page['records'] if isinstance(page, dict) else page
+    
+    def _read(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return []
+        
+        records = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A torn final line from a crash mid-write; everything before it is intact
+                    break
+        return records
+    
+    def is_done(self, phase):
+        return phase in self.state['done']
+    
+    def mark_done(self, phase):
+        if phase not in self.state['done']:
+            self.state['done'].append(phase)
+            self._save_state()
+    
+    # Users: projected records plus the opaque paging state of whichever listing produced them
+    
+    def users_state(self):
+        return self.state['users']
+    
+    def record_users_page(self, users, paging_state):
+        self._append('users.ndjson', {'records': [user.to_checkpoint() for user in users], 'state': paging_state})
+        self.state['users'] = paging_state
+    
+    def load_users(self):
+        return [User.from_checkpoint(user) for page in self._read('users.ndjson') for user in self._page_records(page)]
+    
+    # Groups: projected records plus the next start-index
+    
+    def groups_start_index(self):
+        return self.state['groups'].get('start_index', 1)
+    
+    def record_groups_page(self, groups, next_start_index):
+        state = {'start_index': next_start_index}
+        self._append('groups.ndjson', {'records': [group.to_checkpoint() for group in groups], 'state': state})
+        self.state['groups'] = state
+    
+    def load_groups(self):
+        return [Group.from_checkpoint(group) for page in self._read('groups.ndjson') for group in self._page_records(page)]
+    
+    # Last-active: one line per finished batch, so unfinished IDs are easy to work out
+    
+    def record_last_active_batch(self, user_ids, last_active_data):
+        self._append('last_active.ndjson', {'ids': user_ids, 'data': last_active_data})
+    
+    def load_last_active(self):
+        """Return (finished user IDs, merged last-active map)"""
+        finished = set()
+        last_active_data = {}
+        for batch in self._read('last_active.ndjson'):
+            finished.update(batch['ids'])
+            last_active_data.update(batch['data'])
+        return finished, last_active_data
+    
+    # Memberships: one line per finished group
+    
+    def record_membership(self, group_id, member_ids):
+        self._append('memberships.ndjson', {'groupId': group_id, 'memberIds': member_ids})
+    
+    def load_memberships(self):
+        return {membership['groupId']: membership['memberIds'] for membership in self._read('memberships.ndjson')}
+    
+    def close(self):
+        for f in self._files.values():
+            os.fsync(f.fileno())
+            f.close()
+        self._files = {}
+    
+    def clear(self):
+        """Remove the checkpoint after a successful run"""
+        self.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
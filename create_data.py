@@ -23,9 +23,17 @@
 import json
 import random
 import string
-import time
 import os
+import queue
+import threading
+from collections import deque
 from playwright.sync_api import sync_playwright, Page, TimeoutError
+from auth import open_authenticated_context
+from gateway import NOT_PROCESSED_STATUSES, GatewayError, admin_url, configure_admin_url, create_transport
+from extract_data import iter_group_pages
+from browser_profile import apply_browser_profile
+from metrics import RUN_METRICS
+from waits import click_and_wait_for_response, max_wait_ms, wait_for_any, wait_for_dom_settled
 
 def load_config():
     with open('config.json', 'r') as f:
@@ -37,6 +45,29 @@ def generate_random_name(length=8):
 def generate_random_email(name, domain="gmail.com"):
     return f"{name}@{domain}"
 
+def new_group_slot():
+    """A fresh (name, description, attempts) group to create"""
+    group_name = f"group_{generate_random_name(6)}"
+    return (group_name, f"Description for {group_name}", 0)
+
+def new_user_slot(domain):
+    """A fresh (name, email, attempts) address to invite"""
+    user_name = f"user_{generate_random_name(8)}"
+    return (user_name, generate_random_email(user_name, domain), 0)
+
+def next_attempt(slot, label, max_attempts, new_slot):
+    """The retry rule for every seeded group and address: returns the slot to send next after a failure.
+    
+    A failed slot is sent again as it is until it has been tried max_attempts
+    times, then replaced by new_slot() so the requested totals stay exact.
+    """
+    name, value, attempts = slot
+    if attempts + 1 < max_attempts:
+        print(f"❌ Something went wrong for {label}. Retrying...")
+        return (name, value, attempts + 1)
+    print(f"❌ Giving up on {label} after {attempts + 1} attempts, replacing it with a new one")
+    return new_slot()
+
 def safe_click(page, selector, timeout=5000):
     try:
         element = page.wait_for_selector(selector, timeout=timeout)
@@ -62,193 +93,247 @@ def safe_navigate(page, url, selector_to_wait_for, timeout=10000):
         return True
     except:
         try:
-            page.wait_for_timeout(3000)
+            page.wait_for_load_state('domcontentloaded')
             return page.query_selector(selector_to_wait_for) is not None
         except:
             return False
 
-def handle_login(page, config):
-    print("Navigating to Atlassian login...")
-    page.goto("https://admin.atlassian.com")
+def group_id_from_response(body):
+    """Group ID from a create-group response, whichever shape it comes back in"""
+    if not isinstance(body, dict):
+        return None
+    return body.get('id') or body.get('groupId') or (body.get('group') or {}).get('id')
+
+def resolve_group_ids(transport, account_id, names):
+    """Find the IDs of groups by name in the groups listing; names not found are left out"""
+    wanted = set(names)
+    found = {}
+    for groups in iter_group_pages(transport, account_id):
+        for group in groups:
+            if group.name in wanted and group.id:
+                found[group.name] = group.id
+        if len(found) == len(wanted):
+            break
+    return found
+
+@RUN_METRICS.timed('create_groups_api', lambda results: sum(1 for _, _, created, _ in results if created))
+def create_groups_via_api(transport, account_id, specs, max_in_flight=8):
+    """Create groups through the admin gateway, several at a time.
     
-    try:
-        page.wait_for_selector('text=Log in', timeout=5000)
-        page.click('text=Log in')
-        print("Clicked on Log in button")
-    except:
-        print("No login button found, proceeding directly")
+    Returns a list of (name, description, created, group_id). Only groups whose
+    request failed have created False, so only those fall back to the modal. A
+    created group whose response carried no ID is looked up by name in the
+    listing; group_id stays None if that lookup cannot find it either.
     
-    try:
-        page.wait_for_selector('input[type="email"]', timeout=10000)
-        print("Email field found")
-    except:
-        print("Email field not found, checking current URL")
-        print(f"Current URL: {page.url}")
-        return False
-    
-    page.fill('input[type="email"]', config['email'])
-    print("Email filled")
+    Creating a group is not idempotent, so requests are retried on 429 only.
+    A 5xx or a network error may still have created the group, so those names
+    are looked up in the listing too before they count as failed.
+    """
+    create_url = f"{admin_url()}/gateway/api/adminhub/um/org/{account_id}/groups"
+    calls = [(create_url, 'POST', {'name': name, 'description': desc}) for name, desc in specs]
     
-    page.click('button:has-text("Continue")')
-    print("Clicked Continue")
-    
-    try:
-        page.wait_for_selector('input[type="password"]', timeout=5000)
-        print("Password field found")
+    results = []
+    uncertain = []
+    responses = transport.request_many(calls, max_in_flight, retry_statuses=NOT_PROCESSED_STATUSES)
+    for (name, desc), response in zip(specs, responses):
+        if isinstance(response, Exception):
+            print(f"⚠️ API could not create group {name}: {response}")
+            results.append((name, desc, False, None))
+            if not isinstance(response, GatewayError) or response.status == 0 or response.status >= 500:
+                uncertain.append(name)
+            continue
         
-        page.fill('input[type="password"]', config['password'])
-        print("Password filled")
-        
-        page.click('button:has-text("Log in")')
-        print("Clicked Log in")
-    except:
-        print("No password field found, may be already logged in or SSO")
-    
-    try:
-        page.wait_for_url("**/admin.atlassian.com/o/*/overview", timeout=15000)
-        print("Successfully redirected to admin portal")
-        return True
-    except TimeoutError:
-        print("Timeout waiting for admin portal redirect")
-        print(f"Current URL: {page.url}")
-        
-        if page.query_selector('button:has-text("Accept all")'):
-            page.click('button:has-text("Accept all")')
-            print("Accepted terms")
-            page.wait_for_url("**/admin.atlassian.com/o/*/overview", timeout=10000)
-            return True
-        
-        if "admin.atlassian.com" in page.url and "/o/" in page.url:
-            print("Already on admin page")
-            return True
-            
-        return False
-
-def create_groups(page: Page, account_id: str, num_groups: int, config=None):
-    print("Creating groups...")
+        group_id = group_id_from_response(response)
+        if group_id:
+            print(f"✅ Created group {name} via API: {group_id}")
+        else:
+            print(f"⚠️ API created {name} but returned no group ID, will look it up by name")
+        results.append((name, desc, True, group_id))
     
-    existing_groups = []
-    if os.path.exists('created_groups.json'):
+    unresolved = [name for name, _, created, group_id in results if created and not group_id]
+    if unresolved or uncertain:
         try:
-            with open('created_groups.json', 'r') as f:
-                existing_groups = json.load(f)
-            print(f"Loaded {len(existing_groups)} existing groups")
-        except:
-            print("Could not load existing groups, starting fresh")
+            found = resolve_group_ids(transport, account_id, unresolved + uncertain)
+        except Exception as e:
+            print(f"⚠️ Could not look up group IDs: {e}")
+            found = {}
+        print(f"Resolved {len(found)}/{len(unresolved) + len(uncertain)} group IDs from the listing")
+        for name in uncertain:
+            if name in found:
+                print(f"✅ Group {name} was created despite the error: {found[name]}")
+        results = [
+            (name, desc, created or name in found, group_id or found.get(name))
+            for name, desc, created, group_id in results
+        ]
+    return results
+
+@RUN_METRICS.timed('create_groups_ui', lambda result: 1 if result[0] else 0)
+def create_group_ui(page: Page, account_id: str, group_name: str, group_desc: str):
+    """Create one group through the modal; returns (created, server-assigned ID or None if it could not be read)"""
+    retry_count = 0
+    max_retries = 2
     
-    new_groups = []
-
-    for i in range(num_groups):
-        retry_count = 0
-        max_retries = 2
-        
-        while retry_count <= max_retries:
-            try:
-                group_name = f"group_{generate_random_name(6)}"
-                group_desc = f"Description for {group_name}"
-
-                # Navigate to groups page with better waiting
-                if not safe_navigate(page, f"https://admin.atlassian.com/o/{account_id}/groups", 'h1:has-text("Groups")'):
-                    print("⚠️ Could not navigate to groups page reliably, trying simple navigation")
-                    page.goto(f"https://admin.atlassian.com/o/{account_id}/groups")
-                    page.wait_for_timeout(3000)
-
-                create_button_selectors = [
-                    'button:has-text("Create group")',
-                    '[data-testid="create-group-button"]',
-                    'button >> text=Create',
-                ]
-
-                create_button_found = False
-                for selector in create_button_selectors:
-                    try:
-                        page.wait_for_selector(selector, timeout=5000)
-                        page.click(selector, force=True)
-                        create_button_found = True
-                        print(f"Clicked create group button using selector: {selector}")
-                        break
-                    except:
-                        continue
+    while retry_count <= max_retries:
+        try:
+            # Navigate to groups page with better waiting
+            if not safe_navigate(page, f"{admin_url()}/o/{account_id}/groups", 'h1:has-text("Groups")'):
+                print("⚠️ Could not navigate to groups page reliably, trying simple navigation")
+                page.goto(f"{admin_url()}/o/{account_id}/groups", wait_until='domcontentloaded')
+
+            create_button_selectors = [
+                'button:has-text("Create group")',
+                '[data-testid="create-group-button"]',
+                'button >> text=Create',
+            ]
 
-                if not create_button_found:
-                    print("⚠️ Could not find create group button, skipping this group")
-                    retry_count += 1
+            create_button_found = False
+            for selector in create_button_selectors:
+                try:
+                    page.wait_for_selector(selector, timeout=5000)
+                    page.click(selector, force=True)
+                    create_button_found = True
+                    print(f"Clicked create group button using selector: {selector}")
+                    break
+                except:
                     continue
 
-                page.wait_for_selector('text=Create group', timeout=5000)
-                page.wait_for_timeout(1000)
+            if not create_button_found:
+                print("⚠️ Could not find create group button, skipping this group")
+                retry_count += 1
+                continue
 
-                name_selectors = [
-                    'input[data-testid="group-name-input"]',
-                    'input[placeholder*="Group\'s name" i]',
-                    'input[name="name"]',
-                    'input[type="text"]',
-                ]
+            page.wait_for_selector('text=Create group', timeout=5000)
 
-                name_field = None
-                for selector in name_selectors:
-                    try:
-                        name_field = page.wait_for_selector(selector, timeout=3000)
-                        if name_field:
-                            break
-                    except:
-                        continue
+            name_selectors = [
+                'input[data-testid="group-name-input"]',
+                'input[placeholder*="Group\'s name" i]',
+                'input[name="name"]',
+                'input[type="text"]',
+            ]
 
-                if not name_field:
-                    print("❌ Could not find group name field")
-                    retry_count += 1
+            name_field = None
+            for selector in name_selectors:
+                try:
+                    name_field = page.wait_for_selector(selector, timeout=3000)
+                    if name_field:
+                        break
+                except:
                     continue
 
-                name_field.fill(group_name)
-                page.keyboard.press("Tab")
-                print(f"Filled group name: {group_name}")
+            if not name_field:
+                print("❌ Could not find group name field")
+                retry_count += 1
+                continue
 
-                try:
-                    desc_field = page.wait_for_selector('textarea', timeout=3000)
-                    desc_field.fill(group_desc)
-                    print("Filled group description")
-                except:
-                    print("⚠️ No description field found, continuing...")
+            name_field.fill(group_name)
+            page.keyboard.press("Tab")
+            print(f"Filled group name: {group_name}")
 
-                page.wait_for_timeout(1000)
+            try:
+                desc_field = page.wait_for_selector('textarea', timeout=3000)
+                desc_field.fill(group_desc)
+                print("Filled group description")
+            except:
+                print("⚠️ No description field found, continuing...")
 
-                try:
-                    selector = 'button[data-testid="test-create-group-modal-button"]:not([disabled])'
-                    page.wait_for_selector(selector, timeout=5000)
+            try:
+                selector = 'button[data-testid="test-create-group-modal-button"]:not([disabled])'
+                page.wait_for_selector(selector, timeout=5000)
+                # Capture the create call the modal makes so the real group ID can be recorded
+                with page.expect_response(
+                    lambda response: response.request.method == 'POST' and '/groups' in response.url,
+                    timeout=10000
+                ) as response_info:
                     page.locator(selector).click()
-                    print("✅ Clicked enabled Create button")
-                except Exception as e:
-                    print(f"❌ Create button never became enabled: {e}")
-                    retry_count += 1
-                    continue
-
-                try:
-                    page.wait_for_timeout(2000)
-                    page.wait_for_selector(f'text="{group_name}"', timeout=5000)
-                    group_id = f"group_{i}_{int(time.time())}"
-                    new_groups.append({"id": group_id, "name": group_name, "description": group_desc})
-                    print(f"✅ Created group {i+1}/{num_groups}: {group_name}")
-                    break  # Success, break out of retry loop
-                except:
-                    print(f"⚠️ Group {group_name} may not have been created")
-                    retry_count += 1
-                    continue
+                print("✅ Clicked enabled Create button")
+            except Exception as e:
+                print(f"❌ Create button never became enabled: {e}")
+                retry_count += 1
+                continue
 
-            except TimeoutError as e:
+            response = response_info.value
+            if not response.ok:
+                print(f"⚠️ Create group call failed with HTTP {response.status}")
                 retry_count += 1
-                if retry_count > max_retries:
-                    print(f"❌ Failed to create group after {max_retries} retries: {e}")
-                    break
-                print(f"⚠️ Timeout occurred, retrying ({retry_count}/{max_retries})...")
-                page.wait_for_timeout(2000)
-            except Exception as e:
-                print(f"❌ Unexpected error creating group: {e}")
+                continue
+
+            try:
+                group_id = group_id_from_response(response.json())
+            except Exception:
+                group_id = None
+
+            try:
+                # The create call has already succeeded; this only waits for the list to show it
+                page.wait_for_selector(f'text="{group_name}"', timeout=5000)
+                if not group_id:
+                    print(f"⚠️ Created {group_name} but could not read its group ID")
+                return True, group_id
+            except:
+                print(f"⚠️ Group {group_name} may not have been created")
                 retry_count += 1
-                if retry_count > max_retries:
-                    break
-                page.wait_for_timeout(2000)
+                continue
+
+        except TimeoutError as e:
+            retry_count += 1
+            if retry_count > max_retries:
+                print(f"❌ Failed to create group after {max_retries} retries: {e}")
+                break
+            print(f"⚠️ Timeout occurred, retrying ({retry_count}/{max_retries})...")
+            page.wait_for_timeout(2000)
+        except Exception as e:
+            print(f"❌ Unexpected error creating group: {e}")
+            retry_count += 1
+            if retry_count > max_retries:
+                break
+            page.wait_for_timeout(2000)
+
+    return False, None
 
-        page.wait_for_timeout(1000)
+def create_groups(page: Page, account_id: str, num_groups: int, config=None):
+    print("Creating groups...")
+    
+    config = config or {}
+    existing_groups = []
+    if os.path.exists('created_groups.json'):
+        try:
+            with open('created_groups.json', 'r') as f:
+                existing_groups = json.load(f)
+            print(f"Loaded {len(existing_groups)} existing groups")
+        except:
+            print("Could not load existing groups, starting fresh")
+    
+    new_groups = []
+    specs = [new_group_slot()[:2] for _ in range(num_groups)]
+
+    # The gateway call is tried first; the modal is only a fallback for groups it could not create
+    fallback = specs
+    if specs and config.get('group_creation', 'api') == 'api':
+        # Never the response cache: looking up just-created groups needs a live listing
+        transport = create_transport(dict(config, cache_mode='off'), page.context, page)
+        results = create_groups_via_api(transport, account_id, specs, config.get('group_creation_concurrency', 8))
+        transport.close()
+        
+        fallback = []
+        for group_name, group_desc, created, group_id in results:
+            if created:
+                new_groups.append({"id": group_id, "name": group_name, "description": group_desc})
+            else:
+                fallback.append((group_name, group_desc))
+        
+        if fallback:
+            print(f"Falling back to the create-group modal for {len(fallback)} groups")
+
+    max_attempts = config.get('group_max_retries', 3)
+    pending = deque((group_name, group_desc, 0) for group_name, group_desc in fallback)
+    while pending:
+        slot = pending.popleft()
+        group_name, group_desc, _ = slot
+        created, group_id = create_group_ui(page, account_id, group_name, group_desc)
+        if created:
+            new_groups.append({"id": group_id, "name": group_name, "description": group_desc})
+            print(f"✅ Created group {len(new_groups)}/{num_groups}: {group_name}")
+        else:
+            pending.append(next_attempt(slot, group_name, max_attempts, new_group_slot))
 
     all_groups = existing_groups + new_groups
     
@@ -259,6 +344,205 @@ def create_groups(page: Page, account_id: str, num_groups: int, config=None):
     
     return all_groups
 
+def invite_users(page, account_id, emails, selected_groups):
+    """Send one invitation for all `emails` through the invite modal.
+    
+    Returns (selected_groups, failed_emails): the groups that were actually
+    selected and the addresses the modal reported as failed. If the modal
+    flow itself breaks, every address counts as failed.
+    """
+    # Navigate to users page
+    if not safe_navigate(page, f"{admin_url()}/o/{account_id}/users", 'h1:has-text("Users")'):
+        page.goto(f"{admin_url()}/o/{account_id}/users", wait_until='domcontentloaded')
+
+    # Open invite modal
+    invite_selectors = [
+        'button:has-text("Invite users")',
+        'button:has-text("Invite user")',
+        '[data-testid="invite-users-button"]'
+    ]
+    for selector in invite_selectors:
+        if page.query_selector(selector):
+            page.click(selector)
+            print(f"Clicked invite button: {selector}")
+            break
+    else:
+        print("❌ Invite button not found")
+        return [], set(emails)
+
+    page.wait_for_selector('text=Email addresses', timeout=10000)
+    print("Invite modal loaded")
+
+    # Fill email first; the field takes several comma-separated addresses
+    email_selectors = [
+        'textarea[placeholder*="email"]',
+        'input[placeholder*="email"]',
+        'textarea',
+        'input[type="email"]'
+    ]
+    email_filled = False
+    for selector in email_selectors:
+        email_field = page.query_selector(selector)
+        if email_field:
+            if len(emails) == 1 or selector.startswith('textarea'):
+                page.fill(selector, ", ".join(emails))
+            else:
+                # Single-line pickers turn each address into a chip when a comma is typed
+                email_field.click()
+                for email in emails:
+                    email_field.type(f"{email},")
+            print(f"Filled {len(emails)} email(s) with selector: {selector}")
+            email_filled = True
+            break
+    if not email_filled:
+        print("❌ Email input not found")
+        return [], set(emails)
+
+    group_input_selectors = [
+        'input[aria-label*="group"]',
+        'input[placeholder*="group"]',
+        '#group-membership-input',
+        'input[data-testid*="group"]',
+        'div[class*="select"] input'
+    ]
+
+    # Expand advanced options (groups)
+    view_more_button = page.query_selector('button:has-text("View more options")')
+    if view_more_button:
+        view_more_button.click()
+        print("Clicked 'View more options'")
+        if selected_groups:
+            wait_for_any(page, group_input_selectors, timeout=5000)
+
+    # Select groups
+    if selected_groups:
+        print(f"Attempting to select groups: {[g['name'] for g in selected_groups]}")
+
+        group_input = None
+        for selector in group_input_selectors:
+            group_input = page.query_selector(selector)
+            if group_input:
+                break
+        if not group_input:
+            group_section = page.query_selector('div:has-text("Group membership")')
+            if group_section:
+                group_input = group_section.query_selector('input')
+
+        if not group_input:
+            print("⚠️ Could not find group input field, skipping group selection")
+            selected_groups = []
+        else:
+            for idx, group in enumerate(selected_groups):
+                try:
+                    group_input.click()
+
+                    if idx == 0:
+                        page.keyboard.press('Control+A')
+                        page.keyboard.press('Backspace')
+
+                    group_input.type(group["name"], delay=100)
+
+                    option_selectors = [
+                        f'div[role="option"]:has-text("{group["name"]}")',
+                        f'div[class*="option"]:has-text("{group["name"]}")',
+                        f'li:has-text("{group["name"]}")',
+                        f'div:has-text("{group["name"]}")'
+                    ]
+                    option_found = False
+                    for opt_selector in option_selectors:
+                        try:
+                            option = page.wait_for_selector(opt_selector, timeout=2000)
+                            if option:
+                                option.click()
+                                print(f"✅ Selected group: {group['name']}")
+                                option_found = True
+                                wait_for_dom_settled(page)
+                                break
+                        except:
+                            continue
+
+                    if not option_found:
+                        page.keyboard.press("Enter")
+                        print(f"✅ Selected group using Enter: {group['name']}")
+                        wait_for_dom_settled(page)
+
+                except Exception as e:
+                    print(f"⚠️ Error selecting group {group['name']}: {e}")
+                    try:
+                        page.keyboard.press("Escape")
+                    except:
+                        pass
+                    continue
+
+    # Click send button
+    send_button_selectors = [
+        'button:has-text("Send invite"):not([disabled])',
+        '[data-testid="invite-submit-button"]:not([disabled])',
+        'button:has-text("Send"):not([disabled])',
+        'button[type="submit"]:not([disabled])'
+    ]
+
+    send_button = None
+    response = None
+    for selector in send_button_selectors:
+        send_button = page.query_selector(selector)
+        if send_button:
+            is_disabled = page.evaluate('(element) => element.disabled', send_button)
+            if not is_disabled:
+                # Finish on the invite call itself rather than a fixed pause
+                response = click_and_wait_for_response(
+                    page, send_button,
+                    lambda r: r.request.method == 'POST' and 'invite' in r.url.lower()
+                )
+                print("✅ Clicked send invite button")
+                break
+    if not send_button:
+        print("❌ No enabled send button found")
+        page.screenshot(path=f"debug_no_send_button.png")
+        return selected_groups, set(emails)
+
+    if response is not None and not response.ok:
+        print(f"❌ Invite call failed with HTTP {response.status}")
+        return selected_groups, set(emails)
+
+    # Per-address errors and success toasts render just after the response
+    wait_for_any(page, INVITE_OUTCOME_SELECTORS, timeout=5000)
+
+    return selected_groups, failed_invite_addresses(page, emails)
+
+# Any of these means the modal has finished reporting on an invitation
+INVITE_OUTCOME_SELECTORS = [
+    '[role="alert"]',
+    '[data-testid*="flag"]',
+    '[id*="error"]',
+    'text="Something went wrong"'
+]
+
+def failed_invite_addresses(page, emails):
+    """Work out which addresses of a sent invitation failed"""
+    # A general error means nothing in the batch went through
+    error_messages = [
+        'text="Something went wrong"',
+        'text="Try again later"',
+        '[role="alert"]:has-text("wrong")',
+        '[role="alert"]:has-text("later")'
+    ]
+    for err in error_messages:
+        if page.query_selector(err):
+            return set(emails)
+
+    # Otherwise only the addresses the modal flags individually have failed
+    failed = set()
+    for email in emails:
+        per_address_errors = [
+            f'[role="alert"]:has-text("{email}")',
+            f'[id*="error"]:has-text("{email}")',
+            f'[data-testid*="error"]:has-text("{email}")'
+        ]
+        if any(page.query_selector(selector) for selector in per_address_errors):
+            failed.add(email)
+    return failed
+
 def create_users(page, account_id, num_users, domain, groups, users_per_group, config):
     print("Creating users...")
     
@@ -273,227 +557,276 @@ def create_users(page, account_id, num_users, domain, groups, users_per_group, c
     
     new_users = []
     success_count = 0  # Tracks only successful invites
+    batch_size = max(config.get('invite_batch_size', 1) if config else 1, 1)
+    max_address_retries = config.get('invite_max_retries', 3) if config else 3
+    retry_queue = []  # (name, email, attempts) of addresses that failed in an earlier batch
 
     while success_count < num_users:  # Keep trying until we reach desired count
-        user_name = f"user_{generate_random_name(8)}"
-        user_email = generate_random_email(user_name, domain)
-
+        # Failed addresses are retried first, the rest of the batch is made up of new ones
+        wanted = min(batch_size, num_users - success_count)
+        batch = retry_queue[:wanted]
+        retry_queue = retry_queue[wanted:]
+        while len(batch) < wanted:
+            batch.append(new_user_slot(domain))
+
+        # Everyone in one invitation shares the same group selection
+        selected_groups = []
+        if groups and users_per_group > 0:
+            selected_groups = random.sample(groups, min(users_per_group, len(groups)))
+
+        emails = [email for _, email, _ in batch]
         try:
-            # Navigate to users page
-            if not safe_navigate(page, f"https://admin.atlassian.com/o/{account_id}/users", 'h1:has-text("Users")'):
-                page.goto(f"https://admin.atlassian.com/o/{account_id}/users")
-                page.wait_for_timeout(3000)
-
-            # Open invite modal
-            invite_selectors = [
-                'button:has-text("Invite users")',
-                'button:has-text("Invite user")',
-                '[data-testid="invite-users-button"]'
-            ]
-            for selector in invite_selectors:
-                if page.query_selector(selector):
-                    page.click(selector)
-                    print(f"Clicked invite button: {selector}")
-                    break
-            else:
-                print("❌ Invite button not found")
-                continue
-
-            page.wait_for_selector('text=Email addresses', timeout=10000)
-            print("Invite modal loaded")
+            with RUN_METRICS.phase('invite_users') as phase:
+                selected_groups, failed = invite_users(page, account_id, emails, selected_groups)
+                phase.add_items(len(emails) - len(failed))
+        except Exception as e:
+            print(f"⚠️ Unexpected error during invitation: {e}")
+            page.screenshot(path=f"debug_error_user.png")
+            selected_groups, failed = [], set(emails)
 
-            # Fill email first
-            email_selectors = [
-                'textarea[placeholder*="email"]',
-                'input[placeholder*="email"]',
-                'textarea',
-                'input[type="email"]'
-            ]
-            email_filled = False
-            for selector in email_selectors:
-                if page.query_selector(selector):
-                    page.fill(selector, user_email)
-                    print(f"Filled email with selector: {selector}")
-                    email_filled = True
-                    break
-            if not email_filled:
-                print("❌ Email input not found")
+        for slot in batch:
+            user_name, user_email, _ = slot
+            if user_email in failed:
+                retry_queue.append(next_attempt(slot, user_email, max_address_retries, lambda: new_user_slot(domain)))
                 continue
 
-            page.wait_for_timeout(1000)
-
-            # Expand advanced options (groups)
-            view_more_button = page.query_selector('button:has-text("View more options")')
-            if view_more_button:
-                view_more_button.click()
-                print("Clicked 'View more options'")
-                page.wait_for_timeout(800)
+            success_count += 1
+            print(f"✅ Successfully invited user {success_count}/{num_users}: {user_email}")
+            new_users.append({
+                "email": user_email,
+                "name": user_name,
+                "groups": [g["id"] for g in selected_groups if g.get("id")] if selected_groups else []
+            })
 
-            # Select groups
-            selected_groups = []
-            if groups and users_per_group > 0:
-                selected_groups = random.sample(groups, min(users_per_group, len(groups)))
-                print(f"Attempting to select groups: {[g['name'] for g in selected_groups]}")
-
-                group_input_selectors = [
-                    'input[aria-label*="group"]',
-                    'input[placeholder*="group"]',
-                    '#group-membership-input',
-                    'input[data-testid*="group"]',
-                    'div[class*="select"] input'
-                ]
-
-                group_input = None
-                for selector in group_input_selectors:
-                    group_input = page.query_selector(selector)
-                    if group_input:
-                        break
-                if not group_input:
-                    group_section = page.query_selector('div:has-text("Group membership")')
-                    if group_section:
-                        group_input = group_section.query_selector('input')
-
-                if not group_input:
-                    print("⚠️ Could not find group input field, skipping group selection")
-                    selected_groups = []
-                else:
-                    for idx, group in enumerate(selected_groups):
-                        try:
-                            group_input.click()
-                            page.wait_for_timeout(300)
-
-                            if idx == 0:
-                                page.keyboard.press('Control+A')
-                                page.keyboard.press('Backspace')
-
-                            group_input.type(group["name"], delay=100)
-                            page.wait_for_timeout(800)
-
-                            option_selectors = [
-                                f'div[role="option"]:has-text("{group["name"]}")',
-                                f'div[class*="option"]:has-text("{group["name"]}")',
-                                f'li:has-text("{group["name"]}")',
-                                f'div:has-text("{group["name"]}")'
-                            ]
-                            option_found = False
-                            for opt_selector in option_selectors:
-                                try:
-                                    option = page.wait_for_selector(opt_selector, timeout=2000)
-                                    if option:
-                                        option.click()
-                                        print(f"✅ Selected group: {group['name']}")
-                                        option_found = True
-                                        page.wait_for_timeout(300)
-                                        break
-                                except:
-                                    continue
-
-                            if not option_found:
-                                page.keyboard.press("Enter")
-                                print(f"✅ Selected group using Enter: {group['name']}")
-                                page.wait_for_timeout(500)
-
-                        except Exception as e:
-                            print(f"⚠️ Error selecting group {group['name']}: {e}")
-                            try:
-                                page.keyboard.press("Escape")
-                                page.wait_for_timeout(300)
-                            except:
-                                pass
-                            continue
+    # Save all users
+    all_users = existing_users + new_users
+    with open('created_users.json', 'w') as f:
+        json.dump(all_users, f, indent=2)
+    print(f"Saved {len(all_users)} total users to created_users.json")
+    
+    return all_users
 
-            page.wait_for_timeout(500)
+def save_created_records(filename, records):
+    """Write a created_*.json file atomically so concurrent runs never see it half-written"""
+    tmp_path = f"{filename}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(records, f, indent=2)
+    os.replace(tmp_path, filename)
 
-            # Click send button
-            send_button_selectors = [
-                'button:has-text("Send invite"):not([disabled])',
-                '[data-testid="invite-submit-button"]:not([disabled])',
-                'button:has-text("Send"):not([disabled])',
-                'button[type="submit"]:not([disabled])'
-            ]
+def load_created_records(filename):
+    if os.path.exists(filename):
+        try:
+            with open(filename, 'r') as f:
+                return json.load(f)
+        except:
+            print(f"Could not load {filename}, starting fresh")
+    return []
 
-            send_button = None
-            for selector in send_button_selectors:
-                send_button = page.query_selector(selector)
-                if send_button:
-                    is_disabled = page.evaluate('(element) => element.disabled', send_button)
-                    if not is_disabled:
-                        send_button.click()
-                        print("✅ Clicked send invite button")
+class SeedingPool:
+    """Browser workers that share one authenticated storage state and pull jobs from a common queue.
+    
+    The sync Playwright API is per-thread, so each worker runs its own
+    Playwright instance and browser with a context restored from the shared
+    storage state. Jobs may submit follow-up jobs (retries); wait() returns once
+    every submitted job, including those follow-ups, has finished.
+    """
+
+    def __init__(self, config, storage_state, account_id, num_workers):
+        self.config = config
+        self.storage_state = storage_state
+        self.account_id = account_id
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.records = {'groups': [], 'users': []}
+        self._pending = 0
+        self._alive = 0
+        self._idle = threading.Condition(self.lock)
+        self._threads = [
+            threading.Thread(target=self._run_worker, args=(index,), daemon=True)
+            for index in range(num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _run_worker(self, index):
+        try:
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=self.config['headless'], slow_mo=self.config['slow_mo'])
+                context = browser.new_context(storage_state=self.storage_state)
+                apply_browser_profile(context, self.config)
+                page = context.new_page()
+                page.set_default_timeout(max_wait_ms(self.config))
+                print(f"Worker {index} ready")
+
+                with self.lock:
+                    self._alive += 1
+
+                while True:
+                    job = self.jobs.get()
+                    if job is None:
                         break
-            if not send_button:
-                print("❌ No enabled send button found")
-                page.screenshot(path=f"debug_no_send_button.png")
-                continue
+                    handler, args = job
+                    try:
+                        handler(self, page, *args)
+                    except Exception as e:
+                        print(f"⚠️ Worker {index} job failed: {e}")
+                    finally:
+                        with self.lock:
+                            self._pending -= 1
+                            self._idle.notify_all()
 
-            # Wait 1 second after clicking send
-            page.wait_for_timeout(1000)
+                browser.close()
+        except Exception as e:
+            print(f"❌ Worker {index} stopped: {e}")
+        finally:
+            with self.lock:
+                self._alive -= 1
+                self._idle.notify_all()
+
+    def submit(self, handler, *args):
+        with self.lock:
+            self._pending += 1
+        self.jobs.put((handler, args))
+
+    def record(self, kind, record):
+        with self.lock:
+            self.records[kind].append(record)
+            return len(self.records[kind])
+
+    def wait(self):
+        """Block until every job has finished; gives up if all workers have died"""
+        with self.lock:
+            while self._pending > 0:
+                self._idle.wait(1.0)
+                if self._alive <= 0 and all(not thread.is_alive() for thread in self._threads):
+                    print("❌ No seeding workers left, abandoning remaining jobs")
+                    return False
+        return True
 
-            # Detect failure
-            error_found = False
-            error_messages = [
-                'text="Something went wrong"',
-                'text="Try again later"',
-                '[role="alert"]:has-text("wrong")',
-                '[role="alert"]:has-text("later")'
-            ]
-            for err in error_messages:
-                if page.query_selector(err):
-                    print(f"❌ Something went wrong for {user_email}. Retrying...")
-                    error_found = True
-                    break
+    def close(self):
+        for _ in self._threads:
+            self.jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+
+def group_job(pool, page, slot, num_groups):
+    group_name, group_desc, _ = slot
+    created, group_id = create_group_ui(page, pool.account_id, group_name, group_desc)
+    if created:
+        count = pool.record('groups', {"id": group_id, "name": group_name, "description": group_desc})
+        print(f"✅ Created group {count}/{num_groups}: {group_name}")
+    else:
+        retry = next_attempt(slot, group_name, pool.config.get('group_max_retries', 3), new_group_slot)
+        pool.submit(group_job, retry, num_groups)
+
+def invite_job(pool, page, batch, groups, users_per_group, domain, num_users):
+    selected_groups = []
+    if groups and users_per_group > 0:
+        selected_groups = random.sample(groups, min(users_per_group, len(groups)))
+
+    emails = [email for _, email, _ in batch]
+    try:
+        with RUN_METRICS.phase('invite_users') as phase:
+            selected_groups, failed = invite_users(page, pool.account_id, emails, selected_groups)
+            phase.add_items(len(emails) - len(failed))
+    except Exception as e:
+        print(f"⚠️ Unexpected error during invitation: {e}")
+        selected_groups, failed = [], set(emails)
+
+    # Every slot in the batch either succeeds or is resubmitted, so the final count is exact
+    retries = []
+    max_address_retries = pool.config.get('invite_max_retries', 3)
+    for slot in batch:
+        user_name, user_email, _ = slot
+        if user_email not in failed:
+            count = pool.record('users', {
+                "email": user_email,
+                "name": user_name,
+                "groups": [g["id"] for g in selected_groups if g.get("id")]
+            })
+            print(f"✅ Successfully invited user {count}/{num_users}: {user_email}")
+        else:
+            retries.append(next_attempt(slot, user_email, max_address_retries, lambda: new_user_slot(domain)))
+
+    if retries:
+        print(f"Retrying {len(retries)} failed address(es)")
+        pool.submit(invite_job, retries, groups, users_per_group, domain, num_users)
+
+def seed_with_worker_pool(page, context, account_id, config):
+    """Create groups and users with several browser workers in parallel"""
+    num_workers = config.get('workers', 1)
+    num_groups = config['num_groups']
+    num_users = config['num_users']
+    domain = config['domain']
+    batch_size = max(config.get('invite_batch_size', 1), 1)
+
+    existing_groups = load_created_records('created_groups.json')
+    existing_users = load_created_records('created_users.json')
+
+    specs = [new_group_slot()[:2] for _ in range(num_groups)]
+
+    # Groups the API can create never need a worker
+    api_groups = []
+    if specs and config.get('group_creation', 'api') == 'api':
+        transport = create_transport(dict(config, cache_mode='off'), context, page)
+        results = create_groups_via_api(transport, account_id, specs, config.get('group_creation_concurrency', 8))
+        transport.close()
+        specs = [(name, desc) for name, desc, created, _ in results if not created]
+        api_groups = [
+            {"id": group_id, "name": name, "description": desc}
+            for name, desc, created, group_id in results if created
+        ]
+
+    print(f"Starting {num_workers} seeding workers...")
+    pool = SeedingPool(config, context.storage_state(), account_id, num_workers)
+    try:
+        for group_name, group_desc in specs:
+            pool.submit(group_job, (group_name, group_desc, 0), num_groups)
+        pool.wait()
 
-            # Only increment success if no error
-            if not error_found:
-                success_count += 1
-                print(f"✅ Successfully invited user {success_count}/{num_users}: {user_email}")
-                new_users.append({
-                    "email": user_email,
-                    "name": user_name,
-                    "groups": [g["id"] for g in selected_groups] if selected_groups else []
-                })
+        groups = existing_groups + api_groups + pool.records['groups']
+        save_created_records('created_groups.json', groups)
+        print(f"Saved {len(groups)} total groups to created_groups.json")
 
-        except Exception as e:
-            print(f"⚠️ Unexpected error during invitation: {e}")
-            page.screenshot(path=f"debug_error_user.png")
+        for start in range(0, num_users, batch_size):
+            batch = [new_user_slot(domain) for _ in range(min(batch_size, num_users - start))]
+            pool.submit(invite_job, batch, groups, config['users_per_group'], domain, num_users)
+        pool.wait()
+    finally:
+        pool.close()
 
-        # Wait 2 seconds before next attempt
-        page.wait_for_timeout(2000)
+    users = existing_users + pool.records['users']
+    save_created_records('created_users.json', users)
+    print(f"Saved {len(users)} total users to created_users.json")
 
-    # Save all users
-    all_users = existing_users + new_users
-    with open('created_users.json', 'w') as f:
-        json.dump(all_users, f, indent=2)
-    print(f"Saved {len(all_users)} total users to created_users.json")
-    
-    return all_users
+    return groups, users
 
 def main():
     config = load_config()
+    configure_admin_url(config)
     
     with sync_playwright() as p:
         try:
             browser = p.chromium.launch(headless=config['headless'], slow_mo=config['slow_mo'])
-            context = browser.new_context()
-            page = context.new_page()
-            
-            # Set longer default timeouts
-            page.set_default_timeout(15000)
             
-            if not handle_login(page, config):
+            context, page, account_id = open_authenticated_context(browser, config)
+            if not context:
                 print("Login failed. Please check your credentials and try again.")
                 browser.close()
                 return
             
-            account_id = page.url.split("/o/")[1].split("/")[0]
-            print(f"Account ID: {account_id}")
-            
-            groups = create_groups(page, account_id, config['num_groups'], config)
+            # Set longer default timeouts
+            page.set_default_timeout(max_wait_ms(config))
             
-            users = create_users(
-                page, account_id, config['num_users'], 
-                config['domain'], groups, config['users_per_group'], config
-            )
+            if config.get('workers', 1) > 1:
+                groups, users = seed_with_worker_pool(page, context, account_id, config)
+            else:
+                groups = create_groups(page, account_id, config['num_groups'], config)
+                
+                users = create_users(
+                    page, account_id, config['num_users'], 
+                    config['domain'], groups, config['users_per_group'], config
+                )
             
             print("Data creation completed!")
             print(f"Total: {len(groups)} groups and {len(users)} users")
@@ -504,6 +837,8 @@ def main():
             page.screenshot(path="error_screenshot.png")
         finally:
             browser.close()
+    
+    RUN_METRICS.write_outputs(config, 'create')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,392 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlencode, urlparse
+from playwright.sync_api import sync_playwright
+from extract_data import (
+    fetch_group_members,
+    fetch_last_active_dates,
+    last_active_options,
+    load_config,
+    parse_groups_data,
+    parse_users_data,
+    run_extraction,
+    users_url
+)
+from gateway import GatewayError, admin_url, configure_admin_url, create_transport
+from auth import auth_expires_at, is_session_valid, open_authenticated_context
+from browser_profile import apply_browser_profile
+from membership_graph import MembershipGraph
+from metrics import RUN_METRICS
+from records import Group, Membership, User
+
+DAEMON_HOST = '127.0.0.1'
+DAEMON_PORT = 8765
+
+# Statuses that mean the gateway no longer accepts the session cookies
+AUTH_STATUSES = (401, 403)
+
+def login_in_background(config):
+    """Log in on a Playwright instance of this thread's own; returns (storage_state, account_id) or None.
+    
+    Playwright's sync API is bound to the thread that started it, so a login
+    off the job thread needs its own browser. Only the resulting cookies are
+    handed over, for WarmSession.adopt() to swap in on the job thread.
+    """
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=config.get('headless', True))
+        try:
+            context, page, account_id = open_authenticated_context(browser, config, force_login=True)
+            if not context:
+                return None
+            return context.storage_state(), account_id
+        finally:
+            browser.close()
+
+class WarmSession:
+    """Logged-in browser context and gateway transport kept open between requests.
+    
+    Playwright's sync API is bound to the thread that started it, so only the
+    daemon's job thread may touch a WarmSession.
+    """
+    
+    def __init__(self, browser, config):
+        self.browser = browser
+        self.config = config
+        self.context = None
+        self.page = None
+        self.account_id = None
+        self.transport = None
+        self.expires_at = None
+        self.logged_in_at = None
+    
+    def open(self, force_login=False):
+        """Log in (or restore the saved session) and swap it in; the old context keeps serving until this succeeds"""
+        context, page, account_id = open_authenticated_context(self.browser, self.config, force_login=force_login)
+        if not context:
+            return False
+        self._swap(context, page, account_id)
+        return True
+    
+    def adopt(self, storage_state, account_id):
+        """Swap in a session logged in elsewhere; only opening a context and a page happens here"""
+        context = self.browser.new_context(storage_state=storage_state)
+        apply_browser_profile(context, self.config)
+        page = context.new_page()
+        # Same-origin gateway fetches need the page on the admin portal
+        page.goto(f"{admin_url()}/o/{account_id}/overview", wait_until='domcontentloaded')
+        self._swap(context, page, account_id)
+    
+    def _swap(self, context, page, account_id):
+        old_transport, old_context = self.transport, self.context
+        self.context, self.page, self.account_id = context, page, account_id
+        self.transport = create_transport(self.config, context, page)
+        self.expires_at = auth_expires_at(context.storage_state())
+        self.logged_in_at = time.time()
+        
+        if old_transport:
+            old_transport.close()
+        if old_context:
+            old_context.close()
+    
+    def needs_login(self, now=None):
+        """True when the cookies expire within daemon_reauth_margin_s or the gateway stopped accepting them"""
+        now = now or time.time()
+        if self.expires_at is not None and self.expires_at - now < self.config.get('daemon_reauth_margin_s', 600):
+            print("Session is close to expiry")
+            return True
+        if not is_session_valid(self.context):
+            print("Session is no longer accepted")
+            return True
+        return False
+    
+    def close(self):
+        if self.transport:
+            self.transport.close()
+        if self.context:
+            self.context.close()
+
+class ExtractionDaemon:
+    """Serves sync and lookup jobs from one warm session.
+    
+    HTTP handler threads only queue jobs; serve_jobs() runs them one at a time
+    on the thread that owns the session. Ahead of expiry a login runs on a
+    thread of its own and is swapped in between jobs, so queued requests keep
+    being served by the old session meanwhile. Group memberships from the last
+    full sync are kept in memory so user lookups can answer with their groups.
+    """
+    
+    def __init__(self, session, config, login=login_in_background):
+        self.session = session
+        self.config = config
+        self.login = login
+        self.relogin = None
+        self.jobs = queue.Queue()
+        self.running = True
+        self.groups = {}
+        self.graph = MembershipGraph()
+        self.synced_at = None
+        self.load_groups()
+    
+    def load_groups(self, path='groups.json'):
+        """Index the groups and memberships written by the last full sync"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            groups = json.load(f)
+        
+        self.groups = {group['id']: group for group in groups if group.get('id')}
+        self.graph = MembershipGraph.from_memberships(
+            Membership(group_id, group.get('members', [])) for group_id, group in self.groups.items()
+        )
+        self.synced_at = os.path.getmtime(path)
+        print(f"Loaded {len(self.groups)} groups and {self.graph.membership_count()} memberships from {path}")
+    
+    def submit(self, func, *args):
+        """Queue a job for the session thread and wait for its result (re-raising its exception)"""
+        future = Future()
+        self.jobs.put((future, func, args))
+        return future.result()
+    
+    def stop(self):
+        self.running = False
+    
+    def serve_jobs(self):
+        """Run queued jobs until stopped, checking the session every daemon_session_check_s"""
+        check_interval = self.config.get('daemon_session_check_s', 300)
+        next_check = time.monotonic() + check_interval
+        
+        while self.running:
+            self.adopt_relogin()
+            if time.monotonic() >= next_check:
+                self.maintain_session()
+                next_check = time.monotonic() + check_interval
+            
+            try:
+                # Short timeout so stop() is noticed promptly
+                future, func, args = self.jobs.get(timeout=min(max(next_check - time.monotonic(), 0), 1))
+            except queue.Empty:
+                continue
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self.run_job(func, args))
+                except Exception as e:
+                    future.set_exception(e)
+    
+    def maintain_session(self):
+        """Start a background login ahead of expiry so requests never wait for it"""
+        if self.relogin is None and self.session.needs_login():
+            print("Refreshing session in the background...")
+            future = Future()
+            
+            def run():
+                try:
+                    future.set_result(self.login(self.config))
+                except Exception as e:
+                    future.set_exception(e)
+            
+            threading.Thread(target=run, daemon=True).start()
+            self.relogin = future
+    
+    def adopt_relogin(self, wait=False):
+        """Swap in a finished background login; True if a new session was adopted"""
+        if self.relogin is None or not (wait or self.relogin.done()):
+            return False
+        relogin, self.relogin = self.relogin, None
+        try:
+            result = relogin.result()
+        except Exception as e:
+            print(f"Background login failed: {e}")
+            result = None
+        if not result:
+            print("Session refresh failed, keeping the current session")
+            return False
+        
+        self.session.adopt(*result)
+        print("Swapped in the refreshed session")
+        return True
+    
+    def run_job(self, func, args):
+        """Run one job, logging in again and retrying once if the gateway rejects the session"""
+        try:
+            return func(*args)
+        except GatewayError as e:
+            if e.status not in AUTH_STATUSES:
+                raise
+            print(f"Gateway rejected the session ({e.status}), logging in again")
+            # A background login already under way is the quickest way to a working session
+            if not self.adopt_relogin(wait=True) and not self.session.open(force_login=True):
+                raise
+            return func(*args)
+    
+    def full_sync(self):
+        """Run a complete extraction in the mode config.json asks for and reload the membership index"""
+        started = time.monotonic()
+        session = self.session
+        # Each sync's metrics file covers that sync alone, not everything since the daemon started
+        RUN_METRICS.reset()
+        run_extraction(session.transport, session.page, session.account_id, self.config, argparse.Namespace(resume=False, fresh=True))
+        self.load_groups()
+        RUN_METRICS.write_outputs(self.config, 'daemon')
+        return {
+            'status': 'ok',
+            'seconds': round(time.monotonic() - started, 1),
+            'groups': len(self.groups),
+            'memberships': self.graph.membership_count()
+        }
+    
+    def lookup_group(self, group_id):
+        """Fetch one group's members fresh and update the index with them"""
+        session = self.session
+        member_ids = fetch_group_members(session.transport, session.account_id, group_id)
+        self.graph.replace_members(group_id, member_ids)
+        known = self.groups.get(group_id, {})
+        group = parse_groups_data([Group(group_id, known.get('name', ''), known.get('description', ''))], self.graph)[0]
+        self.groups[group_id] = group
+        return group
+    
+    def lookup_user(self, user_id):
+        """Fetch one user and their last-active date; groups come from the membership index"""
+        session = self.session
+        response = session.transport.get_json(f"{users_url(session.account_id)}?{urlencode({'accountIds': user_id})}")
+        users = [User.from_api(user) for user in response.get('data', []) if user.get('accountId') == user_id]
+        if not users:
+            raise LookupError(f"User {user_id} not found")
+        
+        last_active_data = fetch_last_active_dates(
+            session.transport, session.account_id, [user_id], **last_active_options(self.config)
+        )
+        return parse_users_data(users, self.graph, last_active_data)[0]
+    
+    def health(self):
+        """Answered straight from the handler thread so it is not stuck behind a running sync"""
+        return {
+            'status': 'ok',
+            'account_id': self.session.account_id,
+            'logged_in_at': self.session.logged_in_at,
+            'session_expires_at': self.session.expires_at,
+            'memberships_synced_at': self.synced_at,
+            'queued_jobs': self.jobs.qsize()
+        }
+
+class DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self, address, daemon):
+        super().__init__(address, DaemonHandler)
+        self.daemon = daemon
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        daemon = self.server.daemon
+        path = urlparse(self.path).path.rstrip('/')
+        parts = path.split('/')
+        
+        if path == '/health':
+            self.send_json(daemon.health())
+        elif len(parts) == 3 and parts[1] == 'users':
+            self.run(daemon.lookup_user, unquote(parts[2]))
+        elif len(parts) == 3 and parts[1] == 'groups':
+            self.run(daemon.lookup_group, unquote(parts[2]))
+        else:
+            self.send_json({'message': 'Not found'}, 404)
+    
+    def do_POST(self):
+        # Requests carry no body we use, but it must be consumed to keep the connection usable
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if urlparse(self.path).path.rstrip('/') == '/sync':
+            self.run(self.server.daemon.full_sync)
+        else:
+            self.send_json({'message': 'Not found'}, 404)
+    
+    def run(self, func, *args):
+        try:
+            self.send_json(self.server.daemon.submit(func, *args))
+        except LookupError as e:
+            self.send_json({'message': str(e)}, 404)
+        except GatewayError as e:
+            self.send_json({'message': str(e)}, 404 if e.status == 404 else 502)
+        except Exception as e:
+            print(f"Job failed: {e}")
+            self.send_json({'message': str(e)}, 500)
+    
+    def send_json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Keep a logged-in admin session warm and serve extractions over local HTTP")
+    parser.add_argument('--host', help=f"interface to listen on (default daemon_host or {DAEMON_HOST})")
+    parser.add_argument('--port', type=int, help=f"port to listen on (default daemon_port or {DAEMON_PORT})")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    config = load_config()
+    configure_admin_url(config)
+    host = args.host or config.get('daemon_host', DAEMON_HOST)
+    port = args.port or config.get('daemon_port', DAEMON_PORT)
+    
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=config.get('headless', True))
+        session = WarmSession(browser, config)
+        if not session.open():
+            print("Login failed. Please check your credentials and try again.")
+            browser.close()
+            return
+        
+        daemon = ExtractionDaemon(session, config)
+        server = DaemonServer((host, port), daemon)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Daemon ready on http://{host}:{port} for org {session.account_id}")
+        
+        try:
+            daemon.serve_jobs()
+        except KeyboardInterrupt:
+            print("Shutting down...")
+        finally:
+            server.shutdown()
+            server.server_close()
+            session.close()
+            browser.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import time
+from playwright.async_api import async_playwright
+from extract_data import (
+    group_members_url,
+    groups_url,
+    last_active_bulk_url,
+    load_config,
+    member_ids_from_response,
+    parse_member_ids_from_html,
+    save_results,
+    users_url
+)
+from auth import open_authenticated_context_async
+from gateway import (
+    FETCH_JSON_JS,
+    THROTTLE_STATUSES,
+    GatewayError,
+    RateLimiter,
+    SessionTransport,
+    admin_url,
+    configure_admin_url,
+    parse_retry_after
+)
+from browser_profile import apply_browser_profile_async
+from metrics import RUN_METRICS
+from records import Membership, project_groups, project_users
+
+# Settings the sync pipeline honours that the async pipeline (and so multi-org runs) does not
+ASYNC_IGNORED_SETTINGS = {
+    'user_partitions': "users are listed on a single cursor chain",
+    'groups_prefetch_window': "group pages are fetched one after another",
+    'last_active_max_batch_size': "last-active batches stay at last_active_batch_size",
+    'in_page_paging': "every request is its own page.evaluate call",
+    'cache_mode': "the response cache is not used",
+    'streaming': "results are written once at the end",
+    'incremental': "every run is a full sync",
+    'checkpoint': "there is no checkpoint to --resume from"
+}
+
+def warn_ignored_settings(config, mode):
+    """Say which configured settings this pipeline will not apply, rather than ignoring them silently"""
+    for key, effect in ASYNC_IGNORED_SETTINGS.items():
+        if config.get(key) not in (None, False, 'off'):
+            print(f"⚠️ {key} is ignored in {mode} mode: {effect}")
+
+class AsyncPageClient:
+    """Async counterpart of PageTransport: in-page fetches paced by the shared rate limiter"""
+    
+    def __init__(self, page, limiter, max_retries=5):
+        self.page = page
+        self.limiter = limiter
+        self.max_retries = max_retries
+    
+    async def request(self, url, method='GET', body=None):
+        attempt = 0
+        while True:
+            await self.limiter.acquire_async()
+            try:
+                started = time.perf_counter()
+                response = await self.page.evaluate(FETCH_JSON_JS, [url, method, body])
+            except Exception:
+                self.limiter.release(599)
+                raise
+            RUN_METRICS.record_evaluate(time.perf_counter() - started, response['elapsed'])
+            RUN_METRICS.record_request(url, response['status'], response['elapsed'], response['bytes'])
+            retry_after = parse_retry_after(response['retryAfter'])
+            self.limiter.release(response['status'], retry_after)
+            
+            if 200 <= response['status'] < 300:
+                return response['body']
+            if response['status'] not in THROTTLE_STATUSES or attempt >= self.max_retries:
+                raise GatewayError(response['status'], url)
+            attempt += 1
+            RUN_METRICS.record_retry(url, response['status'])
+            print(f"Throttled ({response['status']}) on {url}, retry {attempt}/{self.max_retries}")
+
+async def fetch_json(client, url, method='GET', body=None):
+    """Issue one gateway request, either from inside the page or on a worker thread over the HTTP session"""
+    if isinstance(client, SessionTransport):
+        return await asyncio.to_thread(client.request, url, method, body)
+    return await client.request(url, method, body)
+
+async def login_and_capture_state(browser, config):
+    """Log in inside the async run's own browser and hand back the storage state and account ID"""
+    context, page, account_id = await open_authenticated_context_async(browser, config)
+    if not context:
+        print("Login failed. Please check your credentials and try again.")
+        return None, None
+    
+    try:
+        return await context.storage_state(), account_id
+    finally:
+        await context.close()
+
+async def produce_users(client, account_id, users, user_id_queue):
+    """Walk the users cursor chain, feeding account IDs to the last-active stage as each page lands"""
+    base_url = users_url(account_id)
+    cursor = None
+    
+    try:
+        while True:
+            page_url = f"{base_url}?cursor={cursor}&count=100" if cursor else f"{base_url}?count=100"
+            
+            try:
+                response = await fetch_json(client, page_url)
+            except Exception as e:
+                # Stopping here would silently truncate the user list, so fail loudly instead
+                print(f"Error fetching users: {e}")
+                raise
+            
+            if 'data' not in response:
+                print(f"Unexpected response format: {response}")
+                break
+            
+            page_users = project_users(response['data'])
+            users.extend(page_users)
+            print(f"Fetched {len(page_users)} users, total: {len(users)}")
+            
+            for user in page_users:
+                if user.id:
+                    await user_id_queue.put(user.id)
+            
+            cursor = response.get('links', {}).get('next')
+            if not cursor:
+                break
+    finally:
+        await user_id_queue.put(None)
+    
+    print(f"Total users fetched: {len(users)}")
+
+async def produce_groups(client, account_id, groups, group_queue, num_workers):
+    """Page through the groups, handing each one to the membership workers as soon as it is listed"""
+    start_index = 1
+    count = 100
+    
+    try:
+        while True:
+            try:
+                response = await fetch_json(client, groups_url(account_id, start_index, count))
+            except Exception as e:
+                print(f"Error fetching groups: {e}")
+                raise
+            
+            if 'groups' not in response:
+                break
+            
+            page_groups = project_groups(response['groups'])
+            groups.extend(page_groups)
+            print(f"Fetched {len(page_groups)} groups, total: {len(groups)}")
+            
+            for group in page_groups:
+                if group.id:
+                    await group_queue.put(group)
+            
+            if len(page_groups) < count:
+                break
+            start_index += count
+    finally:
+        for _ in range(num_workers):
+            await group_queue.put(None)
+    
+    print(f"Total groups fetched: {len(groups)}")
+
+async def consume_last_active(client, account_id, user_id_queue, last_active_data, max_in_flight, batch_size=50):
+    """Batch account IDs off the queue and keep up to max_in_flight bulk lookups running"""
+    last_active_url = last_active_bulk_url(account_id)
+    semaphore = asyncio.Semaphore(max_in_flight)
+    tasks = []
+    
+    async def fetch_batch(batch):
+        async with semaphore:
+            try:
+                response = await fetch_json(client, last_active_url, 'POST', [{'accountId': user_id} for user_id in batch])
+            except Exception as e:
+                response = None
+                error = e
+        
+        if response is None:
+            # Retry the halves so one bad ID only costs the batches it was in
+            if len(batch) > 1:
+                half = len(batch) // 2
+                await asyncio.gather(fetch_batch(batch[:half]), fetch_batch(batch[half:]))
+            else:
+                print(f"Error fetching last active date for {batch[0]}: {error}")
+            return
+        
+        for item in response.get('data', []):
+            if 'accountId' in item and 'lastActiveTimestamp' in item:
+                last_active_data[item['accountId']] = item['lastActiveTimestamp']
+    
+    batch = []
+    while True:
+        user_id = await user_id_queue.get()
+        if user_id is None:
+            break
+        batch.append(user_id)
+        if len(batch) >= batch_size:
+            tasks.append(asyncio.create_task(fetch_batch(batch)))
+            batch = []
+    
+    if batch:
+        tasks.append(asyncio.create_task(fetch_batch(batch)))
+    
+    await asyncio.gather(*tasks)
+    print(f"Fetched last active dates for {len(last_active_data)} users")
+
+async def fetch_group_members(client, account_id, group_id, page_size=100):
+    """Page through the members of one group"""
+    member_ids = []
+    start_index = 1
+    
+    while True:
+        page_ids, page_length = member_ids_from_response(
+            await fetch_json(client, group_members_url(account_id, group_id, start_index, page_size))
+        )
+        member_ids.extend(page_ids)
+        
+        if page_length < page_size:
+            break
+        start_index += page_size
+    
+    return list(dict.fromkeys(member_ids))
+
+async def consume_groups(client, account_id, group_queue, members_by_group, failed_groups):
+    """Membership worker: fetch members for each queued group until the producer signals the end"""
+    while True:
+        group = await group_queue.get()
+        if group is None:
+            break
+        
+        try:
+            members_by_group[group.id] = await fetch_group_members(client, account_id, group.id)
+        except Exception as e:
+            print(f"API membership fetch failed for group {group.name or group.id}: {e}")
+            failed_groups.append(group)
+
+async def extract_group_members_ui(page, account_id, group):
+    """Async counterpart of the sync UI scrape, used only for groups the API could not serve"""
+    await page.goto(f"{admin_url()}/o/{account_id}/groups/{group.id}")
+    await page.wait_for_load_state('networkidle')
+    return parse_member_ids_from_html(await page.content())
+
+async def timed_phase(name, coro, count_items):
+    with RUN_METRICS.phase(name) as phase:
+        await coro
+        phase.add_items(count_items())
+
+async def open_client(context, storage_state, account_id, config):
+    """Build the gateway client for one org: the pooled HTTP session or an in-page client on its own page"""
+    # Every phase shares one limiter so together they never exceed what the tenant allows
+    limiter = RateLimiter.from_config(config)
+    max_retries = config.get('max_retries', 5)
+    
+    if config.get('transport', 'browser') == 'http':
+        print("Using pooled HTTP transport for gateway requests")
+        return SessionTransport.from_storage_state(
+            storage_state, pool_size=config.get('http_pool_size', 20), limiter=limiter, max_retries=max_retries
+        )
+    
+    page = await context.new_page()
+    # Same-origin fetches need the page sitting on the admin portal
+    await page.goto(f"{admin_url()}/o/{account_id}/overview")
+    return AsyncPageClient(page, limiter, max_retries)
+
+async def fetch_org_data(client, context, account_id, config):
+    """Run users, groups, last-active and membership phases concurrently for one org"""
+    membership_concurrency = config.get('membership_concurrency', 10)
+    last_active_concurrency = config.get('last_active_concurrency', 4)
+    
+    started = time.monotonic()
+    users_data = []
+    groups_data = []
+    last_active_data = {}
+    members_by_group = {}
+    failed_groups = []
+    user_id_queue = asyncio.Queue()
+    group_queue = asyncio.Queue()
+    
+    # Phases overlap here, so each one's wall time runs from the start until it drains
+    await asyncio.gather(
+        timed_phase('users', produce_users(client, account_id, users_data, user_id_queue), lambda: len(users_data)),
+        timed_phase(
+            'groups', produce_groups(client, account_id, groups_data, group_queue, membership_concurrency),
+            lambda: len(groups_data)
+        ),
+        timed_phase('last_active', consume_last_active(
+            client, account_id, user_id_queue, last_active_data,
+            last_active_concurrency, config.get('last_active_batch_size', 50)
+        ), lambda: len(last_active_data)),
+        timed_phase('memberships', asyncio.gather(*[
+            consume_groups(client, account_id, group_queue, members_by_group, failed_groups)
+            for _ in range(membership_concurrency)
+        ]), lambda: sum(len(ids) for ids in members_by_group.values()))
+    )
+    
+    if failed_groups:
+        print(f"Falling back to the UI for {len(failed_groups)} groups...")
+        ui_page = await context.new_page()
+        for group in failed_groups:
+            try:
+                members_by_group[group.id] = await extract_group_members_ui(ui_page, account_id, group)
+            except Exception as e:
+                print(f"Error extracting members for group {group.name or group.id}: {e}")
+                members_by_group[group.id] = []
+        await ui_page.close()
+    
+    print(f"All phases for {account_id} finished in {time.monotonic() - started:.1f}s")
+    
+    memberships_data = [Membership(group.id, members_by_group.get(group.id, ())) for group in groups_data if group.id]
+    return users_data, groups_data, memberships_data, last_active_data
+
+async def extract_async(config):
+    """Log in and extract one org with all phases running concurrently, all in one browser"""
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=config.get('headless', False))
+        storage_state, account_id = await login_and_capture_state(browser, config)
+        if not storage_state:
+            await browser.close()
+            return False
+        
+        context = await browser.new_context(storage_state=storage_state)
+        await apply_browser_profile_async(context, config)
+        client = await open_client(context, storage_state, account_id, config)
+        
+        print("=" * 50)
+        print("FETCHING DATA (async)")
+        print("=" * 50)
+        
+        users_data, groups_data, memberships_data, last_active_data = await fetch_org_data(client, context, account_id, config)
+        
+        if isinstance(client, SessionTransport):
+            client.close()
+        await browser.close()
+    
+    save_results(users_data, groups_data, memberships_data, last_active_data, config.get('sqlite_path'))
+    return True
+
+def run_async_extraction(config):
+    """Log in and run the concurrent async extraction"""
+    configure_admin_url(config)
+    warn_ignored_settings(config, 'async')
+    if asyncio.run(extract_async(config)):
+        RUN_METRICS.write_outputs(config, 'extract')
+
+if __name__ == "__main__":
+    run_async_extraction(load_config())
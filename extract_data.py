@@ -20,10 +20,26 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import argparse
 import json
-import time
+import os
 import re
-from playwright.sync_api import sync_playwright, Page, TimeoutError
+from collections import deque
+from urllib.parse import urlencode
+from playwright.sync_api import sync_playwright, Page
+from gateway import admin_url, configure_admin_url, create_transport
+from auth import SESSION_FILE, load_saved_session, open_authenticated_context
+from membership_graph import MembershipGraph
+from records import Membership, configure_listing_fingerprints, project_groups, project_users
+import incremental
+from streaming import RecordWriter, StreamingPipeline, TeeWriter
+from sqlite_store import SqliteRecordWriter, SqliteStore, write_sqlite
+from checkpoint import CHECKPOINT_DIR, Checkpoint, CheckpointExistsError
+from metrics import RUN_METRICS
+from waits import DEFAULT_MAX_WAIT_MS, max_wait_ms, wait_for_dom_settled
+
+# The logged-in admin shows up in every scraped group page, so it is excluded from UI results
+ADMIN_USER_ID = "712020:961d02d1-08d0-4a82-a327-bacb754a95ff"
 
 def load_config():
     """Load configuration from config.json file"""
@@ -36,91 +52,35 @@ def save_json(data, filename):
         json.dump(data, f, indent=2, ensure_ascii=False)
     print(f"Saved data to {filename}")
 
-def handle_login(page, config):
-    """Handle the complete login process with proper redirects"""
-    print("Navigating to Atlassian login...")
-    page.goto("https://admin.atlassian.com")
-    
-    # Wait for and click the login button if present
-    try:
-        page.wait_for_selector('text=Log in', timeout=5000)
-        page.click('text=Log in')
-        print("Clicked on Log in button")
-    except:
-        print("No login button found, proceeding directly")
+def users_url(account_id):
+    return f"{admin_url()}/gateway/api/admin/v2/orgs/{account_id}/directories/-/users"
+
+def iter_user_pages_in_page(transport, account_id, cursor=None, on_page=None):
+    """Walk the whole users cursor chain in one in-page loop, then yield the chunks it handed back"""
+    chunks = []
     
-    # Wait for email field - could be on id.atlassian.com or admin.atlassian.com
-    try:
-        page.wait_for_selector('input[type="email"]', timeout=10000)
-        print("Email field found")
-    except:
-        print("Email field not found, checking current URL")
-        print(f"Current URL: {page.url}")
-        return False
-    
-    # Fill email
-    page.fill('input[type="email"]', config['email'])
-    print("Email filled")
-    
-    # Click continue
-    page.click('button:has-text("Continue")')
-    print("Clicked Continue")
-    
-    # Wait for password field or redirect
-    try:
-        page.wait_for_selector('input[type="password"]', timeout=5000)
-        print("Password field found")
-        
-        # Fill password
-        page.fill('input[type="password"]', config['password'])
-        print("Password filled")
-        
-        # Click login
-        page.click('button:has-text("Log in")')
-        print("Clicked Log in")
-    except:
-        print("No password field found, may be already logged in or SSO")
+    def on_chunk(raw_users, next_cursor):
+        users = project_users(raw_users)
+        if on_page:
+            on_page(users, {'cursor': next_cursor})
+        chunks.append(users)
+        print(f"Received {len(users)} users from the in-page walk")
     
-    # Wait for redirect to admin portal
-    try:
-        page.wait_for_url("**/admin.atlassian.com/o/*/overview", timeout=15000)
-        print("Successfully redirected to admin portal")
-        return True
-    except TimeoutError:
-        print("Timeout waiting for admin portal redirect")
-        print(f"Current URL: {page.url}")
-        
-        # Check if we're on a consent page or need to accept terms
-        if page.query_selector('button:has-text("Accept all")'):
-            page.click('button:has-text("Accept all")')
-            print("Accepted terms")
-            page.wait_for_url("**/admin.atlassian.com/o/*/overview", timeout=10000)
-            return True
-        
-        # Check if we're already on a admin page
-        if "admin.atlassian.com" in page.url and "/o/" in page.url:
-            print("Already on admin page")
-            return True
-            
-        return False
+    transport.walk_cursor(users_url(account_id), cursor, on_chunk)
+    yield from chunks
 
-def extract_account_id(page):
-    """Extract account ID from the current URL"""
-    try:
-        account_id = page.url.split("/o/")[1].split("/")[0]
-        print(f"Account ID: {account_id}")
-        return account_id
-    except IndexError:
-        print("Could not extract account ID from URL")
-        return None
-
-def fetch_users_via_api(page, account_id):
-    """Fetch users data via the discovered API endpoint with proper cursor-based pagination"""
-    print("Fetching users via API...")
+def iter_user_pages(transport, account_id, cursor=None, on_page=None):
+    """Yield each page of users from the API as User records, following the cursor-based pagination.
     
-    users = []
-    cursor = None
-    base_url = f"https://admin.atlassian.com/gateway/api/admin/v2/orgs/{account_id}/directories/-/users"
+    Pass a saved cursor to resume mid-listing; on_page(users, paging_state) is
+    called with each page and the state needed to continue after it. Transports
+    with in_page_paging walk the chain inside the browser and yield larger chunks.
+    """
+    if getattr(transport, 'in_page_paging', False):
+        yield from iter_user_pages_in_page(transport, account_id, cursor, on_page)
+        return
+    
+    base_url = users_url(account_id)
     has_more = True
     page_count = 0
     
@@ -130,33 +90,23 @@ def fetch_users_via_api(page, account_id):
         
         # Build the URL with cursor if available
         if cursor:
-            users_url = f"{base_url}?cursor={cursor}&count=100"
+            page_url = f"{base_url}?cursor={cursor}&count=100"
             print(f"Using cursor: {cursor[:50]}...")  # Show first 50 chars of cursor
         else:
-            users_url = f"{base_url}?count=100"
+            page_url = f"{base_url}?count=100"
             print("Using initial request (no cursor)")
         
         try:
-            response = page.evaluate("""async ([url]) => {
-                const response = await fetch(url, {
-                    credentials: 'include',
-                    headers: {
-                        'Accept': 'application/json',
-                        'Content-Type': 'application/json'
-                    }
-                });
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-                return await response.json();
-            }""", [users_url])
+            response = transport.get_json(page_url)
             
             print(f"API Response keys: {list(response.keys())}")
             
             if 'data' in response:
-                current_users = response['data']
-                users.extend(current_users)
-                print(f"Fetched {len(current_users)} users, total: {len(users)}")
+                # Project at ingest so the raw payload is dropped with the response
+                users = project_users(response['data'])
+                if on_page:
+                    on_page(users, {'cursor': response.get('links', {}).get('next')})
+                yield users
                 
                 # Check for next page cursor
                 if 'links' in response and 'next' in response['links'] and response['links']['next']:
@@ -171,289 +121,893 @@ def fetch_users_via_api(page, account_id):
                 print(f"Unexpected response format: {response}")
                 has_more = False
             
-            # Add a small delay to avoid rate limiting
-            time.sleep(0.5)
-            
         except Exception as e:
+            # Stopping here would silently truncate the user list, so fail loudly instead
             print(f"Error fetching users: {e}")
-            has_more = False
+            raise
+
+def response_total(response):
+    """Total entity count a listing response reports, if any"""
+    return response.get('total') or response.get('meta', {}).get('total')
+
+def user_partitions(transport, account_id, partitions):
+    """Resolve the user_partitions setting into (name, base URL, filter params) tuples.
+    
+    'directories' gives one partition per directory in the org; a list of dicts
+    gives one partition per set of server-side filters on the org-wide listing.
+    """
+    users_base = f"{admin_url()}/gateway/api/admin/v2/orgs/{account_id}/directories"
+    
+    if partitions == 'directories':
+        response = transport.get_json(users_base)
+        directory_ids = [
+            directory.get('directoryId') or directory.get('id')
+            for directory in response.get('data', [])
+        ]
+        return [(f"directory {directory_id}", f"{users_base}/{directory_id}/users", {}) for directory_id in directory_ids if directory_id]
+    
+    return [(urlencode(filters), f"{users_base}/-/users", filters) for filters in partitions]
+
+def iter_partitioned_user_pages(transport, account_id, partitions, window=8, state=None, seen=None, on_page=None):
+    """Walk several independent user cursor chains at once, yielding deduplicated pages.
+    
+    Every wave asks each unfinished partition for its next page through
+    request_many. Users are deduplicated by accountId across partitions, and at
+    the end the partition totals and the merged count are checked against the
+    unpartitioned listing's total. `state`/`seen` resume a checkpointed listing
+    and on_page(users, paging_state) is called with each page.
+    """
+    chains = user_partitions(transport, account_id, partitions)
+    print(f"Listing users across {len(chains)} partitions")
+    
+    state = state or {}
+    cursors = {name: state.get('cursors', {}).get(name) for name, _, _ in chains}
+    done_chains = set(state.get('finished', []))
+    totals = {}
+    active = [chain for chain in chains if chain[0] not in done_chains]
+    seen = set(seen or ())
+    
+    while active:
+        wave = active[:window]
+        calls = []
+        for name, base_url, filters in wave:
+            params = dict(filters, count=100)
+            if cursors[name]:
+                params['cursor'] = cursors[name]
+            calls.append((f"{base_url}?{urlencode(params)}", 'GET', None))
+        
+        finished = set()
+        for (name, _, _), response in zip(wave, transport.request_many(calls, window)):
+            if isinstance(response, Exception):
+                # A missing partition would silently truncate the user list, so fail loudly instead
+                print(f"Error fetching users for partition {name}: {response}")
+                raise response
+            
+            if name not in totals:
+                totals[name] = response_total(response)
+            
+            page_users = []
+            for user in project_users(response.get('data', [])):
+                if user.id and user.id not in seen:
+                    seen.add(user.id)
+                    page_users.append(user)
+            
+            cursors[name] = response.get('links', {}).get('next')
+            if not cursors[name]:
+                finished.add(name)
+                done_chains.add(name)
+            
+            if on_page:
+                on_page(page_users, {'cursors': dict(cursors), 'finished': sorted(done_chains)})
+            yield page_users
+        
+        # Finished chains drop out; the rest rotate so every partition gets a turn
+        active = [chain for chain in active[len(wave):] + wave if chain[0] not in finished]
+    
+    try:
+        expected = response_total(transport.get_json(
+            f"{admin_url()}/gateway/api/admin/v2/orgs/{account_id}/directories/-/users?count=1"
+        ))
+    except Exception as e:
+        print(f"Could not fetch the unpartitioned user count: {e}")
+        expected = None
+    
+    if expected is None:
+        print(f"Merged {len(seen)} unique users; the API reports no total, so the partition check was skipped")
+        return
+    
+    partition_sum = sum(total for total in totals.values() if total)
+    if len(seen) != expected:
+        print(f"⚠️ Partitioned listing found {len(seen)} unique users but the org reports {expected}; "
+              f"partitions may overlap or miss users (partition totals: {partition_sum})")
+    else:
+        print(f"Partition check passed: {len(seen)} unique users match the org total")
+
+@RUN_METRICS.timed('users')
+def fetch_users_via_api(transport, account_id, partitions=None, window=8):
+    """Fetch users data via the discovered API endpoint with proper cursor-based pagination"""
+    print("Fetching users via API...")
+    
+    users = []
+    page_count = 0
+    
+    if partitions:
+        pages = iter_partitioned_user_pages(transport, account_id, partitions, window)
+    else:
+        pages = iter_user_pages(transport, account_id)
+    
+    for current_users in pages:
+        page_count += 1
+        users.extend(current_users)
+        print(f"Fetched {len(current_users)} users, total: {len(users)}")
     
     print(f"Total users fetched: {len(users)} across {page_count} pages")
     return users
 
-def fetch_groups_via_api(page, account_id):
+def groups_url(account_id, start_index, count=100):
+    return f"{admin_url()}/gateway/api/adminhub/um/org/{account_id}/groups?count={count}&start-index={start_index}"
+
+def iter_group_pages(transport, account_id, window=8, count=100, start_index=1, on_page=None):
+    """Yield each page of groups from the API as Group records, prefetching offset pages concurrently.
+    
+    Offset paging has no cursor dependency, so after the first page the next
+    `window` start-indexes are requested together. When the response carries a
+    total, windows stop at it, and if every page up to it was full, one page
+    past it is probed in case the total was stale. Pages are yielded in order
+    and paging stops at the first short page; anything fetched past it is
+    discarded. Pass a saved start_index to resume; on_page(groups,
+    next_start_index) sees every page.
+    """
+    if getattr(transport, 'in_page_paging', False):
+        chunks = []
+        
+        def on_chunk(raw_groups, next_start_index):
+            groups = project_groups(raw_groups)
+            if on_page:
+                on_page(groups, next_start_index)
+            chunks.append(groups)
+        
+        transport.walk_offsets(groups_url(account_id, '{start}', count), 'groups', start_index, on_chunk, count, window)
+        yield from chunks
+        return
+    
+    try:
+        response = transport.get_json(groups_url(account_id, start_index, count))
+    except Exception as e:
+        print(f"Error fetching groups: {e}")
+        raise
+    
+    if 'groups' not in response:
+        return
+    groups = project_groups(response['groups'])
+    if on_page:
+        on_page(groups, start_index + count)
+    yield groups
+    if len(groups) < count:
+        return
+    
+    total = response.get('total') or response.get('totalCount')
+    if total:
+        print(f"Group listing reports {total} groups, prefetching {window} pages at a time")
+    
+    start_index += count
+    while True:
+        if total and start_index > total:
+            # Every page up to the reported total was full, so the total may be stale; probe one page past it
+            offsets = [start_index]
+            total = None
+        else:
+            last_index = total if total else start_index + (window - 1) * count
+            offsets = list(range(start_index, last_index + 1, count))[:window]
+        if not offsets:
+            return
+        
+        responses = transport.request_many([(groups_url(account_id, offset, count), 'GET', None) for offset in offsets], window)
+        
+        for offset, response in zip(offsets, responses):
+            if isinstance(response, Exception):
+                print(f"Error fetching groups: {response}")
+                raise response
+            if 'groups' not in response:
+                return
+            
+            groups = project_groups(response['groups'])
+            if on_page:
+                on_page(groups, offset + count)
+            yield groups
+            if len(groups) < count:
+                return
+        
+        start_index = offsets[-1] + count
+
+@RUN_METRICS.timed('groups')
+def fetch_groups_via_api(transport, account_id, window=8):
     """Fetch groups data via the discovered API endpoint with pagination"""
     print("Fetching groups via API...")
     
     groups = []
-    start_index = 1
-    count = 100
-    has_more = True
     
-    while has_more:
-        groups_url = f"https://admin.atlassian.com/gateway/api/adminhub/um/org/{account_id}/groups?count={count}&start-index={start_index}"
-        
-        try:
-            response = page.evaluate("""async ([url]) => {
-                const response = await fetch(url, {
-                    credentials: 'include',
-                    headers: {
-                        'Accept': 'application/json',
-                        'Content-Type': 'application/json'
-                    }
-                });
-                return await response.json();
-            }""", [groups_url])
-            
-            if 'groups' in response:
-                groups.extend(response['groups'])
-                print(f"Fetched {len(response['groups'])} groups, total: {len(groups)}")
-                
-                if len(response['groups']) < count:
-                    has_more = False
-                else:
-                    start_index += count
-            else:
-                has_more = False
-                
-        except Exception as e:
-            print(f"Error fetching groups: {e}")
-            has_more = False
+    for current_groups in iter_group_pages(transport, account_id, window):
+        groups.extend(current_groups)
+        print(f"Fetched {len(current_groups)} groups, total: {len(groups)}")
     
     print(f"Total groups fetched: {len(groups)}")
     return groups
 
-def fetch_last_active_dates(page, account_id, user_ids):
-    """Fetch last active dates for users using bulk API"""
+def last_active_bulk_url(account_id):
+    return f"{admin_url()}/gateway/api/admin/v1/orgs/{account_id}/users/last-active-date-bulk"
+
+def last_active_options(config):
+    """Concurrency and batch sizing for fetch_last_active_dates from config"""
+    return {
+        'max_in_flight': config.get('last_active_concurrency', 4),
+        'batch_size': config.get('last_active_batch_size', 50),
+        'max_batch_size': config.get('last_active_max_batch_size', 1000)
+    }
+
+@RUN_METRICS.timed('last_active')
+def fetch_last_active_dates(transport, account_id, user_ids, max_in_flight=4, batch_size=50, max_batch_size=1000, on_batch=None):
+    """Fetch last active dates for users using the bulk API, several batches in flight at once.
+    
+    The batch size doubles after each wave until the endpoint rejects a size
+    (413/414), which then becomes the ceiling. A failed batch is split in half
+    and retried; a 400 (typically one bad ID) only splits that batch and leaves
+    the size of the other batches alone, so it only costs the batches it was
+    in. Results are merged into the map as each wave lands, and
+    on_batch(user_ids, batch_data) is called for every finished batch.
+    """
     print("Fetching last active dates...")
     
-    batch_size = 50
+    if getattr(transport, 'in_page_paging', False):
+        return fetch_last_active_dates_in_page(
+            transport, account_id, user_ids, max_in_flight, batch_size, max_batch_size, on_batch
+        )
+    
+    last_active_url = last_active_bulk_url(account_id)
     last_active_data = {}
+    remaining = deque(user_ids)
+    retry_batches = deque()
+    ceiling = max_batch_size
     
-    for i in range(0, len(user_ids), batch_size):
-        batch = user_ids[i:i + batch_size]
-        batch_ids = [{'accountId': user_id} for user_id in batch]
-        
-        last_active_url = f"https://admin.atlassian.com/gateway/api/admin/v1/orgs/{account_id}/users/last-active-date-bulk"
-        
-        try:
-            response = page.evaluate("""async ([url, batchData]) => {
-                const response = await fetch(url, {
-                    method: 'POST',
-                    credentials: 'include',
-                    headers: {
-                        'Accept': 'application/json',
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify(batchData)
-                });
-                return await response.json();
-            }""", [last_active_url, batch_ids])
-            
-            if 'data' in response:
-                for item in response['data']:
-                    if 'accountId' in item and 'lastActiveTimestamp' in item:
-                        last_active_data[item['accountId']] = item['lastActiveTimestamp']
+    while remaining or retry_batches:
+        # Split retries go first, then fresh batches at the current size, up to a few windows per wave
+        wave = []
+        while retry_batches and len(wave) < max_in_flight * 2:
+            wave.append(retry_batches.popleft())
+        while remaining and len(wave) < max_in_flight * 2:
+            wave.append([remaining.popleft() for _ in range(min(batch_size, len(remaining)))])
+        
+        calls = [(last_active_url, 'POST', [{'accountId': user_id} for user_id in batch]) for batch in wave]
+        size_rejected = False
+        
+        for batch, response in zip(wave, transport.request_many(calls, max_in_flight)):
+            if isinstance(response, Exception):
+                if getattr(response, 'status', None) in (413, 414) and len(batch) > 1:
+                    size_rejected = True
+                    # The endpoint refused this size; never build batches this big again
+                    ceiling = min(ceiling, max(len(batch) // 2, 1))
+                    batch_size = min(batch_size, ceiling)
+                if len(batch) > 1:
+                    half = len(batch) // 2
+                    retry_batches.extend([batch[:half], batch[half:]])
+                else:
+                    print(f"Error fetching last active date for {batch[0]}: {response}")
+                continue
             
-        except Exception as e:
-            print(f"Error fetching last active dates for batch: {e}")
+            batch_data = {
+                item['accountId']: item['lastActiveTimestamp']
+                for item in response.get('data', [])
+                if 'accountId' in item and 'lastActiveTimestamp' in item
+            }
+            last_active_data.update(batch_data)
+            if on_batch:
+                on_batch(batch, batch_data)
+        
+        if not size_rejected and batch_size < ceiling:
+            batch_size = min(batch_size * 2, ceiling)
+        
+        print(f"Fetched last active dates for {len(last_active_data)}/{len(user_ids)} users (batch size {batch_size})")
     
     return last_active_data
 
-def extract_group_memberships_ui(page, account_id, groups_data):
+def fetch_last_active_dates_in_page(transport, account_id, user_ids, max_in_flight=4, batch_size=50, max_batch_size=1000, on_batch=None):
+    """Run every last-active batch inside the page, with the same adaptive sizing and splitting"""
+    last_active_url = last_active_bulk_url(account_id)
+    last_active_data = {}
+    
+    def on_chunk(batches, _):
+        for batch, items in batches:
+            batch_data = {
+                item['accountId']: item['lastActiveTimestamp']
+                for item in items
+                if 'accountId' in item and 'lastActiveTimestamp' in item
+            }
+            last_active_data.update(batch_data)
+            if on_batch:
+                on_batch(batch, batch_data)
+        print(f"Fetched last active dates for {len(last_active_data)}/{len(user_ids)} users")
+    
+    failed = transport.bulk_post(last_active_url, list(user_ids), on_chunk, max_in_flight, batch_size, max_batch_size)
+    for user_id, status in failed:
+        print(f"Error fetching last active date for {user_id}: HTTP error! status: {status}")
+    return last_active_data
+
+def parse_member_ids_from_html(content):
+    """Pull member account IDs out of a rendered group page"""
+    member_ids = []
+    
+    # Look for user IDs in data attributes
+    member_ids.extend(re.findall(r'data-account-id="([^"]+)"', content))
+    
+    # Look for user IDs in links
+    member_ids.extend(re.findall(r'/users/([^"/]+)', content))
+    
+    # Remove duplicates and empty values, and filter out the admin user
+    return list(set([uid for uid in member_ids if uid and len(uid) > 10 and uid != ADMIN_USER_ID]))
+
+@RUN_METRICS.timed('memberships_ui')
+def extract_group_members_ui(page, account_id, group, timeout=DEFAULT_MAX_WAIT_MS):
+    """Extract the members of a single group by visiting its page and scraping UI; timeout caps each wait"""
+    group_id = group.id
+    group_name = group.name
+    
+    print(f"Extracting members for group: {group_name}")
+    
+    # Navigate to the group details page
+    group_url = f"{admin_url()}/o/{account_id}/groups/{group_id}"
+    # The member list arrives in its own XHR; once it has, the rows only need to render from it
+    try:
+        with page.expect_response(lambda r: f"/groups/{group_id}" in r.url and 'member' in r.url, timeout=timeout):
+            page.goto(group_url)
+        wait_for_dom_settled(page, timeout=timeout)
+    except Exception:
+        print("Member list response not seen, waiting for the page to settle")
+        try:
+            page.wait_for_load_state('networkidle', timeout=timeout)
+        except Exception:
+            print("Page did not settle, scraping what has rendered")
+    
+    member_ids = []
+    
+    # Method 1: Look for user account IDs in the page content
+    try:
+        member_ids = parse_member_ids_from_html(page.content())
+    except Exception as e:
+        print(f"Error extracting members from page content: {e}")
+    
+    # Method 2: Look for member elements in the UI
+    if not member_ids:
+        try:
+            member_rows = page.query_selector_all('tr[data-testid], [data-testid*="user"], [data-testid*="member"]')
+            for row in member_rows:
+                try:
+                    user_id = row.get_attribute('data-account-id') or row.get_attribute('data-user-id')
+                    if user_id and user_id != ADMIN_USER_ID:
+                        member_ids.append(user_id)
+                except:
+                    continue
+        except Exception as e:
+            print(f"Error extracting members from UI elements: {e}")
+    
+    # Remove any duplicates that might have been added
+    member_ids = list(set(member_ids))
+    
+    print(f"Found {len(member_ids)} members for group {group_name}")
+    
+    return member_ids
+
+def extract_group_memberships_ui(page, account_id, groups_data, timeout=DEFAULT_MAX_WAIT_MS):
     """Extract group memberships by visiting each group page and scraping UI"""
     print("Extracting group memberships from UI...")
     
     memberships_data = []
-    admin_user_id = "712020:961d02d1-08d0-4a82-a327-bacb754a95ff"  # The problematic admin user to exclude
     
     for group in groups_data:
-        group_id = group.get('id')
-        group_name = group.get('name', '')
-        
-        if not group_id:
+        if not group.id:
             continue
-            
-        print(f"Extracting members for group: {group_name}")
         
-        # Navigate to the group details page
-        group_url = f"https://admin.atlassian.com/o/{account_id}/groups/{group_id}"
-        page.goto(group_url)
-        page.wait_for_load_state('networkidle')
-        time.sleep(2)
-        
-        member_ids = []
-        
-        # Method 1: Look for user account IDs in the page content
-        try:
-            # Get the page content and look for user IDs
-            content = page.content()
-            
-            # Look for user IDs in data attributes
-            user_id_matches = re.findall(r'data-account-id="([^"]+)"', content)
-            member_ids.extend(user_id_matches)
-            
-            # Look for user IDs in links
-            user_link_matches = re.findall(r'/users/([^"/]+)', content)
-            member_ids.extend(user_link_matches)
-            
-            # Remove duplicates and empty values
-            member_ids = list(set([uid for uid in member_ids if uid and len(uid) > 10]))
+        memberships_data.append(Membership(group.id, extract_group_members_ui(page, account_id, group, timeout)))
+    
+    return memberships_data
+
+def group_members_url(account_id, group_id, start_index=1, page_size=100):
+    return f"{admin_url()}/gateway/api/adminhub/um/org/{account_id}/groups/{group_id}/members?count={page_size}&start-index={start_index}"
+
+def member_ids_from_response(response):
+    """Account IDs from one page of the group members endpoint, plus the raw page length"""
+    members = response.get('users') or response.get('members') or response.get('data') or []
+    return [member.get('accountId') or member.get('id') for member in members if member.get('accountId') or member.get('id')], len(members)
+
+def fetch_group_members(transport, account_id, group_id, page_size=100):
+    """Page through the members of one group via the gateway API"""
+    member_ids = []
+    start_index = 1
+    
+    while True:
+        page_ids, page_length = member_ids_from_response(
+            transport.get_json(group_members_url(account_id, group_id, start_index, page_size))
+        )
+        member_ids.extend(page_ids)
+        
+        if page_length < page_size:
+            break
+        start_index += page_size
+    
+    return member_ids
+
+@RUN_METRICS.timed('memberships', lambda members: sum(len(ids) for ids in members.values() if ids))
+def fetch_group_memberships_via_api(transport, account_id, groups_data, max_in_flight=10, page_size=100, on_group=None):
+    """Fetch group members from the gateway API, running many groups concurrently.
+    
+    Requests go out in waves through transport.request_many: each wave asks for
+    the next members page of up to a few windows' worth of groups, and groups
+    with a full page go back on the queue for their next page.
+    
+    Returns a dict of group ID -> member IDs. Groups whose members could not be
+    fetched map to None so the caller can fall back to the UI scrape for them.
+    on_group(group_id, member_ids) is called as each group finishes.
+    """
+    print(f"Fetching group memberships via API ({max_in_flight} requests in flight)...")
+    
+    group_ids = [group.id for group in groups_data if group.id]
+    members_by_group = {group_id: [] for group_id in group_ids}
+    next_index = {group_id: 1 for group_id in group_ids}
+    pending = deque(group_ids)
+    wave_size = max(max_in_flight * 4, 1)
+    done = 0
+    
+    while pending:
+        wave = [pending.popleft() for _ in range(min(wave_size, len(pending)))]
+        calls = [(group_members_url(account_id, group_id, next_index[group_id], page_size), 'GET', None) for group_id in wave]
+        
+        for group_id, response in zip(wave, transport.request_many(calls, max_in_flight)):
+            if isinstance(response, Exception):
+                print(f"Error fetching members for group {group_id}: {response}")
+                members_by_group[group_id] = None
+                done += 1
+                continue
             
-            # Filter out the admin user
-            member_ids = [uid for uid in member_ids if uid != admin_user_id]
+            page_ids, page_length = member_ids_from_response(response)
+            members_by_group[group_id].extend(page_ids)
             
-        except Exception as e:
-            print(f"Error extracting members from page content: {e}")
-        
-        # Method 2: Look for member elements in the UI
-        if not member_ids:
-            try:
-                member_rows = page.query_selector_all('tr[data-testid], [data-testid*="user"], [data-testid*="member"]')
-                for row in member_rows:
-                    try:
-                        user_id = row.get_attribute('data-account-id') or row.get_attribute('data-user-id')
-                        if user_id and user_id != admin_user_id:
-                            member_ids.append(user_id)
-                    except:
-                        continue
-            except Exception as e:
-                print(f"Error extracting members from UI elements: {e}")
-        
-        # Remove any duplicates that might have been added
-        member_ids = list(set(member_ids))
+            if page_length < page_size:
+                done += 1
+                if on_group:
+                    on_group(group_id, members_by_group[group_id])
+            else:
+                next_index[group_id] += page_size
+                pending.append(group_id)
         
-        print(f"Found {len(member_ids)} members for group {group_name}")
+        print(f"Fetched memberships for {done}/{len(group_ids)} groups")
+    
+    return members_by_group
+
+def extract_group_memberships(transport, page, account_id, groups_data, max_in_flight=10, on_group=None,
+                              ui_timeout=DEFAULT_MAX_WAIT_MS):
+    """Extract group memberships via the API, scraping the UI only for groups the API could not serve"""
+    members_by_group = fetch_group_memberships_via_api(
+        transport, account_id, groups_data, max_in_flight, on_group=on_group
+    )
+    
+    memberships_data = []
+    fallback_count = 0
+    
+    for group in groups_data:
+        group_id = group.id
+        if not group_id:
+            continue
         
-        memberships_data.append({
-            'groupId': group_id,
-            'memberIds': member_ids
-        })
+        member_ids = members_by_group.get(group_id)
+        if member_ids is None:
+            fallback_count += 1
+            if page is None:
+                # Offline runs have no browser to scrape with
+                print(f"No members available for group {group.name or group_id} and no browser to scrape them")
+                member_ids = []
+            else:
+                print(f"API membership fetch failed for group {group.name or group_id}, falling back to UI")
+                member_ids = extract_group_members_ui(page, account_id, group, ui_timeout)
+            if on_group:
+                on_group(group_id, member_ids)
+        else:
+            # Keep first-seen order while dropping duplicates across pages
+            member_ids = list(dict.fromkeys(member_ids))
         
-        # Go back to avoid too many page loads
-        page.go_back()
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
+        memberships_data.append(Membership(group_id, member_ids))
     
+    print(f"Extracted memberships for {len(memberships_data)} groups ({fallback_count} via UI fallback)")
     return memberships_data
 
+def as_membership_graph(memberships):
+    """Accept either a MembershipGraph or a list of Membership records"""
+    if isinstance(memberships, MembershipGraph):
+        return memberships
+    return MembershipGraph.from_memberships(memberships)
+
 def parse_users_data(users_data, memberships_data, last_active_data):
     """Parse users data into the required format"""
+    graph = as_membership_graph(memberships_data)
     parsed_users = []
     
     for user in users_data:
-        user_id = user.get('accountId')
-        name = user.get('displayName', '')
-        email = user.get('email', '')
-        
-        status = user.get('status', 'unknown')
-        if 'accountStatus' in user:
-            status = user['accountStatus']
-        
-        last_active = last_active_data.get(user_id)
-        
-        user_groups = []
-        for membership in memberships_data:
-            if user_id in membership['memberIds']:
-                user_groups.append(membership['groupId'])
-        
         parsed_users.append({
-            'id': user_id,
-            'name': name,
-            'email': email,
-            'last_active': last_active,
-            'status': status,
-            'groups': user_groups
+            'id': user.id,
+            'name': user.name,
+            'email': user.email,
+            'last_active': last_active_data.get(user.id),
+            'status': user.status,
+            'groups': graph.groups_of(user.id)
         })
     
     return parsed_users
 
 def parse_groups_data(groups_data, memberships_data):
     """Parse groups data into the required format"""
+    graph = as_membership_graph(memberships_data)
     parsed_groups = []
     
     for group in groups_data:
-        group_id = group.get('id')
-        name = group.get('name', '')
-        description = group.get('description', '')
-        
-        group_members = []
-        for membership in memberships_data:
-            if membership['groupId'] == group_id:
-                group_members = membership['memberIds']
-                break
-        
         parsed_groups.append({
-            'id': group_id,
-            'name': name,
-            'description': description,
-            'members': group_members
+            'id': group.id,
+            'name': group.name,
+            'description': group.description,
+            'members': graph.members_of(group.id)
         })
     
     return parsed_groups
 
-def main():
-    """Main function to execute the extraction process"""
-    config = load_config()
+def save_results(users_data, groups_data, memberships_data, last_active_data, sqlite_path=None, output_dir='.'):
+    """Parse the fetched data, write users.json/groups.json to output_dir (and the SQLite store if configured) and print a summary"""
+    # Parse the data into the required format
+    print("=" * 50)
+    print("PARSING DATA")
+    print("=" * 50)
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=config.get('headless', False))
-        context = browser.new_context()
-        page = context.new_page()
+    with RUN_METRICS.phase('parse') as phase, RUN_METRICS.profiled('parse'):
+        # Index memberships once so both parsers run in linear time
+        graph = as_membership_graph(memberships_data)
         
-        # Handle login
-        if not handle_login(page, config):
-            print("Login failed. Please check your credentials and try again.")
-            browser.close()
-            return
-        
-        # Extract account ID
-        account_id = extract_account_id(page)
-        if not account_id:
-            print("Could not extract account ID. Exiting.")
-            browser.close()
+        parsed_users = parse_users_data(users_data, graph, last_active_data)
+        parsed_groups = parse_groups_data(groups_data, graph)
+        phase.add_items(len(parsed_users) + len(parsed_groups))
+    
+    # Save to JSON files
+    os.makedirs(output_dir, exist_ok=True)
+    save_json(parsed_users, os.path.join(output_dir, 'users.json'))
+    save_json(parsed_groups, os.path.join(output_dir, 'groups.json'))
+    if sqlite_path:
+        write_sqlite(sqlite_path, parsed_users, parsed_groups)
+    
+    # Print summary
+    print("=" * 50)
+    print("EXTRACTION COMPLETE")
+    print("=" * 50)
+    print(f"Total users extracted: {len(parsed_users)}")
+    print(f"Total groups extracted: {len(parsed_groups)}")
+    
+    print(f"Total group memberships: {graph.membership_count()}")
+    
+    return parsed_users, parsed_groups
+
+def fetch_listings(transport, account_id, config):
+    """Fetch the full users and groups listings"""
+    # Fetch users
+    users_data = fetch_users_via_api(
+        transport, account_id, config.get('user_partitions'), config.get('user_partition_concurrency', 8)
+    )
+    
+    # Fetch groups
+    groups_data = fetch_groups_via_api(transport, account_id, config.get('groups_prefetch_window', 8))
+    
+    return users_data, groups_data
+
+def fetch_with_checkpoint(transport, page, account_id, config, checkpoint):
+    """Run every fetch phase, recording progress so an interrupted run can pick up where it stopped"""
+    partitions = config.get('user_partitions')
+    window = config.get('user_partition_concurrency', 8)
+    
+    # Users: reload what was already listed and continue from the saved cursor(s)
+    users_data = checkpoint.load_users()
+    users_state = checkpoint.users_state()
+    listing_finished = 'cursor' in users_state and not users_state['cursor']
+    
+    if checkpoint.is_done('users') or listing_finished:
+        print(f"Users listing already complete in checkpoint ({len(users_data)} users)")
+    else:
+        if users_data:
+            print(f"Resuming users listing after {len(users_data)} users")
+        if partitions:
+            pages = iter_partitioned_user_pages(
+                transport, account_id, partitions, window, state=users_state,
+                seen=[user.id for user in users_data], on_page=checkpoint.record_users_page
+            )
+        else:
+            pages = iter_user_pages(transport, account_id, users_state.get('cursor'), on_page=checkpoint.record_users_page)
+        
+        with RUN_METRICS.phase('users') as phase:
+            for current_users in pages:
+                users_data.extend(current_users)
+                phase.add_items(len(current_users))
+                print(f"Fetched {len(current_users)} users, total: {len(users_data)}")
+    checkpoint.mark_done('users')
+    
+    # Groups: reload and continue from the saved start-index
+    groups_data = checkpoint.load_groups()
+    
+    if checkpoint.is_done('groups'):
+        print(f"Groups listing already complete in checkpoint ({len(groups_data)} groups)")
+    else:
+        if groups_data:
+            print(f"Resuming groups listing after {len(groups_data)} groups")
+        with RUN_METRICS.phase('groups') as phase:
+            for current_groups in iter_group_pages(
+                transport, account_id, config.get('groups_prefetch_window', 8),
+                start_index=checkpoint.groups_start_index(), on_page=checkpoint.record_groups_page
+            ):
+                groups_data.extend(current_groups)
+                phase.add_items(len(current_groups))
+                print(f"Fetched {len(current_groups)} groups, total: {len(groups_data)}")
+    checkpoint.mark_done('groups')
+    
+    # Last-active: only the IDs no finished batch covered
+    finished_ids, last_active_data = checkpoint.load_last_active()
+    user_ids = [user.id for user in users_data if user.id and user.id not in finished_ids]
+    if finished_ids:
+        print(f"Resuming last-active lookups: {len(finished_ids)} done, {len(user_ids)} left")
+    last_active_data.update(fetch_last_active_dates(
+        transport, account_id, user_ids, **last_active_options(config), on_batch=checkpoint.record_last_active_batch
+    ))
+    
+    # Memberships: only the groups that have not finished yet
+    members_by_group = checkpoint.load_memberships()
+    remaining_groups = [group for group in groups_data if group.id and group.id not in members_by_group]
+    if members_by_group:
+        print(f"Resuming memberships: {len(members_by_group)} groups done, {len(remaining_groups)} left")
+    for membership in extract_group_memberships(
+        transport, page, account_id, remaining_groups,
+        config.get('membership_concurrency', 10), on_group=checkpoint.record_membership,
+        ui_timeout=max_wait_ms(config)
+    ):
+        members_by_group[membership.group_id] = membership.member_ids
+    
+    memberships_data = [
+        Membership(group.id, dict.fromkeys(members_by_group.get(group.id, ())))
+        for group in groups_data if group.id
+    ]
+    return users_data, groups_data, last_active_data, memberships_data
+
+def stream_extraction(transport, page, account_id, config):
+    """Fetch, project and write page by page so memory is bounded by queue depth rather than org size"""
+    queue_depth = config.get('stream_queue_depth', 8)
+    max_in_flight = config.get('membership_concurrency', 10)
+    
+    # Only the compact membership index is kept for the whole run; user records need it for their 'groups'
+    graph = MembershipGraph()
+    
+    # The SQLite store, if configured, is filled from the same projected records as the JSON files
+    store = SqliteStore(config['sqlite_path']) if config.get('sqlite_path') else None
+    
+    def writer(kind):
+        json_writer = RecordWriter(f"{kind}.json", f"{kind}.ndjson")
+        return TeeWriter(json_writer, SqliteRecordWriter(store, kind)) if store else json_writer
+    
+    print("Streaming groups...")
+    groups_pipeline = StreamingPipeline(
+        lambda item: parse_groups_data(item[0], item[1]),
+        writer('groups'),
+        queue_depth
+    )
+    with RUN_METRICS.phase('groups') as phase:
+        for current_groups in iter_group_pages(transport, account_id, config.get('groups_prefetch_window', 8)):
+            memberships = extract_group_memberships(
+                transport, page, account_id, current_groups, max_in_flight, ui_timeout=max_wait_ms(config)
+            )
+            for membership in memberships:
+                graph.add_group(membership.group_id)
+                for user_id in membership.member_ids:
+                    graph.add_membership(membership.group_id, user_id)
+            groups_pipeline.feed((current_groups, memberships))
+            phase.add_items(len(current_groups))
+    total_groups = groups_pipeline.close()
+    
+    print("Streaming users...")
+    users_pipeline = StreamingPipeline(
+        lambda item: parse_users_data(item[0], graph, item[1]),
+        writer('users'),
+        queue_depth
+    )
+    if config.get('user_partitions'):
+        user_pages = iter_partitioned_user_pages(
+            transport, account_id, config['user_partitions'], config.get('user_partition_concurrency', 8)
+        )
+    else:
+        user_pages = iter_user_pages(transport, account_id)
+    
+    with RUN_METRICS.phase('users') as phase:
+        for current_users in user_pages:
+            user_ids = [user.id for user in current_users if user.id]
+            users_pipeline.feed((current_users, fetch_last_active_dates(transport, account_id, user_ids, **last_active_options(config))))
+            phase.add_items(len(current_users))
+    total_users = users_pipeline.close()
+    if store:
+        store.close()
+    
+    print("=" * 50)
+    print("EXTRACTION COMPLETE")
+    print("=" * 50)
+    print(f"Total users extracted: {total_users}")
+    print(f"Total groups extracted: {total_groups}")
+    print(f"Total group memberships: {graph.membership_count()}")
+
+def sync_incremental(transport, page, account_id, users_data, groups_data, config):
+    """Refresh last-active and membership data only where needed, then write full output plus a delta file"""
+    snapshot_path = config.get('snapshot_file', incremental.SNAPSHOT_FILE)
+    rolling_size = config.get('incremental_rolling_slice', 50)
+    snapshot = incremental.load_snapshot(snapshot_path, account_id)
+    
+    user_listing = {user.id: user.listing for user in users_data if user.id}
+    group_listing = {group.id: group.listing for group in groups_data if group.id}
+    
+    if snapshot:
+        previous_users = snapshot.get('users', {})
+        previous_groups = snapshot.get('groups', {})
+        user_ids, user_offset, changed_users = incremental.plan_refresh(
+            previous_users, user_listing, snapshot.get('user_offset', 0), rolling_size
+        )
+        group_ids, group_offset, changed_groups = incremental.plan_refresh(
+            previous_groups, group_listing, snapshot.get('group_offset', 0), rolling_size
+        )
+        print(f"Incremental sync: {changed_users} changed users, {changed_groups} changed groups "
+              f"(+ rolling slice of {rolling_size})")
+    else:
+        print("No snapshot found, running a full sync")
+        previous_users = {}
+        previous_groups = {}
+        user_ids, user_offset = list(user_listing), 0
+        group_ids, group_offset = list(group_listing), 0
+    
+    # Start from what the snapshot already knows and overwrite with fresh data
+    last_active_data = {
+        user_id: entry.get('last_active')
+        for user_id, entry in previous_users.items() if user_id in user_listing
+    }
+    last_active_data.update(fetch_last_active_dates(transport, account_id, user_ids, **last_active_options(config)))
+    
+    refresh_ids = set(group_ids)
+    refreshed = extract_group_memberships(
+        transport, page, account_id,
+        [group for group in groups_data if group.id in refresh_ids],
+        config.get('membership_concurrency', 10), ui_timeout=max_wait_ms(config)
+    )
+    refreshed_members = {membership.group_id: membership.member_ids for membership in refreshed}
+    
+    memberships_data = [
+        Membership(
+            group_id,
+            refreshed_members[group_id] if group_id in refreshed_members
+            else previous_groups.get(group_id, {}).get('members', [])
+        )
+        for group_id in group_listing
+    ]
+    
+    parsed_users, parsed_groups = save_results(users_data, groups_data, memberships_data, last_active_data, config.get('sqlite_path'))
+    
+    delta = incremental.build_delta(snapshot, parsed_users, parsed_groups)
+    save_json(delta, config.get('delta_file', incremental.DELTA_FILE))
+    print(f"Delta: users +{len(delta['users']['added'])} ~{len(delta['users']['changed'])} -{len(delta['users']['removed'])}, "
+          f"groups +{len(delta['groups']['added'])} ~{len(delta['groups']['changed'])} -{len(delta['groups']['removed'])}, "
+          f"memberships +{len(delta['memberships']['added'])} -{len(delta['memberships']['removed'])}")
+    
+    incremental.save_snapshot(
+        incremental.build_snapshot(account_id, users_data, groups_data, parsed_users, parsed_groups, user_offset, group_offset),
+        snapshot_path
+    )
+
+def run_extraction(transport, page, account_id, config, args):
+    """Fetch and write everything in the mode config asks for (streaming, incremental, checkpointed or plain)"""
+    print("=" * 50)
+    print("FETCHING DATA")
+    print("=" * 50)
+    
+    configure_listing_fingerprints(config)
+    if config.get('streaming', False):
+        # Users and groups listings are consumed page by page instead of being held in memory
+        stream_extraction(transport, page, account_id, config)
+    elif config.get('incremental', False):
+        # Only re-fetch details for entities whose listing changed, then write a delta
+        users_data, groups_data = fetch_listings(transport, account_id, config)
+        sync_incremental(transport, page, account_id, users_data, groups_data, config)
+    elif config.get('checkpoint', True):
+        # Every phase is logged to disk so a crash or expired session can be resumed with --resume
+        try:
+            checkpoint = Checkpoint(
+                config.get('checkpoint_dir', CHECKPOINT_DIR), account_id, resume=args.resume,
+                fresh=getattr(args, 'fresh', False), fsync_interval=config.get('checkpoint_fsync_s', 1.0)
+            )
+        except CheckpointExistsError as e:
+            print(e)
             return
-        
-        print("=" * 50)
-        print("FETCHING DATA")
-        print("=" * 50)
-        
-        # Fetch users
-        users_data = fetch_users_via_api(page, account_id)
-        
-        # Fetch groups
-        groups_data = fetch_groups_via_api(page, account_id)
+        users_data, groups_data, last_active_data, memberships_data = fetch_with_checkpoint(
+            transport, page, account_id, config, checkpoint
+        )
+        save_results(users_data, groups_data, memberships_data, last_active_data, config.get('sqlite_path'))
+        checkpoint.clear()
+    else:
+        users_data, groups_data = fetch_listings(transport, account_id, config)
         
         # Fetch last active dates for users
-        user_ids = [user.get('accountId') for user in users_data if user.get('accountId')]
-        last_active_data = fetch_last_active_dates(page, account_id, user_ids)
+        user_ids = [user.id for user in users_data if user.id]
+        last_active_data = fetch_last_active_dates(transport, account_id, user_ids, **last_active_options(config))
         
-        # Extract group memberships using UI method (since API method is failing)
-        memberships_data = extract_group_memberships_ui(page, account_id, groups_data)
+        # Extract group memberships via the API, with the UI scrape as a per-group fallback
+        memberships_data = extract_group_memberships(
+            transport, page, account_id, groups_data, config.get('membership_concurrency', 10),
+            ui_timeout=max_wait_ms(config)
+        )
         
-        # Parse the data into the required format
-        print("=" * 50)
-        print("PARSING DATA")
-        print("=" * 50)
-        
-        parsed_users = parse_users_data(users_data, memberships_data, last_active_data)
-        parsed_groups = parse_groups_data(groups_data, memberships_data)
-        
-        # Save to JSON files
-        save_json(parsed_users, 'users.json')
-        save_json(parsed_groups, 'groups.json')
-        
-        # Print summary
-        print("=" * 50)
-        print("EXTRACTION COMPLETE")
-        print("=" * 50)
-        print(f"Total users extracted: {len(parsed_users)}")
-        print(f"Total groups extracted: {len(parsed_groups)}")
-        
-        total_memberships = sum(len(group['members']) for group in parsed_groups)
-        print(f"Total group memberships: {total_memberships}")
-        
-        browser.close()
+        save_results(users_data, groups_data, memberships_data, last_active_data, config.get('sqlite_path'))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract Atlassian users and groups")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue from the last checkpoint instead of starting over")
+    parser.add_argument('--fresh', action='store_true',
+                        help="discard an unfinished run's checkpoint and start over")
+    parser.add_argument('--profile', action='store_true',
+                        help="run the parse stage under cProfile and save parse.prof to metrics_dir")
+    parser.add_argument('--cache-mode', choices=['off', 'read-through', 'offline'],
+                        help="serve gateway responses from the on-disk cache (overrides cache_mode in config.json)")
+    return parser.parse_args()
+
+def main():
+    """Main function to execute the extraction process"""
+    args = parse_args()
+    config = load_config()
+    configure_admin_url(config)
+    if args.profile:
+        RUN_METRICS.enable_profiling(config.get('metrics_dir', '.'))
+    if args.cache_mode:
+        config['cache_mode'] = args.cache_mode
+    
+    if config.get('org_ids'):
+        # Several orgs run concurrently on the async pipeline, one browser context each
+        from multi_org import run_multi_org_extraction
+        run_multi_org_extraction(config)
+        return
+    
+    if config.get('async_mode', False):
+        # Imported lazily so the sync path never needs the asyncio machinery
+        from extract_async import run_async_extraction
+        run_async_extraction(config)
+        return
+    
+    if config.get('cache_mode') == 'offline':
+        # Everything comes from the response cache, so there is no browser and no login
+        account_id = config.get('account_id') or (load_saved_session(config.get('session_file', SESSION_FILE)) or {}).get('account_id')
+        if not account_id:
+            print("Offline mode needs the account ID: set account_id in config.json or keep a saved session")
+            return
+        transport = create_transport(config, None, None)
+        run_extraction(transport, None, account_id, config, args)
+        transport.close()
+    else:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=config.get('headless', False))
+            
+            # Reuse the saved session when it is still valid, otherwise log in and save a fresh one
+            context, page, account_id = open_authenticated_context(browser, config)
+            if not context:
+                print("Login failed. Please check your credentials and try again.")
+                browser.close()
+                return
+            
+            # After login the browser is only needed for the UI fallback when using the HTTP transport
+            transport = create_transport(config, context, page)
+            run_extraction(transport, page, account_id, config, args)
+            transport.close()
+            browser.close()
+    
+    RUN_METRICS.write_outputs(config, 'extract')
 
 if __name__ == "__main__":
     main()
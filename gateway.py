@@ -0,0 +1,809 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import RUN_METRICS
+
+ADMIN_URL = "https://admin.atlassian.com"
+
+# Base URL every gateway and portal URL is built from; only changed to point at a stand-in server
+_admin_url = ADMIN_URL
+
+def admin_url():
+    return _admin_url
+
+def configure_admin_url(config):
+    """Use config['admin_url'] (e.g. a local mock gateway) instead of the real admin portal"""
+    global _admin_url
+    _admin_url = (config.get('admin_url') or ADMIN_URL).rstrip('/')
+    if _admin_url != ADMIN_URL:
+        print(f"Using admin URL {_admin_url}")
+
+# Statuses that mean "slow down and try again" rather than a real failure
+THROTTLE_STATUSES = (429, 503)
+
+# The only throttle status that means the server did not act on the request; a 503 can arrive
+# after a POST already took effect, so requests that are not idempotent are retried on 429 alone
+NOT_PROCESSED_STATUSES = (429,)
+
+# Inline fetch run inside the logged-in page; the browser attaches the session cookies itself.
+# The status and Retry-After header come back to Python so throttling is handled in one place.
+FETCH_JSON_JS = """async ([url, method, body]) => {
+    const options = {
+        method: method,
+        credentials: 'include',
+        headers: {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
+    };
+    if (body !== null) {
+        options.body = JSON.stringify(body);
+    }
+    const started = performance.now();
+    const response = await fetch(url, options);
+    const text = await response.text();
+    return {
+        status: response.status,
+        retryAfter: response.headers.get('Retry-After'),
+        body: response.ok ? JSON.parse(text) : null,
+        bytes: text.length,
+        elapsed: (performance.now() - started) / 1000
+    };
+}"""
+
+# Pool of concurrent fetches run inside the page in one evaluate call. Throttled requests pause
+# every worker for the server's Retry-After and are retried; each throttle is reported back.
+FETCH_MANY_JS = """async ([calls, maxInFlight, maxRetries, retryStatuses]) => {
+    const poolStarted = performance.now();
+    const results = new Array(calls.length);
+    const throttles = [];
+    let next = 0;
+    let pausedUntil = 0;
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    
+    const send = async ([url, method, body]) => {
+        const options = {
+            method: method,
+            credentials: 'include',
+            headers: {
+                'Accept': 'application/json',
+                'Content-Type': 'application/json'
+            }
+        };
+        if (body !== null) {
+            options.body = JSON.stringify(body);
+        }
+        for (let attempt = 0; ; attempt++) {
+            const wait = pausedUntil - Date.now();
+            if (wait > 0) await sleep(wait);
+            
+            const started = performance.now();
+            const response = await fetch(url, options);
+            const text = await response.text();
+            const timing = {bytes: text.length, elapsed: (performance.now() - started) / 1000, retries: attempt};
+            if (response.ok) {
+                return {status: response.status, body: JSON.parse(text), ...timing};
+            }
+            if (!retryStatuses.includes(response.status) || attempt >= maxRetries) {
+                return {status: response.status, body: null, ...timing};
+            }
+            const retryAfter = parseFloat(response.headers.get('Retry-After'));
+            const seconds = isNaN(retryAfter) ? Math.min(2 ** attempt, 30) : retryAfter;
+            throttles.push(seconds);
+            pausedUntil = Math.max(pausedUntil, Date.now() + seconds * 1000);
+        }
+    };
+    
+    const worker = async () => {
+        while (next < calls.length) {
+            const index = next++;
+            try {
+                results[index] = await send(calls[index]);
+            } catch (e) {
+                results[index] = {status: 0, body: null, error: String(e), bytes: 0, elapsed: 0, retries: 0};
+            }
+        }
+    };
+    
+    const workers = [];
+    for (let w = 0; w < Math.min(maxInFlight, calls.length); w++) {
+        workers.push(worker());
+    }
+    await Promise.all(workers);
+    return {results: results, throttles: throttles, elapsed: (performance.now() - poolStarted) / 1000};
+}"""
+
+# Shared prelude of the in-page paging loops below: a throttle-aware fetch that paces itself to
+# the limiter's token rate, pauses every caller for the server's Retry-After and records
+# [url, status, seconds, bytes] per attempt. deliver() hands a chunk to Python together with the
+# attempts and throttles seen since the last one, and picks up the limiter's current window,
+# which caps how many requests the loop keeps in flight.
+IN_PAGE_FETCH_JS = """
+    const throttles = [];
+    const timings = [];
+    let pausedUntil = 0;
+    let windowCap = initialWindow || Infinity;
+    let tokens = burst;
+    let refilled = Date.now();
+    let reportedTimings = 0;
+    let reportedThrottles = 0;
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    const takeToken = async () => {
+        while (rate) {
+            const now = Date.now();
+            tokens = Math.min(burst, tokens + (now - refilled) / 1000 * rate);
+            refilled = now;
+            if (tokens >= 1) {
+                tokens -= 1;
+                return;
+            }
+            await sleep((1 - tokens) / rate * 1000);
+        }
+    };
+    const unreported = () => {
+        const report = {timings: timings.slice(reportedTimings), throttles: throttles.slice(reportedThrottles)};
+        reportedTimings = timings.length;
+        reportedThrottles = throttles.length;
+        return report;
+    };
+    const deliver = async (items, state) => {
+        const reply = await window[binding](streamId, items, state, unreported());
+        if (reply && reply.window) windowCap = reply.window;
+    };
+    const send = async (url, method, body) => {
+        const options = {
+            method: method,
+            credentials: 'include',
+            headers: {
+                'Accept': 'application/json',
+                'Content-Type': 'application/json'
+            }
+        };
+        if (body !== null) {
+            options.body = JSON.stringify(body);
+        }
+        for (let attempt = 0; ; attempt++) {
+            const wait = pausedUntil - Date.now();
+            if (wait > 0) await sleep(wait);
+            await takeToken();
+            
+            const started = performance.now();
+            let response, text;
+            try {
+                response = await fetch(url, options);
+                text = await response.text();
+            } catch (e) {
+                timings.push([url, 0, (performance.now() - started) / 1000, 0]);
+                return {status: 0, body: null};
+            }
+            timings.push([url, response.status, (performance.now() - started) / 1000, text.length]);
+            if (response.ok) {
+                return {status: response.status, body: JSON.parse(text)};
+            }
+            if ((response.status !== 429 && response.status !== 503) || attempt >= maxRetries) {
+                return {status: response.status, body: null};
+            }
+            const retryAfter = parseFloat(response.headers.get('Retry-After'));
+            const seconds = isNaN(retryAfter) ? Math.min(2 ** attempt, 30) : retryAfter;
+            throttles.push(seconds);
+            pausedUntil = Math.max(pausedUntil, Date.now() + seconds * 1000);
+        }
+    };
+"""
+
+# Follows a links.next cursor chain inside the page, handing every `chunkPages` pages of
+# records (plus the cursor to continue from) to Python through the exposed binding
+WALK_CURSOR_JS = """async ([binding, streamId, baseUrl, cursor, pageSize, chunkPages, maxRetries, rate, burst, initialWindow]) => {
+""" + IN_PAGE_FETCH_JS + """
+    let chunk = [];
+    let chunkPageCount = 0;
+    let pages = 0;
+    while (true) {
+        const url = cursor ? `${baseUrl}?cursor=${cursor}&count=${pageSize}` : `${baseUrl}?count=${pageSize}`;
+        const result = await send(url, 'GET', null);
+        if (result.status < 200 || result.status >= 300) {
+            if (chunk.length) await deliver(chunk, cursor);
+            return {error: {status: result.status, url: url}, pages, ...unreported()};
+        }
+        if (!result.body.data) break;
+        
+        chunk = chunk.concat(result.body.data);
+        chunkPageCount++;
+        pages++;
+        cursor = (result.body.links || {}).next || null;
+        if (chunkPageCount >= chunkPages || !cursor) {
+            await deliver(chunk, cursor);
+            chunk = [];
+            chunkPageCount = 0;
+        }
+        if (!cursor) break;
+    }
+    if (chunk.length) await deliver(chunk, cursor);
+    return {pages, ...unreported()};
+}"""
+
+# Walks an offset-paged listing inside the page, `prefetch` pages at a time, stopping at the first
+# short page; every `chunkPages` pages go to Python with the start-index to continue from
+WALK_OFFSET_JS = """async ([binding, streamId, urlTemplate, itemsKey, startIndex, pageSize, prefetch, chunkPages, maxRetries, rate, burst, initialWindow]) => {
+""" + IN_PAGE_FETCH_JS + """
+    let chunk = [];
+    let chunkPageCount = 0;
+    let pages = 0;
+    let start = startIndex;
+    let total = null;
+    while (true) {
+        // The first page comes alone to learn the total; later windows stop at it, and once every
+        // page up to it was full a single probe past it checks whether the total was stale.
+        // Windows also shrink to the limiter's concurrency window as reported at each chunk.
+        const width = Math.max(Math.min(prefetch, windowCap), 1);
+        let length = pages === 0 ? 1 : width;
+        if (total !== null) {
+            length = start > total ? 1 : Math.min(width, Math.ceil((total - start + 1) / pageSize));
+            if (start > total) total = null;
+        }
+        const offsets = Array.from({length}, (_, i) => start + i * pageSize);
+        const results = await Promise.all(offsets.map((offset) => send(urlTemplate.replace('{start}', offset), 'GET', null)));
+        
+        for (let i = 0; i < offsets.length; i++) {
+            const result = results[i];
+            if (result.status < 200 || result.status >= 300) {
+                if (chunk.length) await deliver(chunk, offsets[i]);
+                return {error: {status: result.status, url: urlTemplate.replace('{start}', offsets[i])}, pages, ...unreported()};
+            }
+            const items = result.body[itemsKey];
+            if (!items) {
+                if (chunk.length) await deliver(chunk, offsets[i]);
+                return {pages, ...unreported()};
+            }
+            
+            if (pages === 0) total = result.body.total || result.body.totalCount || null;
+            chunk = chunk.concat(items);
+            chunkPageCount++;
+            pages++;
+            const nextStart = offsets[i] + pageSize;
+            if (items.length < pageSize) {
+                await deliver(chunk, nextStart);
+                return {pages, ...unreported()};
+            }
+            if (chunkPageCount >= chunkPages) {
+                await deliver(chunk, nextStart);
+                chunk = [];
+                chunkPageCount = 0;
+            }
+        }
+        start = offsets[offsets.length - 1] + pageSize;
+    }
+}"""
+
+# Runs every bulk POST batch inside the page under a concurrency cap. Batch size doubles after
+# each success up to a ceiling that drops when the endpoint rejects a size (413/414); failed
+# batches are split and retried. Finished [batch, data] pairs go to Python in chunks.
+BULK_POST_JS = """async ([binding, streamId, url, ids, maxInFlight, batchSize, maxBatchSize, chunkBatches, maxRetries, rate, burst, initialWindow]) => {
+""" + IN_PAGE_FETCH_JS + """
+    let next = 0;
+    let size = batchSize;
+    let ceiling = maxBatchSize;
+    let active = 0;
+    const retries = [];
+    const failed = [];
+    let chunk = [];
+    
+    const flush = async () => {
+        if (!chunk.length) return;
+        const ready = chunk;
+        chunk = [];
+        await deliver(ready, null);
+    };
+    
+    const worker = async () => {
+        while (true) {
+            if (active >= Math.max(Math.min(maxInFlight, windowCap), 1)) {
+                // The limiter's window shrank below the worker count; idle until a slot frees
+                await sleep(10);
+                continue;
+            }
+            let batch;
+            if (retries.length) {
+                batch = retries.shift();
+            } else if (next < ids.length) {
+                batch = ids.slice(next, next + size);
+                next += batch.length;
+            } else if (active > 0) {
+                // Another worker may still split a failed batch back onto the queue
+                await sleep(10);
+                continue;
+            } else {
+                return;
+            }
+            
+            active++;
+            const result = await send(url, 'POST', batch.map((accountId) => ({accountId})));
+            active--;
+            
+            if (result.status >= 200 && result.status < 300) {
+                chunk.push([batch, result.body.data || []]);
+                size = Math.min(size * 2, ceiling);
+                if (chunk.length >= chunkBatches) await flush();
+                continue;
+            }
+            // Only a size rejection lowers the ceiling; a 400 (bad ID) just splits this batch
+            if ([413, 414].includes(result.status) && batch.length > 1) {
+                ceiling = Math.min(ceiling, Math.max(Math.floor(batch.length / 2), 1));
+                size = Math.min(size, ceiling);
+            }
+            if (batch.length > 1) {
+                const half = Math.floor(batch.length / 2);
+                retries.push(batch.slice(0, half), batch.slice(half));
+            } else {
+                failed.push([batch[0], result.status]);
+            }
+        }
+    };
+    
+    await Promise.all(Array.from({length: Math.max(Math.min(maxInFlight, ids.length), 1)}, worker));
+    await flush();
+    return {failed, ...unreported()};
+}"""
+
+class GatewayError(Exception):
+    """Raised when a gateway call comes back with a non-OK status"""
+    
+    def __init__(self, status, url):
+        super().__init__(f"HTTP error! status: {status} ({url})")
+        self.status = status
+        self.url = url
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class RateLimiter:
+    """Token bucket plus an AIMD concurrency window shared by every gateway call.
+    
+    Each success widens the window additively (about +1 per window's worth of
+    successes); each 429/503 halves it and pauses all callers for the server's
+    Retry-After, so requests run as fast as the tenant allows without fixed sleeps.
+    """
+    
+    def __init__(self, rate=20.0, burst=None, max_concurrency=16, min_concurrency=1, initial_concurrency=4):
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(min(max(initial_concurrency, min_concurrency), max_concurrency))
+        self.in_flight = 0
+        self.throttled = 0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._condition = threading.Condition()
+    
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            rate=config.get('rate_limit', 20.0),
+            max_concurrency=config.get('max_concurrency', 16)
+        )
+    
+    @property
+    def window(self):
+        """Current number of requests allowed in flight"""
+        return max(int(self.concurrency), self.min_concurrency)
+    
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def try_acquire(self):
+        """Take a token and a concurrency slot if available; returns 0 on success or the seconds to wait"""
+        with self._condition:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self.in_flight >= self.window:
+                # Woken early by release(); the timeout only bounds the wait
+                return 0.05
+            self._refill(now)
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+            self.in_flight += 1
+            return 0
+    
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            with self._condition:
+                self._condition.wait(wait)
+    
+    async def acquire_async(self):
+        """asyncio flavour of acquire() that sleeps without blocking the event loop"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+    
+    def release(self, status=200, retry_after=None):
+        """Return the slot and adapt to how the request went"""
+        with self._condition:
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.record(status, retry_after)
+            self._condition.notify_all()
+    
+    def consume_tokens(self, count):
+        """Pace a batch of requests sent outside acquire(), such as an in-page fetch pool"""
+        for _ in range(count):
+            while True:
+                with self._condition:
+                    now = time.monotonic()
+                    wait = self._blocked_until - now
+                    if wait <= 0:
+                        self._refill(now)
+                        if self._tokens >= 1:
+                            self._tokens -= 1
+                            break
+                        wait = (1 - self._tokens) / self.rate
+                    self._condition.wait(wait)
+    
+    def record(self, status, retry_after=None):
+        """Feed a response outcome into the AIMD window without holding a slot"""
+        with self._condition:
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+                self.concurrency = max(self.concurrency / 2, self.min_concurrency)
+                # Without a Retry-After, pause every caller for one token interval, but never less than a second
+                pause = retry_after if retry_after is not None else max(1.0 / self.rate, 1.0)
+                self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+            elif 200 <= status < 400:
+                self.concurrency = min(self.concurrency + 1 / self.concurrency, self.max_concurrency)
+
+def send_with_retries(send, url, limiter=None, max_retries=5, metrics=RUN_METRICS, retry_statuses=THROTTLE_STATUSES):
+    """Run send() -> (status, retry_after, body) under the limiter, retrying throttled responses.
+    
+    Returns the parsed body of the first OK response and raises GatewayError once
+    the status is not in retry_statuses or the retries are used up.
+    """
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.acquire()
+        try:
+            status, retry_after, body = send()
+        except Exception:
+            if limiter:
+                limiter.release(599)
+            raise
+        retry_after = parse_retry_after(retry_after)
+        if limiter:
+            limiter.release(status, retry_after)
+        
+        if 200 <= status < 300:
+            return body
+        if status not in retry_statuses or attempt >= max_retries:
+            raise GatewayError(status, url)
+        
+        attempt += 1
+        metrics.record_retry(url, status)
+        if not limiter:
+            # Nobody else is pacing us, so honour the server's wait here
+            time.sleep(retry_after if retry_after is not None else min(2 ** attempt, 30))
+        print(f"Throttled ({status}) on {url}, retry {attempt}/{max_retries}")
+
+# Name of the binding the in-page paging loops hand their chunks to
+CHUNK_BINDING = '__gatewayChunk'
+
+# Receivers of in-page chunks by stream ID; module-level because the binding is registered once per page
+_chunk_handlers = {}
+_stream_ids = itertools.count(1)
+
+def _dispatch_chunk(source, stream_id, items, state, report):
+    return _chunk_handlers[stream_id](items, state, report)
+
+class PageTransport:
+    """Issues gateway requests through page.evaluate in the logged-in browser page"""
+    
+    def __init__(self, page, limiter=None, max_retries=5, metrics=RUN_METRICS, in_page_paging=False, chunk_pages=20):
+        self.page = page
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.metrics = metrics
+        self.in_page_paging = in_page_paging
+        self.chunk_pages = chunk_pages
+    
+    def _in_flight(self, requested):
+        """Cap an in-page pool at the limiter's current AIMD window"""
+        return min(requested, self.limiter.window) if self.limiter else requested
+    
+    def _take_report(self, report):
+        """Feed the attempts an in-page loop made since its last chunk into the metrics and limiter.
+        
+        Their tokens are taken from the shared bucket here, so a loop that ran
+        ahead of other callers waits at its next chunk. Returns the network time.
+        """
+        network = 0.0
+        for url, status, seconds, size in report['timings']:
+            self.metrics.record_request(url, status, seconds, size)
+            network += seconds
+            if self.limiter and status not in THROTTLE_STATUSES:
+                self.limiter.record(status)
+        if self.limiter:
+            for retry_after in report['throttles']:
+                self.limiter.record(429, retry_after)
+            self.limiter.consume_tokens(len(report['timings']))
+        return network
+    
+    def _run_in_page(self, script, on_chunk, *args):
+        """Run one in-page loop; its chunks are delivered to on_chunk(items, state) while it runs.
+        
+        The loop paces itself to the limiter's token rate, and every chunk reports
+        the attempts and throttles behind it and gets the limiter's current window back.
+        """
+        try:
+            self.page.expose_binding(CHUNK_BINDING, _dispatch_chunk)
+        except Exception as e:
+            if 'already registered' not in str(e):
+                raise
+        
+        network = 0.0
+        
+        def handle_chunk(items, state, report):
+            nonlocal network
+            network += self._take_report(report)
+            on_chunk(items, state)
+            return {'window': self.limiter.window} if self.limiter else None
+        
+        # The loop starts at min(its own pool size, the limiter's window) and follows the window from there
+        rate, burst, window = (self.limiter.rate, self.limiter.burst, self.limiter.window) if self.limiter else (0, 0, 0)
+        stream_id = next(_stream_ids)
+        _chunk_handlers[stream_id] = handle_chunk
+        started = time.perf_counter()
+        try:
+            result = self.page.evaluate(script, [CHUNK_BINDING, stream_id, *args, self.max_retries, rate, burst, window])
+        finally:
+            del _chunk_handlers[stream_id]
+        
+        # Whatever happened after the last chunk is reported with the result
+        network += self._take_report(result)
+        self.metrics.record_evaluate(time.perf_counter() - started, network)
+        
+        if result.get('error'):
+            raise GatewayError(result['error']['status'], result['error']['url'])
+        return result
+    
+    def walk_cursor(self, base_url, cursor, on_chunk, page_size=100):
+        """Follow a links.next cursor chain inside the page; on_chunk(records, next_cursor) per chunk"""
+        return self._run_in_page(WALK_CURSOR_JS, on_chunk, base_url, cursor, page_size, self.chunk_pages)
+    
+    def walk_offsets(self, url_template, items_key, start_index, on_chunk, page_size=100, prefetch=8):
+        """Walk an offset-paged listing inside the page; url_template has a {start} placeholder"""
+        return self._run_in_page(
+            WALK_OFFSET_JS, on_chunk, url_template, items_key, start_index, page_size, prefetch, self.chunk_pages
+        )
+    
+    def bulk_post(self, url, ids, on_chunk, max_in_flight=4, batch_size=50, max_batch_size=1000):
+        """Run every bulk batch inside the page; on_chunk([[batch_ids, data], ...], None) per chunk.
+        
+        Returns [account_id, status] for the IDs that failed even on their own.
+        """
+        result = self._run_in_page(
+            BULK_POST_JS, on_chunk, url, ids, max_in_flight, batch_size, max_batch_size, self.chunk_pages
+        )
+        return result['failed']
+    
+    def request(self, url, method='GET', body=None, retry_statuses=THROTTLE_STATUSES):
+        def send():
+            started = time.perf_counter()
+            response = self.page.evaluate(FETCH_JSON_JS, [url, method, body])
+            self.metrics.record_evaluate(time.perf_counter() - started, response['elapsed'])
+            self.metrics.record_request(url, response['status'], response['elapsed'], response['bytes'])
+            return response['status'], response['retryAfter'], response['body']
+        return send_with_retries(send, url, self.limiter, self.max_retries, self.metrics, retry_statuses)
+    
+    def get_json(self, url):
+        return self.request(url)
+    
+    def post_json(self, url, body):
+        return self.request(url, 'POST', body)
+    
+    def request_many(self, calls, max_in_flight=8, retry_statuses=THROTTLE_STATUSES):
+        """Run (url, method, body) calls concurrently in one evaluate; returns bodies or GatewayErrors in order.
+        
+        The sync page cannot be driven from several threads, so concurrency happens
+        inside the browser. The limiter's AIMD window caps the pool and every
+        outcome is fed back into it. Calls are retried only on retry_statuses.
+        """
+        if not calls:
+            return []
+        
+        in_flight = self._in_flight(max_in_flight)
+        if self.limiter:
+            self.limiter.consume_tokens(len(calls))
+        
+        started = time.perf_counter()
+        response = self.page.evaluate(FETCH_MANY_JS, [
+            [[url, method, body] for url, method, body in calls], in_flight, self.max_retries, list(retry_statuses)
+        ])
+        self.metrics.record_evaluate(time.perf_counter() - started, response['elapsed'])
+        
+        results = []
+        for (url, _, _), result in zip(calls, response['results']):
+            # Only the final attempt is timed in the page; earlier attempts count as retries
+            self.metrics.record_request(url, result['status'], result['elapsed'], result['bytes'])
+            for _ in range(result['retries']):
+                self.metrics.record_retry(url, 429)
+            if self.limiter:
+                self.limiter.record(result['status'])
+            if 200 <= result['status'] < 300:
+                results.append(result['body'])
+            else:
+                results.append(GatewayError(result['status'], url))
+        
+        if self.limiter:
+            for retry_after in response['throttles']:
+                self.limiter.record(429, retry_after)
+        return results
+    
+    def close(self):
+        pass
+
+class SessionTransport:
+    """Issues gateway requests straight from Python over a pooled, keep-alive requests.Session.
+    
+    The session cookies are copied from the logged-in browser, so after login
+    no request has to round-trip through Chromium.
+    """
+    
+    def __init__(self, cookies, pool_size=20, timeout=30, limiter=None, max_retries=5, metrics=RUN_METRICS):
+        self.timeout = timeout
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.metrics = metrics
+        self._executor = None
+        self._executor_size = 0
+        self._executor_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Origin': admin_url(),
+            'Referer': f"{admin_url()}/"
+        })
+        
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain', ''),
+                path=cookie.get('path', '/')
+            )
+    
+    @classmethod
+    def from_context(cls, context, **kwargs):
+        """Build a transport from the cookies of a logged-in BrowserContext"""
+        return cls(context.cookies(), **kwargs)
+    
+    @classmethod
+    def from_storage_state(cls, storage_state, **kwargs):
+        """Build a transport from a saved Playwright storage state"""
+        return cls(storage_state.get('cookies', []), **kwargs)
+    
+    def request(self, url, method='GET', body=None, retry_statuses=THROTTLE_STATUSES):
+        def send():
+            started = time.perf_counter()
+            response = self.session.request(method, url, json=body, timeout=self.timeout)
+            self.metrics.record_request(url, response.status_code, time.perf_counter() - started, len(response.content))
+            return response.status_code, response.headers.get('Retry-After'), response.json() if response.ok else None
+        return send_with_retries(send, url, self.limiter, self.max_retries, self.metrics, retry_statuses)
+    
+    def get_json(self, url):
+        return self.request(url)
+    
+    def post_json(self, url, body):
+        return self.request(url, 'POST', body)
+    
+    def request_many(self, calls, max_in_flight=8, retry_statuses=THROTTLE_STATUSES):
+        """Run (url, method, body) calls on a thread pool; returns bodies or exceptions in order"""
+        if not calls:
+            return []
+        
+        # The pool is shared and may be larger than this call asked for, so cap this call's own concurrency
+        in_flight = threading.BoundedSemaphore(max(max_in_flight, 1))
+        
+        def send(call):
+            with in_flight:
+                try:
+                    return self.request(*call, retry_statuses=retry_statuses)
+                except Exception as e:
+                    return e
+        
+        with self._executor_lock:
+            if self._executor is None or self._executor_size < max_in_flight:
+                if self._executor:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+                self._executor_size = max_in_flight
+            executor = self._executor
+        return list(executor.map(send, calls))
+    
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        self.session.close()
+
+def create_transport(config, context, page):
+    """Pick the transport named by config['transport']: 'browser' (default) or 'http'.
+    
+    With config['cache_mode'] set to 'read-through' or 'offline' the transport is
+    wrapped in a CachingTransport; offline mode needs no context or page at all.
+    """
+    cache_mode = config.get('cache_mode', 'off')
+    if cache_mode != 'off':
+        # Imported lazily because response_cache itself builds on this module
+        from response_cache import CachingTransport, ResponseCache
+        cache = ResponseCache.from_config(config)
+        print(f"Using response cache in {cache_mode} mode ({cache.directory})")
+        if config.get('in_page_paging', False):
+            # The in-page loops would walk whole listings past the cache, so pages go one request at a time
+            print("Warning: in_page_paging has no effect with the response cache; listings are paged from Python")
+        if cache_mode == 'offline':
+            return CachingTransport(None, cache, 'offline')
+        return CachingTransport(create_transport(dict(config, cache_mode='off'), context, page), cache, cache_mode)
+    
+    limiter = RateLimiter.from_config(config)
+    max_retries = config.get('max_retries', 5)
+    
+    if config.get('transport', 'browser') == 'http':
+        print("Using pooled HTTP transport for gateway requests")
+        return SessionTransport.from_context(
+            context, pool_size=config.get('http_pool_size', 20), limiter=limiter, max_retries=max_retries
+        )
+    # Walking whole listings inside the page buffers them, which would defeat streaming's bounded memory
+    in_page_paging = config.get('in_page_paging', False) and not config.get('streaming', False)
+    return PageTransport(
+        page, limiter=limiter, max_retries=max_retries,
+        in_page_paging=in_page_paging, chunk_pages=config.get('in_page_chunk_pages', 20)
+    )
@@ -0,0 +1,168 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import time
+from records import fingerprint
+
+SNAPSHOT_FILE = 'snapshot.json'
+DELTA_FILE = 'delta.json'
+
+def load_snapshot(path=SNAPSHOT_FILE, account_id=None):
+    """Load the previous run's snapshot, or None if missing, unreadable or for another org"""
+    if not os.path.exists(path):
+        return None
+    
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except Exception as e:
+        print(f"Could not load snapshot, running a full sync: {e}")
+        return None
+    
+    if account_id and snapshot.get('account_id') != account_id:
+        print("Snapshot belongs to a different organization, running a full sync")
+        return None
+    return snapshot
+
+def save_snapshot(snapshot, path=SNAPSHOT_FILE):
+    """Write the snapshot atomically so an interrupted run never corrupts it"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    print(f"Saved snapshot to {path}")
+
+def rolling_slice(ids, offset, size):
+    """Take `size` IDs from a stable ordering starting at `offset`, wrapping around; returns (slice, next offset)"""
+    ids = sorted(ids)
+    if not ids or size <= 0:
+        return [], 0
+    
+    size = min(size, len(ids))
+    offset = offset % len(ids)
+    picked = ids[offset:offset + size]
+    picked += ids[:size - len(picked)]
+    return picked, (offset + size) % len(ids)
+
+def plan_refresh(previous, listing_fingerprints, rolling_offset, rolling_size):
+    """Decide which entities need a re-fetch.
+    
+    `previous` maps ID -> snapshot entry and `listing_fingerprints` maps ID -> the
+    fingerprint of this run's listing data. Entities that are new or whose listing
+    changed are always refreshed, plus a rolling slice of the unchanged ones so
+    drift the listing does not reveal is eventually picked up.
+    """
+    changed = [
+        entity_id for entity_id, listing_fp in listing_fingerprints.items()
+        if entity_id not in previous or previous[entity_id].get('listing') != listing_fp
+    ]
+    changed_set = set(changed)
+    unchanged = [entity_id for entity_id in listing_fingerprints if entity_id not in changed_set]
+    
+    slice_ids, next_offset = rolling_slice(unchanged, rolling_offset, rolling_size)
+    return changed + slice_ids, next_offset, len(changed)
+
+def build_snapshot(account_id, users_data, groups_data, parsed_users, parsed_groups, user_offset, group_offset):
+    """Build the snapshot the next incremental run will diff against"""
+    # Listing fingerprints were taken from the raw entries when the records were projected
+    listings = {user.id: user.listing for user in users_data if user.id}
+    group_listings = {group.id: group.listing for group in groups_data if group.id}
+    
+    return {
+        'account_id': account_id,
+        'taken_at': int(time.time()),
+        'user_offset': user_offset,
+        'group_offset': group_offset,
+        'users': {
+            user['id']: {
+                'listing': listings.get(user['id'], fingerprint({})),
+                'record': fingerprint(user),
+                'last_active': user['last_active']
+            }
+            for user in parsed_users if user['id']
+        },
+        'groups': {
+            group['id']: {
+                'listing': group_listings.get(group['id'], fingerprint({})),
+                'record': fingerprint(group),
+                'members': group['members']
+            }
+            for group in parsed_groups if group['id']
+        }
+    }
+
+def diff_records(previous, records):
+    """Split parsed records into added/changed lists and the removed IDs, using record fingerprints"""
+    current_ids = set()
+    added = []
+    changed = []
+    
+    for record in records:
+        record_id = record['id']
+        current_ids.add(record_id)
+        if record_id not in previous:
+            added.append(record)
+        elif previous[record_id].get('record') != fingerprint(record):
+            changed.append(record)
+    
+    removed = [record_id for record_id in previous if record_id not in current_ids]
+    return added, changed, removed
+
+def diff_memberships(previous_groups, parsed_groups):
+    """List membership edges added and removed since the previous snapshot"""
+    added = []
+    removed = []
+    current_ids = set()
+    
+    for group in parsed_groups:
+        current_ids.add(group['id'])
+        before = set(previous_groups.get(group['id'], {}).get('members', []))
+        after = set(group['members'])
+        added.extend({'groupId': group['id'], 'userId': user_id} for user_id in group['members'] if user_id not in before)
+        removed.extend({'groupId': group['id'], 'userId': user_id} for user_id in sorted(before - after))
+    
+    # Every edge of a deleted group is gone too
+    for group_id, entry in previous_groups.items():
+        if group_id not in current_ids:
+            removed.extend({'groupId': group_id, 'userId': user_id} for user_id in entry.get('members', []))
+    
+    return added, removed
+
+def build_delta(snapshot, parsed_users, parsed_groups):
+    """Compact change set between the previous snapshot and this run's output"""
+    previous_users = snapshot.get('users', {}) if snapshot else {}
+    previous_groups = snapshot.get('groups', {}) if snapshot else {}
+    
+    users_added, users_changed, users_removed = diff_records(previous_users, parsed_users)
+    groups_added, groups_changed, groups_removed = diff_records(previous_groups, parsed_groups)
+    memberships_added, memberships_removed = diff_memberships(previous_groups, parsed_groups)
+    
+    return {
+        'since': snapshot.get('taken_at') if snapshot else None,
+        'generated_at': int(time.time()),
+        'full': snapshot is None,
+        'users': {'added': users_added, 'changed': users_changed, 'removed': users_removed},
+        'groups': {'added': groups_added, 'changed': groups_changed, 'removed': groups_removed},
+        'memberships': {'added': memberships_added, 'removed': memberships_removed}
+    }
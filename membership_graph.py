@@ -0,0 +1,103 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+from records import Membership
+
+class MembershipGraph:
+    """Bidirectional group <-> user membership index.
+    
+    Both directions are hash maps keyed by interned ID strings, and each side
+    keeps insertion order (dicts used as ordered sets), so lookups are O(1) and
+    output order matches the order memberships were added.
+    """
+    
+    def __init__(self):
+        self._members = {}
+        self._groups = {}
+    
+    @classmethod
+    def from_memberships(cls, memberships_data):
+        """Build a graph from Membership records"""
+        graph = cls()
+        for membership in memberships_data:
+            group_id = membership.group_id
+            # Like the original lookup, the first entry for a group wins
+            if group_id in graph._members:
+                continue
+            graph.add_group(group_id)
+            for user_id in membership.member_ids:
+                graph.add_membership(group_id, user_id)
+        return graph
+    
+    def add_group(self, group_id):
+        group_id = sys.intern(group_id)
+        self._members.setdefault(group_id, {})
+        return group_id
+    
+    def add_membership(self, group_id, user_id):
+        group_id = self.add_group(group_id)
+        user_id = sys.intern(user_id)
+        self._members[group_id][user_id] = None
+        self._groups.setdefault(user_id, {})[group_id] = None
+    
+    def replace_members(self, group_id, user_ids):
+        """Swap a group's member list for a freshly fetched one"""
+        group_id = self.add_group(group_id)
+        for user_id in self._members[group_id]:
+            groups = self._groups[user_id]
+            del groups[group_id]
+            if not groups:
+                del self._groups[user_id]
+        self._members[group_id] = {}
+        for user_id in user_ids:
+            self.add_membership(group_id, user_id)
+    
+    def members_of(self, group_id):
+        """Member IDs of a group, in insertion order"""
+        return list(self._members.get(group_id, ()))
+    
+    def groups_of(self, user_id):
+        """Group IDs a user belongs to, in insertion order"""
+        return list(self._groups.get(user_id, ()))
+    
+    def group_size(self, group_id):
+        return len(self._members.get(group_id, ()))
+    
+    def group_sizes(self):
+        return {group_id: len(members) for group_id, members in self._members.items()}
+    
+    def is_member(self, group_id, user_id):
+        return user_id in self._members.get(group_id, ())
+    
+    def group_ids(self):
+        return list(self._members)
+    
+    def user_ids(self):
+        return list(self._groups)
+    
+    def membership_count(self):
+        return sum(len(members) for members in self._members.values())
+    
+    def to_memberships(self):
+        """Convert back to the Membership records the extractors produce"""
+        return [Membership(group_id, members) for group_id, members in self._members.items()]
@@ -0,0 +1,306 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Path segments that are entity IDs (account, org, group IDs) rather than part of the route
+ID_SEGMENT_RE = re.compile(r'^(?=.*\d)[0-9A-Za-z:_\-]{8,}$')
+
+METRIC_PREFIX = 'atlassian_sync'
+
+def endpoint_name(url):
+    """Collapse a gateway URL to its route, e.g. /adminhub/um/org/{id}/groups/{id}/members"""
+    path = urlparse(url).path
+    if path.startswith('/gateway/api'):
+        path = path[len('/gateway/api'):]
+    return '/'.join('{id}' if ID_SEGMENT_RE.match(segment) else segment for segment in path.split('/'))
+
+class Histogram:
+    """Cumulative bucket counts plus sum, enough for Prometheus export and rough quantiles"""
+    
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+    
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside the bucket it falls in"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.counts):
+            upper = self.bounds[index] if index < len(self.bounds) else self.bounds[-1]
+            if bucket_count and seen + bucket_count >= rank:
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = upper
+        return self.bounds[-1]
+
+class Phase:
+    """Handed out by Metrics.phase(); call add_items() with the number of records the phase produced"""
+    
+    def __init__(self):
+        self.items = 0
+    
+    def add_items(self, count):
+        self.items += count
+
+class Metrics:
+    """Thread-safe collector for request latencies, bytes, retries, throttles and phase timings.
+    
+    Transports record every attempt; scripts wrap each extraction phase in
+    phase(). At the end of a run write_outputs() produces a JSON report and a
+    Prometheus textfile.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.endpoints = {}
+            self.phases = {}
+            self.evaluate = {'calls': 0, 'wall_s': 0.0, 'network_s': 0.0}
+            self.profile_dir = None
+    
+    def _endpoint(self, url):
+        name = endpoint_name(url)
+        if name not in self.endpoints:
+            self.endpoints[name] = {
+                'latency': Histogram(), 'statuses': Counter(), 'bytes': 0, 'retries': 0, 'throttles': 0
+            }
+        return self.endpoints[name]
+    
+    def record_request(self, url, status, latency_s, size=0):
+        with self.lock:
+            endpoint = self._endpoint(url)
+            endpoint['latency'].observe(latency_s)
+            endpoint['statuses'][status] += 1
+            endpoint['bytes'] += size or 0
+    
+    def record_retry(self, url, status):
+        with self.lock:
+            endpoint = self._endpoint(url)
+            endpoint['retries'] += 1
+            if status in (429, 503):
+                endpoint['throttles'] += 1
+    
+    def record_evaluate(self, wall_s, network_s):
+        """One page.evaluate round trip: total wall time and the part the page spent on the network"""
+        with self.lock:
+            self.evaluate['calls'] += 1
+            self.evaluate['wall_s'] += wall_s
+            self.evaluate['network_s'] += min(network_s, wall_s)
+    
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time a block as (part of) a phase; repeated or overlapping blocks accumulate"""
+        phase = Phase()
+        started = time.perf_counter()
+        try:
+            yield phase
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                totals = self.phases.setdefault(name, {'wall_s': 0.0, 'items': 0, 'runs': 0})
+                totals['wall_s'] += elapsed
+                totals['items'] += phase.items
+                totals['runs'] += 1
+    
+    def timed(self, name, count_items=len):
+        """Decorator form of phase(): times each call and counts items in its return value"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.phase(name) as phase:
+                    result = func(*args, **kwargs)
+                    phase.add_items(count_items(result))
+                return result
+            return wrapper
+        return decorator
+    
+    def enable_profiling(self, directory='.'):
+        self.profile_dir = directory
+    
+    @contextlib.contextmanager
+    def profiled(self, name):
+        """Run the block under cProfile when profiling is enabled, saving <name>.prof and printing the top entries"""
+        if not self.profile_dir:
+            yield
+            return
+        
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f"{name}.prof")
+            profiler.dump_stats(path)
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+            print(summary.getvalue())
+            print(f"Saved {name} profile to {path}")
+    
+    def report(self):
+        with self.lock:
+            endpoints = {}
+            for name, endpoint in sorted(self.endpoints.items()):
+                latency = endpoint['latency']
+                endpoints[name] = {
+                    'requests': latency.count,
+                    'statuses': {str(status): count for status, count in sorted(endpoint['statuses'].items())},
+                    'bytes': endpoint['bytes'],
+                    'retries': endpoint['retries'],
+                    'throttles': endpoint['throttles'],
+                    'latency_s': {
+                        'mean': round(latency.sum / latency.count, 4) if latency.count else None,
+                        'p50': round(latency.quantile(0.5), 4) if latency.count else None,
+                        'p95': round(latency.quantile(0.95), 4) if latency.count else None,
+                        'p99': round(latency.quantile(0.99), 4) if latency.count else None
+                    }
+                }
+            
+            phases = {
+                name: dict(totals, wall_s=round(totals['wall_s'], 3),
+                           items_per_s=round(totals['items'] / totals['wall_s'], 1) if totals['wall_s'] else None)
+                for name, totals in self.phases.items()
+            }
+            evaluate = dict(self.evaluate)
+        
+        evaluate['ipc_s'] = round(evaluate['wall_s'] - evaluate['network_s'], 3)
+        evaluate['wall_s'] = round(evaluate['wall_s'], 3)
+        evaluate['network_s'] = round(evaluate['network_s'], 3)
+        return {
+            'started_at': int(self.started),
+            'duration_s': round(time.time() - self.started, 3),
+            'phases': phases,
+            'endpoints': endpoints,
+            'page_evaluate': evaluate
+        }
+    
+    def prometheus_text(self, script):
+        """Render the collected metrics in the Prometheus textfile exposition format"""
+        lines = []
+        
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+        
+        with self.lock:
+            metric('request_duration_seconds', 'histogram', "Gateway request latency per endpoint")
+            for name, endpoint in sorted(self.endpoints.items()):
+                labels = f'script="{script}",endpoint="{name}"'
+                latency = endpoint['latency']
+                cumulative = 0
+                for bound, count in zip(list(latency.bounds) + ['+Inf'], latency.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_PREFIX}_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{METRIC_PREFIX}_request_duration_seconds_sum{{{labels}}} {latency.sum:.6f}")
+                lines.append(f"{METRIC_PREFIX}_request_duration_seconds_count{{{labels}}} {latency.count}")
+            
+            for key, help_text in (('bytes', "Response bytes received"), ('retries', "Retried requests"),
+                                   ('throttles', "Requests answered with 429/503")):
+                metric(f"request_{key}_total", 'counter', help_text)
+                for name, endpoint in sorted(self.endpoints.items()):
+                    lines.append(f'{METRIC_PREFIX}_request_{key}_total{{script="{script}",endpoint="{name}"}} {endpoint[key]}')
+            
+            metric('phase_duration_seconds', 'gauge', "Wall time spent in each extraction phase")
+            for name, totals in sorted(self.phases.items()):
+                lines.append(f'{METRIC_PREFIX}_phase_duration_seconds{{script="{script}",phase="{name}"}} {totals["wall_s"]:.3f}')
+            metric('phase_items', 'gauge', "Records produced by each phase")
+            for name, totals in sorted(self.phases.items()):
+                lines.append(f'{METRIC_PREFIX}_phase_items{{script="{script}",phase="{name}"}} {totals["items"]}')
+            
+            metric('evaluate_seconds_total', 'counter', "Time in page.evaluate, split into network and IPC")
+            ipc = self.evaluate['wall_s'] - self.evaluate['network_s']
+            lines.append(f'{METRIC_PREFIX}_evaluate_seconds_total{{script="{script}",part="network"}} {self.evaluate["network_s"]:.6f}')
+            lines.append(f'{METRIC_PREFIX}_evaluate_seconds_total{{script="{script}",part="ipc"}} {ipc:.6f}')
+        
+        return "\n".join(lines) + "\n"
+    
+    def print_summary(self):
+        report = self.report()
+        print("=" * 50)
+        print("RUN METRICS")
+        print("=" * 50)
+        for name, phase in report['phases'].items():
+            print(f"{name:<16} {phase['wall_s']:>9.3f}s {phase['items']:>9} items {phase['items_per_s'] or 0:>10.1f}/s")
+        for name, endpoint in report['endpoints'].items():
+            print(f"{endpoint['requests']:>7} req  p50 {endpoint['latency_s']['p50']}s  p95 {endpoint['latency_s']['p95']}s  "
+                  f"{endpoint['throttles']} throttled  {name}")
+        if report['page_evaluate']['calls']:
+            print(f"page.evaluate: {report['page_evaluate']['network_s']}s network, {report['page_evaluate']['ipc_s']}s IPC "
+                  f"over {report['page_evaluate']['calls']} calls")
+    
+    def write_outputs(self, config, script):
+        """Write <script>_metrics.json and <script>_metrics.prom into config['metrics_dir']"""
+        if not config.get('metrics', True):
+            return
+        
+        directory = config.get('metrics_dir', '.')
+        os.makedirs(directory, exist_ok=True)
+        self.print_summary()
+        
+        report_path = os.path.join(directory, f"{script}_metrics.json")
+        with open(report_path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        
+        # Written via a temp file so a node_exporter scrape never reads a partial file
+        textfile_path = os.path.join(directory, f"{script}_metrics.prom")
+        with open(f"{textfile_path}.tmp", 'w') as f:
+            f.write(self.prometheus_text(script))
+        os.replace(f"{textfile_path}.tmp", textfile_path)
+        print(f"Saved run metrics to {report_path} and {textfile_path}")
+
+# Process-wide collector shared by the transports and both scripts
+RUN_METRICS = Metrics()
@@ -0,0 +1,357 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import argparse
+import base64
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MOCK_ORG_ID = 'mock-org'
+
+LANDING_HTML = """<html><body><h1>Atlassian Administration</h1><a href="/login">Log in</a></body></html>"""
+
+# Two-step form like id.atlassian.com: email, Continue, then password and Log in
+LOGIN_HTML = """<html><body>
+<input type="email" id="email">
+<button id="continue" onclick="document.getElementById('step2').style.display='block'">Continue</button>
+<div id="step2" style="display:none">
+  <input type="password" id="password">
+  <button onclick="document.cookie='mock.session=1; path=/'; location.href='/o/%(org)s/overview'">Log in</button>
+</div>
+</body></html>"""
+
+PORTAL_HTML = """<html><body><h1>%(title)s</h1>%(content)s</body></html>"""
+
+class MockOrg:
+    """Deterministic stand-in org: users, groups and memberships are derived from indexes, not stored"""
+    
+    def __init__(self, num_users=1000, num_groups=100, members_per_group=20, directories=2,
+                 org_id=MOCK_ORG_ID, max_bulk_size=500):
+        self.num_users = num_users
+        self.num_groups = num_groups
+        self.members_per_group = min(members_per_group, num_users)
+        self.directories = max(directories, 1)
+        self.org_id = org_id
+        self.max_bulk_size = max_bulk_size
+        self.created_groups = []
+        self.lock = threading.Lock()
+    
+    def user_id(self, index):
+        return f"mock{index:020d}"
+    
+    def user(self, index):
+        return {
+            'accountId': self.user_id(index),
+            'displayName': f"Mock User {index}",
+            'email': f"user{index}@mock.example",
+            'status': 'active' if index % 10 else 'inactive'
+        }
+    
+    def directory_users(self, directory):
+        """Indexes of the users in one directory ('-' means the whole org)"""
+        if directory == '-':
+            return range(self.num_users)
+        return range(int(directory[1:]), self.num_users, self.directories)
+    
+    def group(self, index):
+        return {'id': f"group-{index:08d}", 'name': f"mock-group-{index}", 'description': f"Mock group {index}"}
+    
+    def all_groups(self):
+        return [self.group(index) for index in range(self.num_groups)] + self.created_groups
+    
+    def group_members(self, group_id):
+        match = re.fullmatch(r'group-(\d+)', group_id)
+        if not match or int(match.group(1)) >= self.num_groups:
+            return None
+        start = (int(match.group(1)) * self.members_per_group) % max(self.num_users, 1)
+        return [self.user_id((start + offset) % self.num_users) for offset in range(self.members_per_group)]
+    
+    def last_active(self, account_id):
+        return f"2025-01-{int(account_id[4:]) % 28 + 1:02d}T00:00:00Z"
+
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+def decode_cursor(cursor):
+    return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+
+class MockGateway(ThreadingHTTPServer):
+    """Threaded HTTP server answering the admin gateway endpoints the extraction uses.
+    
+    Every gateway call sleeps for `latency_ms` +/- `jitter_ms` and is answered
+    with a 429 at `throttle_rate`, so transports, limiters and batch sizing can
+    be measured against realistic server behaviour without a live org.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self, address, org, latency_ms=0, jitter_ms=0, throttle_rate=0.0, retry_after=1, quiet=True, extra_orgs=()):
+        super().__init__(address, MockGatewayHandler)
+        # The admin logs in to `org`; extra orgs are only reachable by ID, like other orgs the admin manages
+        self.org = org
+        self.orgs = {each.org_id: each for each in [org, *extra_orgs]}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.quiet = quiet
+        self.stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'throttled': 0, 'bytes_sent': 0}
+    
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+    
+    def snapshot_stats(self):
+        with self.stats_lock:
+            return dict(self.stats)
+    
+    def start_in_background(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+class MockGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this Nagle's algorithm adds ~40ms per response
+    disable_nagle_algorithm = True
+    
+    ROUTES = [
+        ('GET', r'/gateway/api/me', 'me'),
+        ('GET', r'/gateway/api/admin/v1/orgs', 'orgs'),
+        ('GET', r'/gateway/api/admin/v2/orgs/(?P<org>[^/]+)/directories', 'directories'),
+        ('GET', r'/gateway/api/admin/v2/orgs/(?P<org>[^/]+)/directories/(?P<directory>[^/]+)/users', 'users'),
+        ('GET', r'/gateway/api/adminhub/um/org/(?P<org>[^/]+)/groups', 'groups'),
+        ('POST', r'/gateway/api/adminhub/um/org/(?P<org>[^/]+)/groups', 'create_group'),
+        ('GET', r'/gateway/api/adminhub/um/org/(?P<org>[^/]+)/groups/(?P<group>[^/]+)/members', 'members'),
+        ('POST', r'/gateway/api/admin/v1/orgs/(?P<org>[^/]+)/users/last-active-date-bulk', 'last_active'),
+        ('GET', r'/', 'landing'),
+        ('GET', r'/login', 'login'),
+        ('GET', r'/o/(?P<org>[^/]+)/groups/(?P<group>[^/]+)', 'group_page'),
+        ('GET', r'/o/(?P<org>[^/]+)/(?P<section>[^/]+)', 'portal_page'),
+    ]
+    
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+    
+    def do_GET(self):
+        self.dispatch('GET')
+    
+    def do_POST(self):
+        self.dispatch('POST')
+    
+    def dispatch(self, method):
+        parsed = urlparse(self.path)
+        self.query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        # Always consume the body, even when answering 429/404, or it corrupts the next keep-alive request
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+        
+        for route_method, pattern, name in self.ROUTES:
+            match = re.fullmatch(pattern, parsed.path)
+            if route_method != method or not match:
+                continue
+            params = match.groupdict()
+            self.org = self.server.orgs.get(params.get('org', self.server.org.org_id))
+            if self.org is None:
+                break
+            
+            if parsed.path.startswith('/gateway/'):
+                self.server.count('requests')
+                self.simulate_network()
+                if random.random() < self.server.throttle_rate:
+                    self.server.count('throttled')
+                    self.send_json({'message': 'Too many requests'}, 429, {'Retry-After': str(self.server.retry_after)})
+                    return
+            getattr(self, f"handle_{name}")(**{key: value for key, value in params.items() if key != 'org'})
+            return
+        
+        self.send_json({'message': 'Not found'}, 404)
+    
+    def simulate_network(self):
+        delay = self.server.latency_ms + random.uniform(-self.server.jitter_ms, self.server.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+    
+    def read_json(self):
+        return json.loads(self.body or b'null')
+    
+    def send_body(self, body, status, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count('bytes_sent', len(body))
+    
+    def send_json(self, data, status=200, headers=None):
+        self.send_body(json.dumps(data).encode('utf-8'), status, 'application/json', headers)
+    
+    def send_html(self, html, status=200):
+        self.send_body(html.encode('utf-8'), status, 'text/html; charset=utf-8')
+    
+    def paging(self):
+        return int(self.query.get('count', 100)), int(self.query.get('start-index', 1))
+    
+    def handle_me(self):
+        self.send_json({'account_id': 'mock-admin', 'email': 'admin@mock.example'})
+    
+    def handle_orgs(self):
+        self.send_json({'data': [
+            {'id': org_id, 'type': 'orgs', 'attributes': {'name': org_id}} for org_id in self.server.orgs
+        ], 'links': {}})
+    
+    def handle_directories(self):
+        self.send_json({'data': [{'directoryId': f"d{index}"} for index in range(self.org.directories)]})
+    
+    def handle_users(self, directory):
+        org = self.org
+        if directory != '-' and not re.fullmatch(r'd\d+', directory):
+            self.send_json({'message': 'Unknown directory'}, 404)
+            return
+        
+        indexes = org.directory_users(directory)
+        if self.query.get('accountIds'):
+            match = re.fullmatch(r'mock(\d+)', self.query['accountIds'])
+            indexes = [int(match.group(1))] if match and int(match.group(1)) in indexes else []
+        count = int(self.query.get('count', 100))
+        offset = decode_cursor(self.query['cursor']) if self.query.get('cursor') else 0
+        page = indexes[offset:offset + count]
+        
+        response = {'data': [org.user(index) for index in page], 'links': {}, 'meta': {'total': len(indexes)}}
+        if offset + count < len(indexes):
+            response['links']['next'] = encode_cursor(offset + count)
+        self.send_json(response)
+    
+    def handle_groups(self):
+        count, start_index = self.paging()
+        groups = self.org.all_groups()
+        self.send_json({'groups': groups[start_index - 1:start_index - 1 + count], 'total': len(groups)})
+    
+    def handle_create_group(self):
+        org = self.org
+        body = self.read_json() or {}
+        with org.lock:
+            group = {
+                'id': f"created-{len(org.created_groups):08d}",
+                'name': body.get('name', ''),
+                'description': body.get('description', '')
+            }
+            org.created_groups.append(group)
+        self.send_json(group, 201)
+    
+    def handle_members(self, group):
+        members = self.org.group_members(group)
+        if members is None:
+            self.send_json({'message': 'Unknown group'}, 404)
+            return
+        count, start_index = self.paging()
+        page = members[start_index - 1:start_index - 1 + count]
+        self.send_json({'users': [{'accountId': account_id} for account_id in page], 'total': len(members)})
+    
+    def handle_last_active(self):
+        org = self.org
+        body = self.read_json() or []
+        if len(body) > org.max_bulk_size:
+            self.send_json({'message': 'Payload too large'}, 413)
+            return
+        self.send_json({'data': [
+            {'accountId': item['accountId'], 'lastActiveTimestamp': org.last_active(item['accountId'])}
+            for item in body if item.get('accountId', '').startswith('mock')
+        ]})
+    
+    def handle_landing(self):
+        self.send_html(LANDING_HTML)
+    
+    def handle_login(self):
+        self.send_html(LOGIN_HTML % {'org': self.server.org.org_id})
+    
+    def handle_group_page(self, group):
+        members = self.org.group_members(group) or []
+        rows = ''.join(f'<div data-account-id="{account_id}">{account_id}</div>' for account_id in members)
+        self.send_html(PORTAL_HTML % {'title': group, 'content': rows})
+    
+    def handle_portal_page(self, section):
+        self.send_html(PORTAL_HTML % {'title': section.capitalize(), 'content': ''})
+
+def start_mock_gateway(org, host='127.0.0.1', port=0, **options):
+    """Start a mock gateway on a background thread; port 0 picks a free port"""
+    server = MockGateway((host, port), org, **options)
+    server.start_in_background()
+    return server
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Atlassian admin gateway")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--users', type=int, default=1000, help="number of users in the org")
+    parser.add_argument('--groups', type=int, default=100, help="number of groups in the org")
+    parser.add_argument('--members-per-group', type=int, default=20)
+    parser.add_argument('--orgs', type=int, default=1, help="number of orgs the admin can access, all the same size")
+    parser.add_argument('--directories', type=int, default=2)
+    parser.add_argument('--max-bulk-size', type=int, default=500,
+                        help="largest last-active batch accepted before answering 413")
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="fraction of gateway calls answered with 429")
+    parser.add_argument('--retry-after', type=float, default=1, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    org = MockOrg(args.users, args.groups, args.members_per_group, args.directories, max_bulk_size=args.max_bulk_size)
+    extra_orgs = [
+        MockOrg(args.users, args.groups, args.members_per_group, args.directories,
+                org_id=f"{MOCK_ORG_ID}-{index}", max_bulk_size=args.max_bulk_size)
+        for index in range(2, args.orgs + 1)
+    ]
+    server = MockGateway(
+        (args.host, args.port), org, args.latency_ms, args.jitter_ms,
+        args.throttle_rate, args.retry_after, quiet=not args.verbose, extra_orgs=extra_orgs
+    )
+    print(f"Mock gateway for {len(server.orgs)} org(s) starting at {org.org_id} "
+          f"({org.num_users} users, {org.num_groups} groups each) on {server.url}")
+    print(f"Set \"admin_url\": \"{server.url}\" in config.json to point the scripts at it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import asyncio
+import os
+import time
+from playwright.async_api import async_playwright
+from extract_data import load_config, save_json, save_results
+from extract_async import fetch_json, fetch_org_data, login_and_capture_state, open_client, warn_ignored_settings
+from gateway import SessionTransport, admin_url, configure_admin_url
+from browser_profile import apply_browser_profile_async
+from metrics import RUN_METRICS
+
+ORG_OUTPUT_DIR = 'orgs'
+SUMMARY_FILE = 'summary.json'
+
+async def discover_org_ids(client):
+    """List the IDs of every org the logged-in admin can manage"""
+    base_url = f"{admin_url()}/gateway/api/admin/v1/orgs"
+    org_ids = []
+    cursor = None
+    
+    while True:
+        response = await fetch_json(client, f"{base_url}?cursor={cursor}" if cursor else base_url)
+        org_ids.extend(org['id'] for org in response.get('data', []) if org.get('id'))
+        cursor = response.get('links', {}).get('next')
+        if not cursor:
+            break
+    
+    return list(dict.fromkeys(org_ids))
+
+async def resolve_org_ids(browser, storage_state, login_org_id, config):
+    """Turn config org_ids (a list, one ID, or "all") into the list of orgs to extract"""
+    org_ids = config.get('org_ids')
+    if org_ids != 'all':
+        return list(dict.fromkeys([org_ids] if isinstance(org_ids, str) else org_ids))
+    
+    context = await browser.new_context(storage_state=storage_state)
+    client = None
+    try:
+        await apply_browser_profile_async(context, config)
+        client = await open_client(context, storage_state, login_org_id, config)
+        discovered = await discover_org_ids(client)
+    except Exception as e:
+        print(f"Error discovering orgs: {e}")
+        discovered = []
+    finally:
+        if isinstance(client, SessionTransport):
+            client.close()
+        await context.close()
+    
+    if not discovered:
+        print(f"No orgs discovered, extracting only the login org {login_org_id}")
+        return [login_org_id]
+    print(f"Discovered {len(discovered)} orgs: {', '.join(discovered)}")
+    return discovered
+
+def org_output_dir(config, org_id):
+    return os.path.join(config.get('org_output_dir', ORG_OUTPUT_DIR), org_id)
+
+async def extract_org(browser, storage_state, org_id, config, semaphore):
+    """Extract one org in its own browser context and write its users.json/groups.json; returns (summary, user IDs)"""
+    output_dir = org_output_dir(config, org_id)
+    summary = {'org_id': org_id, 'output_dir': output_dir}
+    user_ids = set()
+    
+    async with semaphore:
+        started = time.monotonic()
+        print(f"Extracting org {org_id}...")
+        context = await browser.new_context(storage_state=storage_state)
+        client = None
+        try:
+            await apply_browser_profile_async(context, config)
+            client = await open_client(context, storage_state, org_id, config)
+            users_data, groups_data, memberships_data, last_active_data = await fetch_org_data(client, context, org_id, config)
+            
+            sqlite_path = os.path.join(output_dir, os.path.basename(config['sqlite_path'])) if config.get('sqlite_path') else None
+            # Parsing and writing run off the event loop so the other orgs keep fetching meanwhile
+            parsed_users, parsed_groups = await asyncio.to_thread(
+                save_results, users_data, groups_data, memberships_data, last_active_data, sqlite_path, output_dir
+            )
+            user_ids = {user['id'] for user in parsed_users if user['id']}
+            summary.update({
+                'status': 'ok',
+                'users': len(parsed_users),
+                'groups': len(parsed_groups),
+                'memberships': sum(len(group['members']) for group in parsed_groups)
+            })
+        except Exception as e:
+            # One failing org must not take the others down with it
+            print(f"Extraction failed for org {org_id}: {e}")
+            summary.update({'status': 'failed', 'error': str(e)})
+        finally:
+            if isinstance(client, SessionTransport):
+                client.close()
+            await context.close()
+        summary['seconds'] = round(time.monotonic() - started, 1)
+    
+    return summary, user_ids
+
+async def extract_orgs(config):
+    """Log in, then extract every configured org concurrently, one context per org in a single browser.
+    
+    Returns None if the login fails.
+    """
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=config.get('headless', False))
+        storage_state, login_org_id = await login_and_capture_state(browser, config)
+        if not storage_state:
+            await browser.close()
+            return None
+        
+        org_ids = await resolve_org_ids(browser, storage_state, login_org_id, config)
+        
+        print("=" * 50)
+        print(f"FETCHING DATA ({len(org_ids)} orgs)")
+        print("=" * 50)
+        
+        semaphore = asyncio.Semaphore(config.get('org_concurrency', 4))
+        results = await asyncio.gather(*[
+            extract_org(browser, storage_state, org_id, config, semaphore) for org_id in org_ids
+        ])
+        await browser.close()
+    
+    return results
+
+def build_summary(results):
+    """Combine the per-org summaries; accounts that belong to several orgs are counted once in distinct_users"""
+    orgs = [summary for summary, _ in results]
+    succeeded = [summary for summary in orgs if summary['status'] == 'ok']
+    distinct_users = set().union(*(user_ids for _, user_ids in results))
+    
+    return {
+        'orgs': orgs,
+        'totals': {
+            'orgs': len(orgs),
+            'failed_orgs': len(orgs) - len(succeeded),
+            'users': sum(summary['users'] for summary in succeeded),
+            'distinct_users': len(distinct_users),
+            'groups': sum(summary['groups'] for summary in succeeded),
+            'memberships': sum(summary['memberships'] for summary in succeeded)
+        }
+    }
+
+def run_multi_org_extraction(config):
+    """Log in once, extract every org in config org_ids and write per-org output plus a combined summary"""
+    configure_admin_url(config)
+    warn_ignored_settings(config, 'multi-org')
+    results = asyncio.run(extract_orgs(config))
+    if results is None:
+        return
+    summary = build_summary(results)
+    save_json(summary, os.path.join(config.get('org_output_dir', ORG_OUTPUT_DIR), SUMMARY_FILE))
+    
+    print("=" * 50)
+    print("MULTI-ORG EXTRACTION COMPLETE")
+    print("=" * 50)
+    for org in summary['orgs']:
+        if org['status'] == 'ok':
+            print(f"{org['org_id']}: {org['users']} users, {org['groups']} groups, "
+                  f"{org['memberships']} memberships in {org['seconds']}s")
+        else:
+            print(f"{org['org_id']}: FAILED after {org['seconds']}s ({org['error']})")
+    totals = summary['totals']
+    print(f"Total: {totals['users']} users ({totals['distinct_users']} distinct), {totals['groups']} groups "
+          f"across {totals['orgs'] - totals['failed_orgs']}/{totals['orgs']} orgs")
+    
+    RUN_METRICS.write_outputs(config, 'extract')
+
+if __name__ == "__main__":
+    run_multi_org_extraction(load_config())
@@ -0,0 +1,134 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import hashlib
+import json
+import sys
+
+# Listing fingerprints are only needed by incremental mode, so hashing raw entries is opt-in
+_fingerprint_listings = False
+
+def configure_listing_fingerprints(config):
+    """Fingerprint raw listing entries at projection time only when config['incremental'] is set"""
+    global _fingerprint_listings
+    _fingerprint_listings = bool(config.get('incremental', False))
+
+def fingerprint(record):
+    """Stable short hash of a record, independent of key order"""
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+def listing_fingerprint(raw):
+    return fingerprint(raw) if _fingerprint_listings else None
+
+def intern(value):
+    """Intern repeated strings (IDs, status values) so every record shares one copy"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class User:
+    """A user projected down to the fields the outputs use; the raw API payload is not kept.
+    
+    `listing` is the fingerprint of the full raw listing entry, taken before the
+    payload is dropped, so incremental mode still notices changes to fields
+    that are not projected. It is None unless incremental mode is on.
+    """
+    
+    __slots__ = ('id', 'name', 'email', 'status', 'listing')
+    
+    def __init__(self, id, name='', email='', status='unknown', listing=None):
+        self.id = intern(id)
+        self.name = name
+        self.email = email
+        self.status = intern(status)
+        self.listing = listing
+    
+    @classmethod
+    def from_api(cls, raw):
+        """Project one users-listing entry; accountStatus wins over status when both are present"""
+        status = raw['accountStatus'] if 'accountStatus' in raw else raw.get('status', 'unknown')
+        return cls(raw.get('accountId'), raw.get('displayName', ''), raw.get('email', ''), status, listing_fingerprint(raw))
+    
+    @classmethod
+    def from_checkpoint(cls, saved):
+        """Reload a record written by to_checkpoint; older checkpoints hold the raw entry instead"""
+        if 'listing' not in saved:
+            return cls.from_api(saved)
+        return cls(saved['accountId'], saved['displayName'], saved['email'], saved['status'], saved['listing'])
+    
+    def to_api(self):
+        """The projected fields under the API's names"""
+        return {'accountId': self.id, 'displayName': self.name, 'email': self.email, 'status': self.status}
+    
+    def to_checkpoint(self):
+        return dict(self.to_api(), listing=self.listing)
+    
+    def __repr__(self):
+        return f"User({self.id!r}, {self.name!r})"
+
+class Group:
+    """A group projected down to the fields the outputs use"""
+    
+    __slots__ = ('id', 'name', 'description', 'listing')
+    
+    def __init__(self, id, name='', description='', listing=None):
+        self.id = intern(id)
+        self.name = name
+        self.description = description
+        self.listing = listing
+    
+    @classmethod
+    def from_api(cls, raw):
+        return cls(raw.get('id'), raw.get('name', ''), raw.get('description', ''), listing_fingerprint(raw))
+    
+    @classmethod
+    def from_checkpoint(cls, saved):
+        if 'listing' not in saved:
+            return cls.from_api(saved)
+        return cls(saved['id'], saved['name'], saved['description'], saved['listing'])
+    
+    def to_api(self):
+        return {'id': self.id, 'name': self.name, 'description': self.description}
+    
+    def to_checkpoint(self):
+        return dict(self.to_api(), listing=self.listing)
+    
+    def __repr__(self):
+        return f"Group({self.id!r}, {self.name!r})"
+
+class Membership:
+    """Member account IDs of one group, held as a tuple of interned strings"""
+    
+    __slots__ = ('group_id', 'member_ids')
+    
+    def __init__(self, group_id, member_ids):
+        self.group_id = intern(group_id)
+        self.member_ids = tuple(intern(user_id) for user_id in member_ids)
+    
+    def __repr__(self):
+        return f"Membership({self.group_id!r}, {len(self.member_ids)} members)"
+
+def project_users(raw_users):
+    return [User.from_api(user) for user in raw_users]
+
+def project_groups(raw_groups):
+    return [Group.from_api(group) for group in raw_groups]
@@ -0,0 +1,228 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from gateway import THROTTLE_STATUSES, GatewayError
+from metrics import endpoint_name
+
+CACHE_DIR = '.response_cache'
+CACHE_MODES = ('off', 'read-through', 'offline')
+
+# Read-only POST endpoints; every other POST changes something and is never cached
+CACHEABLE_POSTS = ('last-active-date-bulk',)
+
+DEFAULT_TTLS = {
+    'last-active-date-bulk': 3600,
+    'members': 3600,
+    'groups': 3600,
+    'users': 3600,
+    'directories': 86400
+}
+
+class CacheMiss(GatewayError):
+    """Raised in offline mode for a request that has no cached response"""
+    
+    def __init__(self, url):
+        super().__init__(504, url)
+
+def cache_key(method, url, body=None):
+    payload = json.dumps([method.upper(), url, body], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def is_cacheable(method, url):
+    return method.upper() == 'GET' or any(endpoint in url for endpoint in CACHEABLE_POSTS)
+
+class ResponseCache:
+    """Content-addressed, gzip-compressed store of gateway responses with per-endpoint TTLs.
+    
+    Entries live at <directory>/<key[:2]>/<key>.json.gz where the key hashes
+    method, URL and body. A hit refreshes the file's mtime, and once the cache
+    grows past max_bytes the least recently used entries are deleted.
+    """
+    
+    def __init__(self, directory=CACHE_DIR, ttls=None, default_ttl=3600, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(size for _, _, size in self._entries())
+    
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get('cache_dir', CACHE_DIR),
+            config.get('cache_ttls'),
+            config.get('cache_default_ttl', 3600),
+            config.get('cache_max_mb', 512) * 1024 * 1024
+        )
+    
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json.gz")
+    
+    def _entries(self):
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json.gz'):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_mtime, stat.st_size
+    
+    def ttl_for(self, url):
+        """TTL configured for the URL's endpoint, keyed by the last segment of its route"""
+        endpoint = endpoint_name(url).rstrip('/').rsplit('/', 1)[-1]
+        return self.ttls.get(endpoint, self.default_ttl)
+    
+    def get(self, method, url, body=None, ignore_ttl=False):
+        """Return (True, cached body) on a hit, (False, None) on a miss or expired entry"""
+        path = self._path(cache_key(method, url, body))
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return False, None
+        
+        if not ignore_ttl and time.time() - entry['stored_at'] > self.ttl_for(url):
+            with self.lock:
+                self.misses += 1
+            return False, None
+        
+        # Touch the file so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self.lock:
+            self.hits += 1
+        return True, entry['body']
+    
+    def put(self, method, url, body, response):
+        path = self._path(cache_key(method, url, body))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump({'method': method, 'url': url, 'stored_at': time.time(), 'body': response}, f)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        
+        with self.lock:
+            self.size += os.path.getsize(path) - previous
+            over_budget = self.size > self.max_bytes
+        if over_budget:
+            self.evict()
+    
+    def evict(self):
+        """Delete least recently used entries until the cache is back under 90% of max_bytes"""
+        with self.lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            target = self.max_bytes * 0.9
+            for path, _, size in entries:
+                if self.size <= target:
+                    break
+                try:
+                    os.remove(path)
+                    self.size -= size
+                except OSError:
+                    pass
+    
+    def clear(self):
+        with self.lock:
+            for path, _, _ in list(self._entries()):
+                os.remove(path)
+            self.size = 0
+
+class CachingTransport:
+    """Wraps a gateway transport so cacheable requests are answered from a ResponseCache.
+    
+    'read-through' serves fresh entries and stores every successful response;
+    'offline' serves any entry regardless of age and raises CacheMiss instead of
+    touching the network (the wrapped transport may then be None).
+    """
+    
+    def __init__(self, transport, cache, mode='read-through'):
+        self.transport = transport
+        self.cache = cache
+        self.mode = mode
+    
+    def _lookup(self, url, method, body):
+        if not is_cacheable(method, url):
+            return False, None
+        return self.cache.get(method, url, body, ignore_ttl=self.mode == 'offline')
+    
+    def request(self, url, method='GET', body=None, retry_statuses=THROTTLE_STATUSES):
+        hit, cached = self._lookup(url, method, body)
+        if hit:
+            return cached
+        if self.mode == 'offline' or self.transport is None:
+            raise CacheMiss(url)
+        
+        response = self.transport.request(url, method, body, retry_statuses)
+        if is_cacheable(method, url):
+            self.cache.put(method, url, body, response)
+        return response
+    
+    def get_json(self, url):
+        return self.request(url)
+    
+    def post_json(self, url, body):
+        return self.request(url, 'POST', body)
+    
+    def request_many(self, calls, max_in_flight=8, retry_statuses=THROTTLE_STATUSES):
+        """Serve hits from the cache and send only the misses, keeping results in call order"""
+        results = [None] * len(calls)
+        missing = []
+        for index, (url, method, body) in enumerate(calls):
+            hit, cached = self._lookup(url, method, body)
+            if hit:
+                results[index] = cached
+            elif self.mode == 'offline' or self.transport is None:
+                results[index] = CacheMiss(url)
+            else:
+                missing.append(index)
+        
+        if missing:
+            responses = self.transport.request_many([calls[index] for index in missing], max_in_flight, retry_statuses)
+            for index, response in zip(missing, responses):
+                results[index] = response
+                url, method, body = calls[index]
+                if not isinstance(response, Exception) and is_cacheable(method, url):
+                    self.cache.put(method, url, body, response)
+        return results
+    
+    def close(self):
+        print(f"Response cache: {self.cache.hits} hits, {self.cache.misses} misses, "
+              f"{self.cache.size / (1024 * 1024):.1f} MB on disk")
+        if self.transport:
+            self.transport.close()
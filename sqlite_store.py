@@ -0,0 +1,194 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import argparse
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE users (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT,
+    last_active TEXT,
+    status TEXT
+);
+CREATE TABLE groups (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    description TEXT
+);
+CREATE TABLE memberships (
+    group_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    PRIMARY KEY (group_id, user_id)
+) WITHOUT ROWID;
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Built after the bulk load, which is much faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX idx_users_email ON users (email);
+CREATE INDEX idx_memberships_user ON memberships (user_id, group_id);
+"""
+
+BATCH_SIZE = 5000
+
+class SqliteStore:
+    """SQLite copy of one extraction: users, groups and a single membership edge table.
+    
+    Rows are bulk-loaded into a temporary database file inside one transaction
+    and the file replaces `path` only on close(), so readers always see a
+    complete extraction.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        
+        # The streaming writer thread does the inserts, one stage at a time
+        self.conn = sqlite3.connect(self.tmp_path, check_same_thread=False)
+        # The temp file is thrown away on failure, so durability during the load buys nothing
+        self.conn.execute('PRAGMA journal_mode = OFF')
+        self.conn.execute('PRAGMA synchronous = OFF')
+        self.conn.executescript(SCHEMA)
+        self.conn.execute('BEGIN')
+        self.counts = {'users': 0, 'groups': 0, 'memberships': 0}
+    
+    def add_users(self, parsed_users):
+        rows = [
+            (user['id'], user.get('name'), user.get('email'), user.get('last_active'), user.get('status'))
+            for user in parsed_users if user.get('id')
+        ]
+        self.conn.executemany('INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?)', rows)
+        self.counts['users'] += len(rows)
+    
+    def add_groups(self, parsed_groups):
+        """Insert groups and their member edges; memberships are stored once, from the group side"""
+        rows = [(group['id'], group.get('name'), group.get('description')) for group in parsed_groups if group.get('id')]
+        edges = [
+            (group['id'], user_id)
+            for group in parsed_groups if group.get('id')
+            for user_id in group.get('members', [])
+        ]
+        self.conn.executemany('INSERT OR REPLACE INTO groups VALUES (?, ?, ?)', rows)
+        self.conn.executemany('INSERT OR IGNORE INTO memberships VALUES (?, ?)', edges)
+        self.counts['groups'] += len(rows)
+        self.counts['memberships'] += len(edges)
+    
+    def close(self):
+        self.conn.executescript(INDEXES)
+        self.conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('extracted_at', str(int(time.time()))),
+            *[(f"{table}_count", str(count)) for table, count in self.counts.items()]
+        ])
+        self.conn.commit()
+        self.conn.execute('ANALYZE')
+        self.conn.close()
+        os.replace(self.tmp_path, self.path)
+        print(f"Saved {self.counts['users']} users, {self.counts['groups']} groups and "
+              f"{self.counts['memberships']} memberships to {self.path}")
+    
+    def abort(self):
+        self.conn.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+class SqliteRecordWriter:
+    """RecordWriter-compatible sink that batches streamed user or group records into a SqliteStore"""
+    
+    def __init__(self, store, kind):
+        self.store = store
+        self.add = store.add_users if kind == 'users' else store.add_groups
+        self.batch = []
+        self.count = 0
+    
+    def write(self, record):
+        self.batch.append(record)
+        self.count += 1
+        if len(self.batch) >= BATCH_SIZE:
+            self.flush()
+    
+    def flush(self):
+        if self.batch:
+            self.add(self.batch)
+            self.batch = []
+    
+    def close(self):
+        self.flush()
+
+def write_sqlite(path, parsed_users, parsed_groups):
+    """Write a complete extraction to `path` in one go"""
+    store = SqliteStore(path)
+    try:
+        store.add_groups(parsed_groups)
+        store.add_users(parsed_users)
+    except Exception:
+        store.abort()
+        raise
+    store.close()
+
+def groups_of_user(conn, user_id):
+    return [row[0] for row in conn.execute('SELECT group_id FROM memberships WHERE user_id = ?', (user_id,))]
+
+def members_of_group(conn, group_id):
+    return [row[0] for row in conn.execute('SELECT user_id FROM memberships WHERE group_id = ?', (group_id,))]
+
+def find_user_by_email(conn, email):
+    return conn.execute('SELECT id, name, email, last_active, status FROM users WHERE email = ?', (email,)).fetchone()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query the SQLite output of extract_data.py")
+    parser.add_argument('path', nargs='?', default='atlassian.db')
+    parser.add_argument('--user', help="list the groups of this account ID")
+    parser.add_argument('--group', help="list the members of this group ID")
+    parser.add_argument('--email', help="look up a user by email")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    conn = sqlite3.connect(f"file:{args.path}?mode=ro", uri=True)
+    started = time.perf_counter()
+    
+    if args.user:
+        result = groups_of_user(conn, args.user)
+    elif args.group:
+        result = members_of_group(conn, args.group)
+    elif args.email:
+        result = find_user_by_email(conn, args.email)
+    else:
+        result = dict(conn.execute('SELECT key, value FROM meta'))
+    
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(result)
+    print(f"({elapsed_ms:.2f} ms)")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import queue
+import threading
+
+_DONE = object()
+
+class RecordWriter:
+    """Incrementally writes records as NDJSON and as a JSON array.
+    
+    The array is laid out exactly like save_json's indent=2 output, so the file
+    is valid JSON as soon as close() runs while records stream in before that.
+    """
+    
+    def __init__(self, json_path, ndjson_path=None):
+        self.json_path = json_path
+        self.ndjson_path = ndjson_path
+        self.count = 0
+        self._json = open(json_path, 'w', encoding='utf-8')
+        self._ndjson = open(ndjson_path, 'w', encoding='utf-8') if ndjson_path else None
+        self._json.write('[')
+    
+    def write(self, record):
+        if self._ndjson:
+            self._ndjson.write(json.dumps(record, ensure_ascii=False))
+            self._ndjson.write('\n')
+        
+        body = json.dumps(record, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+        self._json.write(',\n  ' if self.count else '\n  ')
+        self._json.write(body)
+        self.count += 1
+    
+    def flush(self):
+        self._json.flush()
+        if self._ndjson:
+            self._ndjson.flush()
+    
+    def close(self):
+        self._json.write('\n]' if self.count else ']')
+        self._json.close()
+        if self._ndjson:
+            self._ndjson.close()
+        print(f"Saved {self.count} records to {self.json_path}" + (f" and {self.ndjson_path}" if self.ndjson_path else ""))
+
+class TeeWriter:
+    """Sends every record to several writers; the record count is the first writer's"""
+    
+    def __init__(self, *writers):
+        self.writers = writers
+    
+    @property
+    def count(self):
+        return self.writers[0].count
+    
+    def write(self, record):
+        for writer in self.writers:
+            writer.write(record)
+    
+    def flush(self):
+        for writer in self.writers:
+            writer.flush()
+    
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+class StreamingPipeline:
+    """fetch -> project -> write, connected by bounded queues.
+    
+    The caller feeds raw pages from its own thread (the sync Playwright page
+    cannot be shared). A projection thread turns each page into output records
+    and a writer thread appends them to disk, so at most `queue_depth` pages per
+    stage are held in memory and output appears while fetching continues.
+    """
+    
+    def __init__(self, project, writer, queue_depth=8):
+        self.project = project
+        self.writer = writer
+        self._pages = queue.Queue(maxsize=queue_depth)
+        self._records = queue.Queue(maxsize=queue_depth)
+        self._errors = []
+        self._threads = [
+            threading.Thread(target=self._run_projection, daemon=True),
+            threading.Thread(target=self._run_writer, daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def feed(self, item):
+        """Hand one fetched page to the pipeline; blocks while the projection stage is backed up"""
+        if self._errors:
+            raise self._errors[0]
+        self._pages.put(item)
+    
+    def _run_projection(self):
+        try:
+            while True:
+                item = self._pages.get()
+                if item is _DONE:
+                    break
+                if not self._errors:
+                    self._records.put(self.project(item))
+        except Exception as e:
+            self._errors.append(e)
+            # Keep draining so the feeding thread never blocks on a dead stage
+            while self._pages.get() is not _DONE:
+                pass
+        finally:
+            self._records.put(_DONE)
+    
+    def _run_writer(self):
+        try:
+            while True:
+                records = self._records.get()
+                if records is _DONE:
+                    break
+                if self._errors:
+                    continue
+                for record in records:
+                    self.writer.write(record)
+                self.writer.flush()
+        except Exception as e:
+            self._errors.append(e)
+            while self._records.get() is not _DONE:
+                pass
+    
+    def close(self):
+        """Wait for every fed page to be written, close the output and return the record count"""
+        self._pages.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+        self.writer.close()
+        if self._errors:
+            raise self._errors[0]
+        return self.writer.count
@@ -0,0 +1,80 @@
+# MIT License
+
+# Copyright (c) 2025 Darshan Gowda M
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES, OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Resolves once the DOM has gone `quietMs` without a mutation, or after `maxMs` at the latest
+DOM_SETTLED_JS = """
+([quietMs, maxMs]) => new Promise(resolve => {
+    let timer = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(done, quietMs);
+    });
+    const cap = setTimeout(done, maxMs);
+    function done() {
+        observer.disconnect();
+        clearTimeout(timer);
+        clearTimeout(cap);
+        resolve();
+    }
+    observer.observe(document.body, {childList: true, subtree: true, attributes: true});
+    timer = setTimeout(done, quietMs);
+})
+"""
+
+DEFAULT_MAX_WAIT_MS = 15000
+
+def max_wait_ms(config):
+    """Upper bound for any single event-driven wait; also used as the page's default timeout"""
+    return (config or {}).get('max_wait_ms', DEFAULT_MAX_WAIT_MS)
+
+def wait_for_any(page, selectors, timeout=None):
+    """Wait until the first of `selectors` is visible; returns the matching selector or None on timeout"""
+    combined = page.locator(selectors[0])
+    for selector in selectors[1:]:
+        combined = combined.or_(page.locator(selector))
+    
+    try:
+        combined.first.wait_for(state='visible', timeout=timeout)
+    except Exception:
+        return None
+    
+    for selector in selectors:
+        if page.query_selector(selector):
+            return selector
+    return None
+
+def click_and_wait_for_response(page, locator, predicate, timeout=None):
+    """Click and return the first response matching `predicate`, or None if none arrives in time"""
+    try:
+        with page.expect_response(predicate, timeout=timeout) as response_info:
+            locator.click()
+        return response_info.value
+    except Exception:
+        return None
+
+def wait_for_dom_settled(page, quiet_ms=150, timeout=None):
+    """Wait until the page stops mutating, e.g. after a dropdown selection renders its chip"""
+    try:
+        page.evaluate(DOM_SETTLED_JS, [quiet_ms, timeout or 2000])
+    except Exception:
+        pass